@@ -0,0 +1,28 @@
+"""
+Shared data layer for the Aadhar insight dashboards.
+All apps read the api_data_aadhar_* shards through here instead of parsing CSVs themselves.
+"""
+from .schema import SCHEMAS, column_dtypes, family_columns, get_schema, read_csv_typed
+from .shards import FAMILIES, Shard, find_shards, parse_shard_name
+from .snapshot import build_snapshot, family_bounds, ingest, load_snapshot
+from .partitions import ensure_partitions, load_family, load_partitions
+from .shared import open_family, publish_family
+from .backend import BACKENDS, backend_name
+from .join import join_families
+from .kernels import group_keys, group_means, group_reduce, group_sums
+from .outofcore import join_out_of_core, out_of_core_enabled
+from .sql import connect, query, where_clause
+from .facts import FactTable, compact_frame, expand_frame, table_mb
+from .persist import disk_cache
+from .cube import CUBE_KEYS, CUBE_MEASURES, MEASURES, ROLLUPS, ROW_COUNTS, cube_query, ensure_cube, family_totals, plan_query
+from .tail import tail_aggregate, tail_interval, tail_rows, tail_version, watch_tail
+from .memory import frame_mb, heap_tracing_enabled, track_peak
+from .store import cache_dir, file_digest
+from .parallel import aggregate_family, map_shards
+from .streaming import fold_chunks, iter_chunks, stream_family
+from .manifest import check_ranges, load_manifest
+from .incremental import incremental_aggregate, state_district_pairs
+from .calendar import MISSING_DAY, attach_calendar, calendar_table, day_to_date, to_day_key
+from .aliases import load_aliases, suggest_aliases, update_alias_table
+from .duplicates import duplicate_report
+from .validation import check_frame, validate_frame
@@ -0,0 +1,53 @@
+# Ingest entry point: `python -m aadhar_data` pre-builds the snapshot cache
+# (snapshots, partitions and the aggregate cube) so the first dashboard visitor does not pay for the CSV parse.
+# `python -m aadhar_data aliases` proposes new spelling aliases for review.
+import os
+import sys
+from collections import defaultdict
+
+from .aliases import alias_path, update_alias_table
+from .cube import ROLLUPS, open_cube
+from .duplicates import duplicate_report
+from .incremental import incremental_aggregate
+from .manifest import check_ranges
+from .partitions import ensure_partitions
+from .schema import get_schema
+from .shards import FAMILIES
+from .snapshot import ingest
+from .store import cache_dir
+from .validation import quarantine_counts
+
+
+def suggest():
+    # Volumes decide which spelling of a cluster is canonical
+    state_weights = defaultdict(int)
+    district_weights = defaultdict(lambda: defaultdict(int))
+    for family in FAMILIES:
+        measure = get_schema(family).counts[0]
+        totals = incremental_aggregate(family, ['state', 'district'], [measure])
+        for state, district, volume in totals.itertuples(index=False):
+            if isinstance(state, str) and isinstance(district, str):
+                state_weights[state] += int(volume)
+                district_weights[state][district] += int(volume)
+    added = update_alias_table(state_weights, district_weights)
+    print(f"{added} new alias suggestion(s) written to {alias_path()}; set reviewed=yes to apply them.")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['aliases']:
+        suggest()
+    else:
+        print(f"Snapshots ready for {ingest()} shard(s).")
+        for family in FAMILIES:
+            print(f"{family}: {len(ensure_partitions(family))} state/month partition file(s).")
+            for issue in check_ranges(family):
+                print(f"Warning: {issue}")
+        print(f"Aggregate cube ready: {open_cube().num_rows} (day, state, district, pincode) row(s).")
+        for level, dims in ROLLUPS.items():
+            print(f"Rollup ({', '.join(dims)}): {open_cube(level).num_rows} row(s).")
+        for family, rejected in quarantine_counts().items():
+            if rejected:
+                print(f"{family}: {rejected} row(s) failed validation, see {os.path.join(cache_dir(), 'quarantine', family)}.")
+        for family, stats in duplicate_report().items():
+            print(f"{family}: {stats['duplicates']} exact duplicate(s) dropped ({stats['duplicate_rate']:.2%}), "
+                  f"{stats['key_collisions']} key collision(s) kept ({stats['collision_rate']:.2%}).")
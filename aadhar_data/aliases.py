@@ -0,0 +1,203 @@
+import csv
+import difflib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .schema import normalize_categories
+from .shards import data_dir
+from .store import file_digest
+
+# --- Name Alias Resolution ---
+# The raw drops spell some states and districts several ways (Westbengal,
+# West Bangal, Orissa, ...). A reviewed mapping table next to the shards folds
+# each variant into one canonical name while snapshots are built, so every app
+# sees a single key per place. `python -m aadhar_data aliases` proposes new
+# entries from fuzzy matches; only rows marked reviewed=yes are applied.
+# District rows name the state they apply in, since the same spelling can be a
+# variant in one state and a different place in another.
+
+ALIAS_FILE = 'aadhar_aliases.csv'
+ALIAS_FIELDS = ('state', 'district')
+TABLE_COLUMNS = ['field', 'state', 'alias', 'canonical', 'score', 'reviewed']
+
+# Fuzzy matches at or above this similarity are proposed for review
+SUGGEST_CUTOFF = 0.88
+
+# Names that differ in one of these words are different places (East/West Godavari)
+DISTINCT_WORDS = {'north', 'south', 'east', 'west', 'central', 'upper', 'lower', 'new', 'old'}
+
+
+def alias_path(directory=None):
+    return os.path.join(directory or data_dir(), ALIAS_FILE)
+
+
+def read_alias_table(directory=None):
+    """
+    All rows of the mapping table (reviewed or not), as dicts.
+    """
+    try:
+        with open(alias_path(directory), newline='') as fh:
+            return list(csv.DictReader(fh))
+    except FileNotFoundError:
+        return []
+
+
+def write_alias_table(rows, directory=None):
+    rows = sorted(rows, key=lambda r: (r['field'], r.get('state', ''), r['canonical'], r['alias']))
+    tmp = f"{alias_path(directory)}.{os.getpid()}.tmp"
+    with open(tmp, 'w', newline='') as fh:
+        writer = csv.DictWriter(fh, fieldnames=TABLE_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows({c: r.get(c, '') for c in TABLE_COLUMNS} for r in rows)
+    os.replace(tmp, alias_path(directory))
+
+
+def load_aliases(directory=None):
+    """
+    Returns the reviewed rows as {'state': {variant: canonical name},
+    'district': {(state, variant): canonical name}}. District rows without a
+    state are skipped.
+    """
+    aliases = {field: {} for field in ALIAS_FIELDS}
+    for row in read_alias_table(directory):
+        if row.get('reviewed', '').strip().lower() != 'yes' or row.get('field') not in aliases:
+            continue
+        if row['field'] == 'district':
+            if not row.get('state'):
+                continue
+            aliases['district'][(row['state'], row['alias'])] = row['canonical']
+        else:
+            aliases['state'][row['alias']] = row['canonical']
+    # Follow chains (A -> B, B -> C) so every variant maps straight to its final
+    # name; district chains stay within their state
+    for mapping in aliases.values():
+        for key in mapping:
+            seen = {key}
+            step = _chain_key(key, mapping[key])
+            while step in mapping and step not in seen:
+                seen.add(step)
+                mapping[key] = mapping[step]
+                step = _chain_key(key, mapping[key])
+    return aliases
+
+
+def _chain_key(key, name):
+    return (key[0], name) if isinstance(key, tuple) else name
+
+
+def alias_tag(directory=None):
+    """
+    Short fingerprint of the mapping table; anything built with aliases applied
+    carries it so that editing the table triggers a rebuild.
+    """
+    path = alias_path(directory)
+    if not os.path.exists(path):
+        return 'none'
+    return file_digest(path, directory)[:8]
+
+
+def resolve_aliases(df, aliases):
+    """
+    Normalises the state/district columns of a chunk and folds known variants
+    into their canonical names (unique categories only; districts by their
+    unique (state, district) pairs).
+    """
+    resolved = {}
+    if 'state' in df.columns:
+        resolved['state'] = normalize_categories(df['state'], aliases.get('state'))
+    if 'district' in df.columns:
+        resolved['district'] = normalize_categories(df['district'])
+        if 'state' in resolved and aliases.get('district'):
+            resolved['district'] = _resolve_districts(resolved['state'], resolved['district'], aliases['district'])
+    return df.assign(**resolved)
+
+
+def _resolve_districts(states, districts, aliases):
+    names = districts.cat.categories
+    if not names.isin([alias for _, alias in aliases]).any():
+        return districts
+    # Number each (state, district) pair; 0 stands for a missing name
+    width = len(names) + 1
+    pairs = (states.cat.codes.to_numpy(np.int64) + 1) * width + districts.cat.codes.to_numpy(np.int64) + 1
+    codes, uniques = pd.factorize(pairs)
+    mapped = []
+    for pair in uniques:
+        state, district = divmod(int(pair), width)
+        name = names[district - 1] if district else None
+        if state and name is not None:
+            name = aliases.get((states.cat.categories[state - 1], name), name)
+        mapped.append(name)
+    categories = pd.Index(sorted({name for name in mapped if name is not None}))
+    remap = categories.get_indexer(pd.Index(mapped, dtype=object))
+    return pd.Series(pd.Categorical.from_codes(remap[codes], categories=categories), index=districts.index, name=districts.name)
+
+
+def _fold(name):
+    # Spacing, punctuation and '&' vs 'and' never distinguish two places
+    return re.sub(r'[^a-z0-9]', '', name.lower().replace('&', 'and'))
+
+
+def _distinct_words(name):
+    return DISTINCT_WORDS.intersection(re.findall(r'[a-z]+', name.lower()))
+
+
+def suggest_aliases(weights, cutoff=SUGGEST_CUTOFF):
+    """
+    Clusters near-duplicate names. `weights` maps each name to its volume; the
+    heaviest spelling of a cluster becomes the canonical one.
+    Returns [(alias, canonical, score)], score 1.0 meaning the names differ only
+    in spacing/punctuation.
+    """
+    suggestions = []
+    canonical = []
+    for name in sorted(weights, key=lambda n: (-weights[n], n)):
+        folded = _fold(name)
+        best = None
+        for candidate in canonical:
+            other = _fold(candidate)
+            if other == folded:
+                best = (candidate, 1.0)
+                break
+            if _distinct_words(candidate) != _distinct_words(name):
+                continue
+            matcher = difflib.SequenceMatcher(None, other, folded)
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or score > best[1]):
+                best = (candidate, score)
+        if best is None:
+            canonical.append(name)
+        else:
+            suggestions.append((name, best[0], round(best[1], 3)))
+    return suggestions
+
+
+def update_alias_table(state_weights, district_weights, directory=None, cutoff=SUGGEST_CUTOFF):
+    """
+    Adds new suggestions to the mapping table and returns how many were added.
+    `district_weights` maps state -> {district: volume}; districts are only
+    matched against others in the same state and their rows record that state.
+    Variants that differ only in spacing/punctuation are marked reviewed, fuzzy
+    matches are left for review.
+    """
+    rows = read_alias_table(directory)
+    known = {(r['field'], r.get('state', ''), r['alias']) for r in rows}
+    proposals = [('state', '', s) for s in suggest_aliases(state_weights, cutoff)]
+    for state, districts in district_weights.items():
+        proposals.extend(('district', state, s) for s in suggest_aliases(districts, cutoff))
+
+    added = 0
+    for field, state, (alias, canonical, score) in proposals:
+        if (field, state, alias) in known:
+            continue
+        known.add((field, state, alias))
+        rows.append({'field': field, 'state': state, 'alias': alias, 'canonical': canonical, 'score': score,
+                     'reviewed': 'yes' if score == 1.0 else 'no'})
+        added += 1
+    if added:
+        write_alias_table(rows, directory)
+    return added
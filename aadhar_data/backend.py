@@ -0,0 +1,127 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .calendar import MISSING_DAY, to_day_key
+from .schema import normalize_name
+from .zonemap import date_bounds
+
+# --- Compute Backends ---
+# The data layer's hot operations (grouped sums, the multi-family join and the
+# row filter of partition loads) run on pandas by default. With
+# AADHAR_BACKEND=polars they run on Polars' multi-threaded engine instead,
+# behind the same functions, so no dashboard changes. Frames cross over
+# through Arrow and categorical keys cross as their integer codes, so the
+# shared categories survive the round trip and both backends return identical
+# frames. Polars is optional: when it is not installed pandas is used.
+
+BACKENDS = ('pandas', 'polars')
+
+
+def _polars():
+    try:
+        import polars
+    except ImportError:
+        return None
+    return polars
+
+
+def backend_name():
+    """
+    Active backend: AADHAR_BACKEND if set (and importable), else 'pandas'.
+    """
+    name = os.environ.get('AADHAR_BACKEND', 'pandas').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown AADHAR_BACKEND {name!r}; expected one of {BACKENDS}")
+    if name == 'polars' and _polars() is None:
+        warnings.warn("AADHAR_BACKEND=polars but polars is not installed; using pandas")
+        return 'pandas'
+    return name
+
+
+def to_polars(df):
+    """
+    Polars frame of `df` plus the categories of its categorical columns, which
+    are carried as their integer codes (-1, i.e. missing, becomes null).
+    """
+    pl = _polars()
+    categories = {}
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories[col] = values.cat.categories
+            values = values.cat.codes
+        columns.append(pl.Series(col, values.to_numpy()))
+    frame = pl.DataFrame(columns)
+    return frame.with_columns([pl.when(pl.col(c) >= 0).then(pl.col(c)).alias(c) for c in categories]), categories
+
+
+def from_polars(frame, categories):
+    """
+    pandas frame of a Polars result, rebuilding categoricals from their codes.
+    """
+    out = {}
+    for col in frame.columns:
+        values = frame.get_column(col).to_numpy()
+        if col in categories:
+            out[col] = pd.Categorical.from_codes(values, categories=categories[col])
+        else:
+            out[col] = values
+    return pd.DataFrame(out)
+
+
+def polars_group_sum(df, by, measures):
+    # Groups in order of first appearance, as the pandas path (sort=False) does
+    pl = _polars()
+    frame, categories = to_polars(df[list(by) + list(measures)])
+    result = frame.group_by(list(by), maintain_order=True).agg([pl.col(m).sum() for m in measures])
+    result = result.drop_nulls(list(by))
+    return from_polars(result, categories)
+
+
+def polars_join_sums(frames, keys):
+    """
+    Keys and raw sums (int64/float64) of every measure of `frames`, grouped on
+    `keys` and sorted by key; rows with a missing key are dropped.
+    """
+    pl = _polars()
+    parts = []
+    categories = {}
+    for df in frames:
+        part, cats = to_polars(df)
+        categories.update(cats)
+        parts.append(part.with_columns([pl.col(c).cast(pl.Int64 if part.schema[c].is_integer() else pl.Float64) for c in df.columns if c not in keys]))
+    stacked = pl.concat(parts, how='diagonal_relaxed')
+    measures = [c for c in stacked.columns if c not in keys]
+    result = (stacked.drop_nulls(keys)
+              .group_by(keys)
+              .agg([pl.col(m).fill_null(0).fill_nan(0).sum() if stacked.schema[m].is_float() else pl.col(m).fill_null(0).sum() for m in measures])
+              .sort(keys))
+    return from_polars(result, categories)
+
+
+def polars_filter(table, date_range, states, tables):
+    """
+    Rows of a stored Arrow table (day keys, dictionary-coded states) inside the
+    date window and state selection, filtered by Polars before any pandas
+    conversion.
+    """
+    pl = _polars()
+    frame = pl.from_arrow(table)
+    predicate = pl.lit(True)
+    if date_range is not None:
+        start, end = date_bounds(date_range)
+        predicate &= pl.col('day') != MISSING_DAY
+        if start is not None:
+            predicate &= pl.col('day') >= int(to_day_key([start])[0])
+        if end is not None:
+            predicate &= pl.col('day') <= int(to_day_key([end])[0])
+    if states is not None:
+        wanted = {normalize_name(s) for s in states}
+        names, rank = tables['state']
+        codes = np.flatnonzero(np.asarray([normalize_name(n) in wanted for n in names[rank]], dtype=bool)) if len(rank) else []
+        predicate &= pl.col('state').is_in([int(c) for c in codes])
+    return frame.filter(predicate).to_arrow()
@@ -0,0 +1,150 @@
+# Backend benchmark: `python -m aadhar_data.benchmark [--repeat N]` times each
+# dashboard's load and filter path on the pandas and Polars backends and
+# checks that both return the same frames.
+# `python -m aadhar_data.benchmark --kernels` instead times the grouped-sum
+# kernels against the pandas groupby calls they replace.
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from .backend import BACKENDS, _polars
+from .cube import CUBE_KEYS, MEASURES, cube_query
+from .join import join_families
+from .kernels import group_reduce
+from .partitions import load_family
+from .schema import get_schema
+from .snapshot import family_bounds
+from .streaming import stream_family
+
+KEYS = ['day', 'state', 'district', 'pincode']
+
+
+def selection(directory=None):
+    """
+    A typical filtered view: the last 30 days of data and the first three states.
+    """
+    bounds = family_bounds('demographic', directory)
+    if bounds['date_max'] is None:
+        return None, None
+    return (bounds['date_max'] - pd.Timedelta(days=30), bounds['date_max']), tuple(bounds['states'][:3])
+
+
+def _load_all(keys, date_range=None, states=None, directory=None):
+    return [load_family(f, keys + list(get_schema(f).counts), directory, date_range, states) for f in ('demographic', 'biometric', 'enrolment')]
+
+
+def app_pipelines(directory=None):
+    """
+    {app: callable} reproducing the data-layer work each dashboard does per load.
+    """
+    date_range, states = selection(directory)
+    return {
+        'new.py': lambda: load_family('demographic', ['day', 'state', 'district', 'demo_age_5_17', 'demo_age_17_'], directory, date_range, states),
+        'insight_2.py': lambda: load_family('enrolment', ['day', 'state', 'district', 'age_0_5', 'age_5_17', 'age_18_greater'], directory),
+        'insight_3.py': lambda: join_families([f.drop(columns='pincode') for f in _load_all(KEYS, date_range, states, directory)], KEYS[:3]),
+        'insight_4.py': lambda: join_families(_load_all(KEYS, date_range, states, directory), KEYS),
+        'insight_5.py': lambda: join_families([stream_family(f, ['state', 'district'], directory=directory) for f in ('biometric', 'demographic', 'enrolment')], ['state', 'district']),
+        'insight_6.py': lambda: [stream_family('enrolment', ['state', 'district', 'pincode'], directory=directory),
+                                 stream_family('biometric', ['pincode'], directory=directory),
+                                 stream_family('demographic', ['pincode'], directory=directory)],
+        'insight_7.py': lambda: [stream_family(f, ['state', 'district'], directory=directory) for f in ('biometric', 'demographic', 'enrolment')],
+    }
+
+
+def _same(a, b):
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a.equals(b)
+
+
+def _best(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeat=3, directory=None):
+    """
+    Best-of-`repeat` seconds per app and backend, plus whether the backends agree.
+    """
+    backends = [b for b in BACKENDS if b == 'pandas' or _polars() is not None]
+    previous = os.environ.get('AADHAR_BACKEND')
+    results = []
+    try:
+        for app, pipeline in app_pipelines(directory).items():
+            timings, outputs = {}, {}
+            for backend in backends:
+                os.environ['AADHAR_BACKEND'] = backend
+                outputs[backend] = pipeline()  # warm-up: builds caches, imports
+                timings[backend] = _best(pipeline, repeat)
+            results.append({'app': app, **timings, 'same': all(_same(outputs['pandas'], outputs[b]) for b in backends)})
+    finally:
+        if previous is None:
+            os.environ.pop('AADHAR_BACKEND', None)
+        else:
+            os.environ['AADHAR_BACKEND'] = previous
+    return pd.DataFrame(results)
+
+
+def kernel_cases(df):
+    """
+    {case: (pandas callable, kernel callable)} over the full-grain frame `df`,
+    covering the groupings the dashboards run on every rerun.
+    """
+    cases = {}
+    for by in (['state'], ['state', 'district'], ['date'], ['pincode'], ['state', 'district', 'pincode']):
+        name = ', '.join(by)
+        cases[f"sum by {name}"] = (
+            lambda by=by: df.groupby(by, observed=True)[MEASURES].sum().reset_index(),
+            lambda by=by: group_reduce(df, by, sums=MEASURES),
+        )
+    cases['sum + mean + size by state, district'] = (
+        lambda: df.groupby(['state', 'district'], observed=True).agg(
+            **{m: (m, 'sum') for m in MEASURES}, Enrolment_mean=('Enrolment_18_plus', 'mean'), rows=('state', 'size')).reset_index(),
+        lambda: group_reduce(df.assign(Enrolment_mean=df['Enrolment_18_plus']), ['state', 'district'],
+                             sums=MEASURES, means=['Enrolment_mean'], size='rows'),
+    )
+    return cases
+
+
+def run_kernels(repeat=3, directory=None):
+    """
+    Best-of-`repeat` seconds of each pandas groupby and its kernel on the
+    cube's full-grain frame, plus whether both return the same frame.
+    """
+    df = cube_query(['date'] + CUBE_KEYS[1:], directory=directory)
+    results = []
+    for case, (pandas_call, kernel_call) in kernel_cases(df).items():
+        expected, got = pandas_call(), kernel_call()
+        try:
+            pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+            same = True
+        except AssertionError:
+            same = False
+        results.append({'case': case, 'rows': len(df), 'pandas': _best(pandas_call, repeat),
+                        'kernel': _best(kernel_call, repeat), 'same': same})
+    report = pd.DataFrame(results)
+    report['speedup'] = report['pandas'] / report['kernel']
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m aadhar_data.benchmark")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--kernels', action='store_true', help="time the grouped-sum kernels against pandas groupby")
+    args = parser.parse_args()
+    if args.kernels:
+        print(run_kernels(args.repeat).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        sys.exit()
+    report = run(args.repeat)
+    if 'polars' in report.columns:
+        report['speedup'] = report['pandas'] / report['polars']
+    else:
+        print("polars is not installed; timing the pandas backend only.")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# --- Calendar Dimension ---
+# Dates are stored as an int16 day key (days since DAY_EPOCH). Only the few
+# hundred distinct date strings are ever parsed, and every calendar attribute
+# the dashboards use is looked up from a small per-day table instead of being
+# rebuilt row by row.
+
+DAY_EPOCH = pd.Timestamp('2000-01-01')
+MISSING_DAY = np.iinfo(np.int16).min
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+
+# insight_2: enrolments were batch-uploaded until Aug 2025 and logged daily from
+# Sept 2025. Only the months of that year count as real-time, as the page always split them
+REAL_TIME_ERA_YEAR, REAL_TIME_ERA_MONTH = 2025, 9
+ERA_NAMES = ['Batch Era (Pre-Aug)', 'Real-Time Era (Sept+)']
+
+CALENDAR_FIELDS = ('date', 'day_of_week', 'month', 'month_num', 'year', 'period', 'era')
+
+
+def parse_dates(values, date_format):
+    """
+    Parses date strings by parsing each distinct string once.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors='coerce')
+    return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index, name=values.name)
+
+
+def to_day_key(dates):
+    """
+    datetime64 values -> int16 day keys (MISSING_DAY for NaT).
+    """
+    dates = pd.Series(dates)
+    days = ((dates - DAY_EPOCH) // pd.Timedelta(days=1)).fillna(MISSING_DAY)
+    return days.astype('int16').to_numpy()
+
+
+def day_to_date(days):
+    """
+    int16 day keys -> datetime64[ns] (arithmetic only, no parsing).
+    """
+    days = np.asarray(days)
+    dates = DAY_EPOCH.to_datetime64().astype('datetime64[ns]') + days.astype('timedelta64[D]')
+    return np.where(days == MISSING_DAY, np.datetime64('NaT'), dates).astype('datetime64[ns]')
+
+
+def calendar_table(days):
+    """
+    One row per distinct day key, carrying every calendar attribute.
+    """
+    keys = np.unique(np.asarray(days))
+    keys = keys[keys != MISSING_DAY]
+    dates = pd.DatetimeIndex(day_to_date(keys))
+    era = ((dates.year == REAL_TIME_ERA_YEAR) & (dates.month >= REAL_TIME_ERA_MONTH)).astype(int)
+    return pd.DataFrame({
+        'date': dates,
+        'day_of_week': pd.Categorical.from_codes(dates.dayofweek, categories=DAY_NAMES, ordered=True),
+        'month': pd.Categorical.from_codes(dates.month - 1, categories=MONTH_NAMES, ordered=True),
+        'month_num': dates.month.astype('int8'),
+        'year': dates.year.astype('int16'),
+        'period': pd.Categorical(dates.strftime('%Y-%m'), ordered=True),
+        'era': pd.Categorical.from_codes(era, categories=ERA_NAMES),
+    }, index=pd.Index(keys, name='day'))
+
+
+def attach_calendar(df, fields=CALENDAR_FIELDS, key='day'):
+    """
+    Joins calendar attributes onto a frame with an int16 day-key column.
+    `fields` is a list of calendar fields or a {field: output column} mapping.
+    """
+    if not isinstance(fields, dict):
+        fields = {f: f for f in fields}
+    keys = df[key].to_numpy()
+    calendar = calendar_table(keys)
+    return df.assign(**{column: calendar[field].reindex(keys).values for field, column in fields.items()})
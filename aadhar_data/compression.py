@@ -0,0 +1,107 @@
+import gzip
+import io
+import queue
+import threading
+
+# --- Compressed Shards ---
+# Production drops are stored as `.csv.gz` or `.csv.zst`. They are never
+# inflated to disk: a background thread decompresses the shard block by block
+# into a small bounded queue while the CSV parser consumes the other end, so
+# decompression (zlib/zstd release the GIL) overlaps with parsing and only a
+# few blocks of plain text exist at any time. Plain `.csv` shards are handed
+# to pandas untouched.
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+# Decompressed bytes per block, and how many blocks may wait for the parser
+BLOCK_BYTES = 1 << 20
+QUEUE_BLOCKS = 8
+
+
+def _open_zstd(path):
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise ImportError(f"Reading {path} needs the optional 'zstandard' package (pip install zstandard)") from exc
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _open_decompressed(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return _open_zstd(path)
+
+
+class _StreamReader(io.RawIOBase):
+    """
+    Read end of a shard being decompressed on a background thread.
+    """
+
+    def __init__(self, path):
+        self._blocks = queue.Queue(maxsize=QUEUE_BLOCKS)
+        self._pending = b''
+        self._done = False
+        self._stop = threading.Event()
+        # Opened here so a missing file or codec fails in the caller's thread
+        self._source = _open_decompressed(path)
+        self._thread = threading.Thread(target=self._pump, name=f"decompress:{path}", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # Gives up once the reader is closed, so an abandoned read never hangs the thread
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _pump(self):
+        try:
+            with self._source:
+                while not self._stop.is_set():
+                    block = self._source.read(BLOCK_BYTES)
+                    if not block or not self._put(block):
+                        break
+            self._put(None)
+        except Exception as exc:
+            self._put(exc)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._done:
+            item = self._blocks.get()
+            if item is None:
+                self._done = True
+            elif isinstance(item, Exception):
+                self._done = True
+                raise item
+            else:
+                self._pending = item
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        self._stop.set()
+        super().close()
+
+
+def is_compressed(path):
+    # Buffers (e.g. the new lines of a tailed shard) are read as they are
+    return isinstance(path, str) and path.endswith(COMPRESSED_SUFFIXES)
+
+
+def open_shard(path):
+    """
+    What to hand `pd.read_csv` for a shard: the path itself for plain CSV (or
+    a buffer), a streaming reader over the decompressed bytes for `.csv.gz` /
+    `.csv.zst`.
+    """
+    if not is_compressed(path):
+        return path
+    return io.BufferedReader(_StreamReader(path), buffer_size=BLOCK_BYTES)
@@ -0,0 +1,304 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from .calendar import MISSING_DAY, day_to_date, to_day_key
+from .dictionary import CODE_DTYPE, key_categories
+from .join import join_families
+from .outofcore import partition_units
+from .partitions import read_partition_files
+from .persist import input_tag
+from .schema import get_schema, normalize_name
+from .shards import FAMILIES
+from .snapshot import read_stored
+from .store import cache_dir, file_lock
+from .zonemap import date_bounds
+
+# --- Shared Aggregate Cube ---
+# Every dashboard sums the same measures over some subset of (day, state,
+# district, pincode). The cube holds all of them at that full grain, one row
+# per key with every family's counts side by side under consistent names (0
+# where a family has no row), plus each family's row count. It is built once
+# per ingest, one state/month partition at a time, and published like the
+# shared fact tables as an uncompressed Arrow IPC file that every process
+# memory-maps. `cube_query` filters it on the int16 day keys and state codes
+# and sums any subset of dimensions, so no dashboard rescans raw rows.
+#
+# Most views need far less than the full grain (a district table has no date
+# or pincode), so the cube is published together with a lattice of rollups
+# summed from it: (state), (state, district), (state, district, month) and
+# (state, district, day). `plan_query` picks the smallest of them that still
+# has every dimension a query groups or filters on, so a district table sums
+# a few thousand rows instead of the whole cube. A date window that covers
+# whole months can be answered on month keys, and one that covers the whole
+# data span needs no date dimension at all.
+
+CUBE_KEYS = ['day', 'state', 'district', 'pincode']
+
+# Family column -> cube measure
+CUBE_MEASURES = {
+    'demographic': {'demo_age_5_17': 'Demographic_5_17', 'demo_age_17_': 'Demographic_18_plus'},
+    'biometric': {'bio_age_5_17': 'Biometric_5_17', 'bio_age_17_': 'Biometric_18_plus'},
+    'enrolment': {'age_0_5': 'Enrolment_0_5', 'age_5_17': 'Enrolment_5_17', 'age_18_greater': 'Enrolment_18_plus'},
+}
+
+# Rows each family contributed to a key, to tell "no rows" from "all zero"
+ROW_COUNTS = {'demographic': 'Demographic_rows', 'biometric': 'Biometric_rows', 'enrolment': 'Enrolment_rows'}
+
+MEASURES = [name for names in CUBE_MEASURES.values() for name in names.values()]
+
+# Rollup -> its dimensions; `month` is the day key of the month's first day
+ROLLUPS = {
+    'state': ['state'],
+    'district': ['state', 'district'],
+    'month': ['state', 'district', 'month'],
+    'day': ['state', 'district', 'day'],
+}
+
+CUBE_SCHEMA = pa.schema(
+    [('day', pa.int16()), ('state', pa.int16()), ('district', pa.int16()), ('pincode', pa.int32())]
+    + [(name, pa.uint32()) for name in MEASURES]
+    + [(rows, pa.uint16()) for rows in ROW_COUNTS.values()]
+)
+
+
+def _rollup_schema(level):
+    # Summed measures can outgrow the cube's uint32/uint16 columns
+    return pa.schema(
+        [(dim, pa.int16()) for dim in ROLLUPS[level]]
+        + [(name, pa.uint64()) for name in MEASURES]
+        + [(rows, pa.uint32()) for rows in ROW_COUNTS.values()]
+    )
+
+
+def _cube_paths(directory=None):
+    # File of the cube (key None) and of every rollup for the current shards
+    folder = os.path.join(cache_dir(directory), 'cube')
+    os.makedirs(folder, exist_ok=True)
+    tag = input_tag(directory)
+    paths = {None: os.path.join(folder, f"cube-{tag}.arrow")}
+    paths.update({level: os.path.join(folder, f"cube-{tag}-{level}.arrow") for level in ROLLUPS})
+    return folder, paths
+
+
+def _dictionary_codes(values, tables, field):
+    # Categorical positions -> append-only dictionary codes, as snapshots store them
+    _, rank = tables[field]
+    codes = values.cat.codes.to_numpy()
+    by_position = np.empty(len(rank), dtype=CODE_DTYPE)
+    by_position[rank] = np.arange(len(rank), dtype=CODE_DTYPE)
+    return np.where(codes >= 0, by_position[codes] if len(rank) else -1, -1).astype(CODE_DTYPE)
+
+
+def build_cube(path, directory=None):
+    """
+    Writes the cube to `path`, joining the three families one state/month
+    partition unit at a time so only one unit's rows are in memory.
+    """
+    units = partition_units(FAMILIES, directory)
+    # Read only now: bringing the partitions up to date may add names to the dictionary
+    tables = key_categories(directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with ipc.new_file(tmp, CUBE_SCHEMA) as writer:
+        for files in units.values():
+            frames = []
+            for family in FAMILIES:
+                df = read_partition_files(family, files.get(family, []), CUBE_KEYS + list(get_schema(family).counts), directory)
+                df = df.rename(columns=CUBE_MEASURES[family])
+                df[ROW_COUNTS[family]] = np.ones(len(df), dtype=np.uint32)
+                frames.append(df)
+            joined = join_families(frames, CUBE_KEYS)
+            if not len(joined):
+                continue
+            for field in ('state', 'district'):
+                joined[field] = _dictionary_codes(joined[field], tables, field)
+            writer.write_table(pa.Table.from_pandas(joined[CUBE_SCHEMA.names], schema=CUBE_SCHEMA, preserve_index=False))
+    os.replace(tmp, path)
+    return path
+
+
+def month_keys(days):
+    """
+    int16 day keys -> day key of the first day of their month (MISSING_DAY
+    stays missing), converting each distinct day once.
+    """
+    keys, inverse = np.unique(np.asarray(days), return_inverse=True)
+    firsts = day_to_date(keys).astype('datetime64[M]').astype('datetime64[ns]')
+    return to_day_key(firsts)[inverse.reshape(-1)]
+
+
+def build_rollups(cube, paths):
+    """
+    Writes every rollup of `cube` to `paths`. The cube's batches are its
+    partition units, so each batch is summed on its own and the partial sums
+    are summed again per rollup. Each file records the cube's day span.
+    """
+    partials = {level: [] for level in ROLLUPS}
+    for batch in cube.to_batches():
+        df = batch.to_pandas()
+        df['month'] = month_keys(df['day'].to_numpy())
+        for level, dims in ROLLUPS.items():
+            partials[level].append(join_families([df[dims + MEASURES + list(ROW_COUNTS.values())]], dims))
+    days = cube.column('day').to_numpy()
+    present = days[days != MISSING_DAY]
+    metadata = {
+        'day_min': str(int(present.min())) if len(present) else '',
+        'day_max': str(int(present.max())) if len(present) else '',
+        'missing_days': str(int(len(present) < len(days))),
+    }
+    for level, dims in ROLLUPS.items():
+        schema = _rollup_schema(level).with_metadata(metadata)
+        tmp = f"{paths[level]}.{os.getpid()}.tmp"
+        with ipc.new_file(tmp, schema) as writer:
+            if partials[level]:
+                rolled = join_families([pd.concat(partials[level], ignore_index=True)], dims)
+                writer.write_table(pa.Table.from_pandas(rolled[schema.names], schema=schema, preserve_index=False))
+        os.replace(tmp, paths[level])
+
+
+def ensure_cube(directory=None):
+    """
+    Path of the cube for the current shards, built (with its rollups) if the
+    shards (or the alias table) changed since it was last built.
+    """
+    folder, paths = _cube_paths(directory)
+    path = paths[None]
+    if all(os.path.exists(p) for p in paths.values()):
+        return path
+    with file_lock(path):
+        if not os.path.exists(path):
+            build_cube(path, directory)
+        if not all(os.path.exists(p) for p in paths.values()):
+            build_rollups(ipc.open_file(pa.memory_map(path, 'r')).read_all(), paths)
+    for stale in glob.glob(os.path.join(folder, 'cube-*.arrow')):
+        if stale not in paths.values():
+            try:
+                os.remove(stale)
+            except OSError:
+                # Still mapped by a reader on a platform that locks open files
+                pass
+    return path
+
+
+def open_cube(level=None, directory=None):
+    """
+    The cube (or the rollup `level`) as an Arrow table over the shared memory map.
+    """
+    ensure_cube(directory)
+    return ipc.open_file(pa.memory_map(_cube_paths(directory)[1][level], 'r')).read_all()
+
+
+def _month_aligned(start, end):
+    # Whether [start, end] (either may be open) is a run of whole months
+    if start is not None and (start != start.normalize() or start.day != 1):
+        return False
+    return end is None or (end.normalize() + pd.Timedelta(days=1)).day == 1
+
+
+def _covers_span(start, end, span):
+    # Whether the window keeps every row of the data: no missing days, and the
+    # whole day span inside it
+    if span.get(b'missing_days') != b'0' or not span.get(b'day_min'):
+        return False
+    low, high = int(span[b'day_min']), int(span[b'day_max'])
+    return ((start is None or to_day_key([start])[0] <= low)
+            and (end is None or to_day_key([end])[0] >= high))
+
+
+def plan_query(by, date_range=None, states=None, directory=None):
+    """
+    Smallest table of the lattice that can answer a query grouping on `by`
+    and filtering on `date_range` and `states`: a ROLLUPS level, or None for
+    the full cube. Also returns the dimension the date window is applied on
+    ('day', 'month' or None when no filter is needed).
+    """
+    needed = {'day' if c == 'date' else c for c in by}
+    date_dim = None
+    if date_range is not None:
+        start, end = date_bounds(date_range)
+        if not _covers_span(start, end, open_cube('day', directory).schema.metadata or {}):
+            date_dim = 'month' if _month_aligned(start, end) else 'day'
+            needed.add(date_dim)
+    if states is not None:
+        needed.add('state')
+
+    def serves(dims):
+        return all(d in dims or (d == 'month' and 'day' in dims) for d in needed)
+
+    candidates = [(open_cube(level, directory).num_rows, level) for level, dims in ROLLUPS.items() if serves(dims)]
+    level = min(candidates)[1] if candidates else None
+    if date_dim == 'month' and 'month' not in (ROLLUPS[level] if level else []):
+        date_dim = 'day'
+    return level, date_dim
+
+
+def _rows(table, date_range, date_dim, states, tables):
+    # Row positions inside the date window and state selection, on the raw keys
+    mask = np.ones(table.num_rows, dtype=bool)
+    start, end = date_bounds(date_range)
+    if date_dim is not None:
+        days = table.column(date_dim).to_numpy()
+        mask &= days != MISSING_DAY
+        if start is not None:
+            mask &= days >= to_day_key([start])[0]
+        if end is not None:
+            # On month keys, `end` is the last day of its month
+            mask &= days <= (month_keys([to_day_key([end])[0]])[0] if date_dim == 'month' else to_day_key([end])[0])
+    if states is not None:
+        wanted = {normalize_name(s) for s in states}
+        names, rank = tables['state']
+        codes = np.flatnonzero(np.asarray([n in wanted for n in names[rank]], dtype=bool)) if len(rank) else []
+        mask &= np.isin(table.column('state').to_numpy(), codes)
+    return None if mask.all() else np.flatnonzero(mask)
+
+
+def cube_query(by, measures=None, date_range=None, states=None, directory=None):
+    """
+    Sums of cube `measures` (default: all, without the row counts) grouped by
+    `by`, any subset of day, date, month, state, district and pincode, over the
+    keys inside `date_range` (inclusive) and `states`. Answered from the
+    smallest rollup that can serve it (see `plan_query`). Sorted by `by`;
+    `month` comes back as the date of the month's first day, and sums keep the
+    smallest integer type that holds them, as `join_families` returns them.
+    """
+    by = list(by)
+    measures = list(measures or MEASURES)
+    level, date_dim = plan_query(by, date_range, states, directory)
+    table = open_cube(level, directory)
+    # After the cube is ensured, so names ingested for it are known
+    tables = key_categories(directory)
+    rows = _rows(table, date_range, date_dim, states, tables)
+    stored = ['day' if c == 'date' else c for c in by]
+    if 'month' in by and level != 'month':
+        stored = ['day' if c == 'month' else c for c in stored]
+    table = table.select(list(dict.fromkeys(stored + measures)))
+    if rows is not None:
+        table = table.take(rows)
+    df = table.to_pandas(split_blocks=True)
+    if 'month' in by:
+        df['month'] = day_to_date(df['month'] if level == 'month' else month_keys(df['day'].to_numpy()))
+    df = read_stored(df, by + measures, tables)
+    if not by:
+        return pd.DataFrame({m: [df[m].to_numpy().sum(dtype=np.uint64)] for m in measures})
+    result = join_families([df], by)
+    if not len(result):
+        # Same (cube) types whichever table answered
+        result = result.astype({m: CUBE_SCHEMA.field(m).type.to_pandas_dtype() for m in measures})
+    return result
+
+
+def family_totals(family, by, measures=None, date_range=None, states=None, directory=None):
+    """
+    Cube-backed stand-in for `incremental_aggregate`: sums of a family's own
+    columns, under their family names, for the groups the family has rows in.
+    """
+    measures = list(measures or get_schema(family).counts)
+    names = CUBE_MEASURES[family]
+    rows = ROW_COUNTS[family]
+    df = cube_query(by, [names[m] for m in measures] + [rows], date_range, states, directory)
+    df = df[df[rows] > 0].drop(columns=rows).reset_index(drop=True)
+    return df.rename(columns={names[m]: m for m in measures})
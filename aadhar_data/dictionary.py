@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .schema import normalize_name
+from .store import cache_dir, file_lock, read_json, write_json
+
+# --- Global Key Dictionaries ---
+# State and district names are normalised once per distinct raw spelling at
+# ingest and stored in snapshots as int16 codes into one dictionary shared by
+# every shard and family. The dictionary is append-only, so a code never
+# changes meaning and existing snapshots stay valid as new names arrive.
+# On read the codes become categoricals over the same (sorted) categories, so
+# joins and groupbys across families run on integer codes. Pincodes are
+# already integers and serve as their own key.
+
+DICTIONARY_FIELDS = ('state', 'district')
+CODE_DTYPE = 'int16'
+
+
+def dictionary_path(directory=None):
+    return os.path.join(cache_dir(directory), 'dictionaries.json')
+
+
+def load_dictionaries(directory=None):
+    """
+    Returns {field: [name of code 0, name of code 1, ...]}.
+    """
+    stored = read_json(dictionary_path(directory))
+    return {field: stored.get(field, []) for field in DICTIONARY_FIELDS}
+
+
+def _extend_dictionaries(new_names, directory=None):
+    # Appends unseen names under a lock, since shards may be ingested by several workers at once
+    path = dictionary_path(directory)
+    with file_lock(path):
+        dictionaries = load_dictionaries(directory)
+        changed = False
+        for field, names in new_names.items():
+            known = set(dictionaries[field])
+            missing = sorted(n for n in names if n not in known)
+            if missing:
+                dictionaries[field].extend(missing)
+                changed = True
+        if changed:
+            write_json(path, dictionaries)
+    return dictionaries
+
+
+def encode_keys(df, directory=None):
+    """
+    Replaces the raw state/district columns of a freshly parsed chunk with
+    int16 codes of their normalised names (-1 for missing), registering new
+    names in the global dictionary.
+    """
+    fields = [f for f in DICTIONARY_FIELDS if f in df.columns]
+    if not fields:
+        return df
+    values = {f: df[f] if isinstance(df[f].dtype, pd.CategoricalDtype) else df[f].astype('category') for f in fields}
+    names = {f: values[f].cat.categories.map(normalize_name) for f in fields}
+
+    dictionaries = load_dictionaries(directory)
+    if any(set(names[f]) - set(dictionaries[f]) for f in fields):
+        dictionaries = _extend_dictionaries({f: set(names[f]) for f in fields}, directory)
+
+    encoded = {}
+    for f in fields:
+        remap = pd.Index(dictionaries[f]).get_indexer(names[f])
+        codes = values[f].cat.codes.to_numpy()
+        encoded[f] = np.where(codes >= 0, remap[codes] if len(remap) else -1, -1).astype(CODE_DTYPE)
+    return df.assign(**encoded)
+
+
+def key_categories(directory=None):
+    """
+    Per field, the sorted categories used for decoding and the code -> category position table.
+    """
+    tables = {}
+    for field, names in load_dictionaries(directory).items():
+        order = np.argsort(np.array(names, dtype=object), kind='stable')
+        rank = np.empty(len(names), dtype=CODE_DTYPE)
+        rank[order] = np.arange(len(names), dtype=CODE_DTYPE)
+        tables[field] = (pd.Index(names)[order], rank)
+    return tables
+
+
+def decode_keys(df, tables):
+    """
+    Turns stored state/district codes back into categoricals over the global
+    categories (see `key_categories`).
+    """
+    decoded = {}
+    for field, (categories, rank) in tables.items():
+        if field in df.columns:
+            codes = df[field].to_numpy()
+            positions = np.where(codes >= 0, rank[codes] if len(rank) else -1, -1)
+            decoded[field] = pd.Categorical.from_codes(positions, categories=categories)
+    return df.assign(**decoded)
+
+
+def align_keys(df, tables):
+    """
+    Re-expresses state/district categoricals of a frame built earlier (e.g. a
+    stored aggregate) over the current global categories, so it concatenates
+    and merges with fresh frames on identical codes.
+    """
+    aligned = {}
+    for field, (categories, _) in tables.items():
+        if field in df.columns and not df[field].cat.categories.equals(categories):
+            aligned[field] = df[field].cat.set_categories(categories)
+    return df.assign(**aligned)
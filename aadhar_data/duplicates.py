@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .manifest import load_manifest
+from .shards import FAMILIES
+from .store import cache_dir, write_json
+
+# --- Duplicate Detection ---
+# Production shards can overlap, so the same record may arrive twice. While a
+# snapshot is built every row is hashed twice, vectorised: once over its key
+# (day, state, district, pincode) and once over the whole row. Rows whose full
+# hash was already seen, earlier in the shard or in any shard before it, are
+# dropped before anything is aggregated. Rows that only share a key with an
+# earlier row (same place and day, different counts) are kept but counted as
+# key collisions. Each shard's hashes are stored next to its snapshot so later
+# shards can be checked against them without re-reading any rows.
+
+KEY_FIELDS = ('day', 'state', 'district', 'pincode')
+
+
+def record_hashes(stored):
+    """
+    (full-row hash, key hash) of a stored chunk, as uint64 arrays.
+    """
+    row_hash = pd.util.hash_pandas_object(stored, index=False).to_numpy()
+    key_hash = pd.util.hash_pandas_object(stored[[c for c in KEY_FIELDS if c in stored.columns]], index=False).to_numpy()
+    return row_hash, key_hash
+
+
+def _seen(values, seen):
+    return np.isin(values, seen, assume_unique=False) if len(seen) else np.zeros(len(values), dtype=bool)
+
+
+def flag_duplicates(row_hash, key_hash, seen_rows, seen_keys):
+    """
+    Masks of exact duplicates and of key collisions for one chunk, given the
+    hashes seen so far. Duplicates within the chunk count after their first row.
+    """
+    duplicate = _seen(row_hash, seen_rows) | pd.Series(row_hash).duplicated().to_numpy()
+    kept_keys = pd.Series(key_hash[~duplicate])
+    collision = np.zeros(len(key_hash), dtype=bool)
+    collision[~duplicate] = _seen(kept_keys.to_numpy(), seen_keys) | kept_keys.duplicated().to_numpy()
+    return duplicate, collision
+
+
+def hashes_path(snapshot):
+    return f"{os.path.splitext(snapshot)[0]}.hashes.npz"
+
+
+def save_hashes(snapshot, row_hashes, key_hashes):
+    tmp = f"{snapshot}.{os.getpid()}.hashes.npz"
+    np.savez(tmp, rows=np.unique(np.concatenate(row_hashes or [np.empty(0, np.uint64)])),
+             keys=np.unique(np.concatenate(key_hashes or [np.empty(0, np.uint64)])))
+    os.replace(tmp, hashes_path(snapshot))
+
+
+def load_hashes(snapshot):
+    with np.load(hashes_path(snapshot)) as stored:
+        return stored['rows'], stored['keys']
+
+
+def duplicate_report(directory=None):
+    """
+    Per family: rows read, exact duplicates dropped, key collisions kept, and
+    the matching rates, summed over the ingested shards. The report is also
+    written to duplicates.json in the cache directory.
+    """
+    report = {}
+    entries = load_manifest(directory).values()
+    for family in FAMILIES:
+        stats = [e.get('stats', {}) for e in entries if e['family'] == family]
+        read = sum(s.get('rows_read', 0) for s in stats)
+        dropped = sum(s.get('duplicates', 0) for s in stats)
+        collisions = sum(s.get('key_collisions', 0) for s in stats)
+        report[family] = {
+            'rows_read': read,
+            'duplicates': dropped,
+            'key_collisions': collisions,
+            'duplicate_rate': dropped / read if read else 0.0,
+            'collision_rate': collisions / read if read else 0.0,
+        }
+    write_json(os.path.join(cache_dir(directory), 'duplicates.json'), report)
+    return report
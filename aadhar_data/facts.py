@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .calendar import DAY_EPOCH, MISSING_DAY, day_to_date
+
+# --- Compact Fact Tables ---
+# What the dashboards cache is mostly counts, keys and dates. Held as a pandas
+# frame that costs 4-8 bytes per count (float64 after a merge), 8 per date and
+# a Python object per string. A fact table keeps each column as a plain NumPy
+# array of the narrowest type that holds it exactly: counts in uint8/uint16/
+# uint32 (float columns too, when every value is a whole number), dates as
+# int16 day keys, strings and categoricals as integer codes. Columns that are
+# mostly zero keep only the positions and values of their non-zero rows.
+# `expand_frame` rebuilds the original frame (same columns, dtypes and values)
+# for the chart code, so only the cached copy is compact. Sums of the expanded
+# columns can therefore not overflow a narrowed type.
+
+# Columns with at least this share of zeros are stored sparse
+SPARSE_FRACTION = 0.8
+
+FactTable = namedtuple('FactTable', ['length', 'index', 'columns'])
+
+_NARROW_TYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.int64)
+
+
+def narrow_dtype(values):
+    """
+    Smallest integer type that holds every value of an integer array.
+    """
+    if not len(values):
+        return np.uint8
+    low, high = values.min(), values.max()
+    for dtype in _NARROW_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return values.dtype
+
+
+def _whole_numbers(values):
+    # Integer view of a numeric array if that loses nothing, else None
+    if values.dtype.kind in 'iu':
+        return values
+    if values.dtype.kind == 'f' and np.isfinite(values).all() and (values == np.round(values)).all():
+        if not len(values) or (np.abs(values).max() < 2**53):
+            return values.astype(np.int64)
+    return None
+
+
+def _encode(values, sparse_fraction):
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        return ('codes', codes.astype(narrow_dtype(codes)), dtype)
+    if dtype.kind == 'M':
+        # Calendar days (no time of day) inside the int16 day-key range
+        dates = values.to_numpy()
+        valid = ~np.isnat(dates)
+        days = np.full(len(dates), MISSING_DAY, dtype=np.int64)
+        days[valid] = (dates[valid] - DAY_EPOCH.to_datetime64()) // np.timedelta64(1, 'D')
+        if valid.any() and not (MISSING_DAY < days[valid].min() and days[valid].max() <= np.iinfo(np.int16).max):
+            return ('raw', dates, dtype)
+        days = days.astype(np.int16)
+        if not (day_to_date(days) == dates)[valid].all():
+            return ('raw', dates, dtype)
+        return ('days', days, dtype)
+    if dtype.kind in 'iuf':
+        whole = _whole_numbers(values.to_numpy())
+        if whole is None:
+            return ('raw', values.to_numpy(), dtype)
+        nonzero = np.flatnonzero(whole)
+        if len(whole) and 1 - len(nonzero) / len(whole) >= sparse_fraction:
+            kept = whole[nonzero]
+            return ('sparse', (nonzero.astype(narrow_dtype(nonzero)), kept.astype(narrow_dtype(kept))), dtype)
+        return ('dense', whole.astype(narrow_dtype(whole)), dtype)
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        return ('labels', (codes.astype(narrow_dtype(codes)), uniques), dtype)
+    return ('raw', values.to_numpy(), dtype)
+
+
+def compact_frame(df, sparse_fraction=SPARSE_FRACTION):
+    """
+    Compact copy of a frame; `expand_frame` turns it back into the same frame.
+    """
+    index = None if df.index.equals(pd.RangeIndex(len(df))) else df.index
+    return FactTable(len(df), index, [(col, *_encode(df[col], sparse_fraction)) for col in df.columns])
+
+
+def _decode(length, encoding, payload, dtype):
+    if encoding == 'codes':
+        return pd.Categorical.from_codes(payload.astype(np.int64), dtype=dtype)
+    if encoding == 'days':
+        return day_to_date(payload).astype(dtype)
+    if encoding == 'sparse':
+        positions, values = payload
+        dense = np.zeros(length, dtype=dtype)
+        dense[positions] = values
+        return dense
+    if encoding == 'dense':
+        return payload.astype(dtype)
+    if encoding == 'labels':
+        codes, uniques = payload
+        return pd.Categorical.from_codes(codes.astype(np.int64), categories=uniques).astype(dtype)
+    return payload
+
+
+def expand_frame(table, columns=None):
+    """
+    pandas view of a fact table with the original columns, dtypes and index
+    (or just `columns`, rebuilding only those).
+    """
+    wanted = None if columns is None else set(columns)
+    data = {col: _decode(table.length, encoding, payload, dtype)
+            for col, encoding, payload, dtype in table.columns if wanted is None or col in wanted}
+    df = pd.DataFrame(data, index=table.index if table.index is not None else pd.RangeIndex(table.length))
+    return df[[col for col, *_ in table.columns if col in data]]
+
+
+def table_mb(table):
+    """
+    Memory held by a fact table's arrays.
+    """
+    total = 0
+    for _, encoding, payload, dtype in table.columns:
+        arrays = payload if isinstance(payload, tuple) else (payload,)
+        for array in arrays:
+            if isinstance(array, pd.Index):
+                total += array.memory_usage(deep=True)
+            else:
+                total += array.nbytes
+        if isinstance(dtype, pd.CategoricalDtype):
+            total += dtype.categories.memory_usage(deep=True)
+    return total / 2**20
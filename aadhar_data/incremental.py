@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import warnings
+
+import pandas as pd
+
+from .aliases import alias_tag
+from .dictionary import align_keys, key_categories
+from .manifest import check_ranges
+from .parallel import map_shards
+from .schema import get_schema
+from .shards import find_shards
+from .snapshot import SNAPSHOT_VERSION, empty_frame, ensure_snapshots, snapshot_path
+from .store import cache_dir, read_json, write_json
+from .streaming import CHUNK_ROWS, _stream_shard, fold_chunks
+
+# --- Incremental Aggregates ---
+# Each persisted aggregate remembers which shard snapshots it already folded
+# in. When a new drop lands, only that shard is parsed and its partial
+# sums are added on top.
+
+
+def _aggregate_paths(family, by, measures, directory):
+    key = hashlib.md5(json.dumps([family, by, measures, SNAPSHOT_VERSION, alias_tag(directory)]).encode()).hexdigest()[:12]
+    folder = os.path.join(cache_dir(directory), 'aggregates')
+    os.makedirs(folder, exist_ok=True)
+    base = os.path.join(folder, f"{family}-{key}")
+    return f"{base}.parquet", f"{base}.json"
+
+
+def incremental_aggregate(family, by, measures=None, directory=None):
+    """
+    Grouped sums of a family kept up to date shard by shard.
+    Shards already folded into the stored aggregate are skipped; new shards are
+    streamed and added. If a folded shard changed or disappeared the aggregate
+    is rebuilt from scratch, since its contribution cannot be subtracted.
+    """
+    by = list(by)
+    measures = list(measures or get_schema(family).counts)
+    data_path, state_path = _aggregate_paths(family, by, measures, directory)
+
+    # A shard is identified by its snapshot name: shard name, content hash and
+    # the lineage its duplicates were dropped against
+    shards = {os.path.basename(snapshot_path(s, directory)): s for s in find_shards(family, directory)}
+    folded = read_json(state_path).get('shards', [])
+
+    if folded and set(folded) <= set(shards) and os.path.exists(data_path):
+        base = [align_keys(pd.read_parquet(data_path), key_categories(directory))]
+    else:
+        base, folded = [], []
+
+    pending = [s for token, s in shards.items() if token not in folded]
+    if not pending and base:
+        return base[0]
+
+    ensure_snapshots(pending, directory)
+    partials = map_shards(_stream_shard, [(s, by, measures, CHUNK_ROWS, directory) for s in pending])
+    for issue in check_ranges(family, directory):
+        warnings.warn(issue)
+    result = fold_chunks(base + [p for p in partials if p is not None], by, measures)
+    if result is None:
+        return empty_frame(family, by + measures, directory)
+
+    tmp = f"{data_path}.{os.getpid()}.tmp"
+    result.to_parquet(tmp, index=False)
+    os.replace(tmp, data_path)
+    write_json(state_path, {'family': family, 'by': by, 'measures': measures, 'shards': sorted(shards)})
+    return result
+
+
+def state_district_pairs(families, directory=None):
+    """
+    Every (state, district) pair present in the given families,
+    read from the persisted district totals rather than the raw rows.
+    """
+    first_count = {family: get_schema(family).counts[0] for family in families}
+    pairs = []
+    for family, measure in first_count.items():
+        agg = incremental_aggregate(family, ['state', 'district'], [measure], directory)
+        pairs.append(pd.DataFrame({
+            'state': agg['state'].astype(str),
+            'district': agg['district'].astype(str),
+        }))
+    return pd.concat(pairs, ignore_index=True).drop_duplicates().sort_values(['state', 'district']).reset_index(drop=True)
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from .backend import backend_name, polars_join_sums
+from .snapshot import concat_frames
+
+# --- Aligned Multi-Family Join ---
+# The dashboards used to outer-join the three families with chained
+# `pd.merge(..., how='outer').fillna(0)` calls, which materialise a full
+# intermediate frame per step and turn every count into float64. Here the
+# key columns of all inputs (small integer/categorical codes) are stacked,
+# grouped once, and every measure is summed straight into its slot of the
+# wide result. Missing combinations are 0 and integer measures stay integers,
+# so peak memory is about the stacked keys plus the output.
+
+
+def _sum_dtype(values, sums):
+    # Smallest integer type of the input's signedness that holds every sum
+    if not np.issubdtype(values.dtype, np.integer):
+        return np.float64
+    if not len(sums):
+        return values.dtype
+    small = np.uint32 if np.issubdtype(values.dtype, np.unsignedinteger) else np.int32
+    large = np.uint64 if small is np.uint32 else np.int64
+    info = np.iinfo(small)
+    return small if info.min <= sums.min() and sums.max() <= info.max else large
+
+
+def _dense_codes(values):
+    """
+    Dense integer codes of one key column in sorted key order (-1 marks a missing
+    key), the number of codes, and the values the codes stand for.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), len(values.cat.categories), values.cat.categories
+    uniques, inverse = np.unique(values.to_numpy(), return_inverse=True)
+    return inverse.astype(np.int64), len(uniques), uniques
+
+
+def _group_ids(stacked, keys):
+    """
+    Group id of every stacked row (sorted by key), the rows with a complete key,
+    and the key values of each group.
+    """
+    sizes = [len(stacked[k].cat.categories) if isinstance(stacked[k].dtype, pd.CategoricalDtype) else stacked[k].nunique() for k in keys]
+    if np.prod([float(max(size, 1)) for size in sizes]) < 2**62:
+        # Mixed-radix composite of the per-column codes: one int64 per row, built
+        # a column at a time so only one column's codes exist at once
+        composite = np.zeros(len(stacked), dtype=np.int64)
+        valid = np.ones(len(stacked), dtype=bool)
+        columns = []
+        for k in keys:
+            codes, size, values = _dense_codes(stacked[k])
+            valid &= codes >= 0
+            composite *= max(size, 1)
+            composite += codes
+            columns.append((size, values))
+            del codes
+        ids, groups = pd.factorize(composite[valid] if not valid.all() else composite, sort=True)
+        del composite
+        key_values = {}
+        for k, (size, values) in reversed(list(zip(keys, columns))):
+            groups, codes = np.divmod(groups, max(size, 1))
+            if isinstance(stacked[k].dtype, pd.CategoricalDtype):
+                key_values[k] = pd.Categorical.from_codes(codes, categories=values)
+            else:
+                key_values[k] = values[codes]
+        return ids, valid, {k: key_values[k] for k in keys}
+
+    # Key space too large for one int64: let pandas number the groups
+    ids = stacked.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+    valid = ~np.isnan(ids) if ids.dtype.kind == 'f' else np.ones(len(ids), dtype=bool)
+    ids = ids[valid].astype(np.intp)
+    rows = np.flatnonzero(valid)
+    first = np.empty(int(ids.max()) + 1 if len(ids) else 0, dtype=np.intp)
+    first[ids[::-1]] = rows[::-1]
+    return ids, valid, {k: stacked[k].take(first).reset_index(drop=True) for k in keys}
+
+
+def join_families(frames, keys):
+    """
+    Outer join of several frames on `keys` in a single grouped pass.
+    Each frame holds `keys` plus its own measure columns (names must not clash);
+    frames need not be pre-aggregated. Returns one row per key combination,
+    sorted by key, with every measure summed and 0 where a frame has no rows.
+    Rows with a missing key are dropped, as a groupby would.
+    """
+    frames = list(frames)
+    keys = list(keys)
+    if backend_name() == 'polars':
+        result = polars_join_sums(frames, keys)
+        for frame in frames:
+            for col in frame.columns:
+                if col not in keys:
+                    result[col] = result[col].astype(_sum_dtype(frame[col].to_numpy(), result[col].to_numpy()))
+        return result
+    stacked = concat_frames([f[keys] for f in frames])
+    ids, valid, result = _group_ids(stacked, keys)
+    del stacked
+    n_groups = len(next(iter(result.values()))) if keys else 0
+
+    # Positions of each frame's complete-key rows within `ids`
+    ends = np.cumsum(valid)
+    offset = 0
+    start = 0
+    for frame in frames:
+        stop = int(ends[offset + len(frame) - 1]) if len(frame) else start
+        part_ids = ids[start:stop]
+        part_valid = valid[offset:offset + len(frame)]
+        for col in frame.columns:
+            if col in keys:
+                continue
+            values = frame[col].to_numpy()
+            weights = values if part_valid.all() else values[part_valid]
+            if weights.dtype.kind == 'f':
+                weights = np.nan_to_num(weights)
+            # bincount sums in float64, exact for counts below 2**53
+            sums = np.bincount(part_ids, weights=weights, minlength=n_groups)
+            result[col] = sums.astype(_sum_dtype(values, sums))
+        offset += len(frame)
+        start = stop
+    return pd.DataFrame(result)
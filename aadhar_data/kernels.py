@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+# --- Grouped Reduction Kernels ---
+# `df.groupby(keys).sum()` hashes every key of every row, sorts the groups and
+# then reduces each measure on its own. The keys the dashboards group on are
+# already small integer codes (state/district categoricals, int16 day keys,
+# pincodes), so here each key column is turned into dense codes once, the
+# codes are combined into one group number per row, and every measure is
+# reduced with a single `np.bincount` over those numbers. When the key space
+# is small, the group number indexes the result directly (one slot per key
+# combination of the dictionaries), so no hashing or sorting happens at all.
+# Integer sums that could lose precision in bincount's float64 are taken with
+# `np.add.reduceat` over the rows sorted by group instead.
+
+# Key spaces up to this many slots (or a few times the row count) are indexed
+# directly instead of being renumbered
+DENSE_SLOTS = 1 << 16
+
+_EXACT_LIMIT = 2**53
+
+
+def _key_codes(values):
+    """
+    Dense codes of one key column (-1 for a missing key), the number of codes,
+    and a function turning codes back into key values of the column's type.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        dtype = values.dtype
+        return values.cat.codes.to_numpy().astype(np.int64), len(categories), lambda c: pd.Categorical.from_codes(c, dtype=dtype, validate=False)
+    array = values.to_numpy()
+    if array.dtype.kind in 'iu' and len(array):
+        # Pre-encoded integer keys: an offset is enough when their range is compact
+        low, high = int(array.min()), int(array.max())
+        if high - low < max(DENSE_SLOTS, 4 * len(array)):
+            return array.astype(np.int64) - low, high - low + 1, lambda c: (c + low).astype(array.dtype)
+    if array.dtype.kind == 'M' and len(array):
+        # Calendar dates: whole days since the epoch, offset like integer keys
+        ticks = array.view(np.int64)
+        step = int(np.timedelta64(1, 'D') / np.timedelta64(1, np.datetime_data(array.dtype)[0]))
+        missing = np.isnat(array)
+        days = ticks // step
+        whole = days * step == ticks
+        if missing.any():
+            days[missing] = days[~missing].min() if not missing.all() else 0
+            whole |= missing
+        if not missing.all() and whole.all():
+            low, high = int(days.min()), int(days.max())
+            if high - low < max(DENSE_SLOTS, 4 * len(array)):
+                codes = days - low
+                codes[missing] = -1
+                return codes, high - low + 1, lambda c: ((c + low) * step).view(array.dtype)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), len(uniques), lambda c: uniques.take(c)
+
+
+def _group_slots(df, by, sort=True, observed=True):
+    """
+    Slot of every row of `df` (-1 where a key is missing), the number of
+    slots, the key codes of each slot (None when a slot is its composite
+    code; the composite code, or one row of per-key codes when the key space
+    is too large for one int64) and one (key, size, decoder) entry per key column.
+    """
+    columns = [(key, *_key_codes(df[key])) for key in by]
+    valid = np.ones(len(df), dtype=bool)
+    for _, codes, _, _ in columns:
+        valid &= codes >= 0
+    decoders = [(key, size, decode) for key, _, size, decode in columns]
+    slots = float(np.prod([float(max(size, 1)) for _, _, size, _ in columns]))
+
+    if slots >= 2**62:
+        # The composite code would overflow int64: number the key tuples instead
+        if not observed:
+            raise ValueError(f"observed=False needs {slots:.0f} groups; the key space is too large")
+        tuples = np.column_stack([codes[valid] for _, codes, _, _ in columns])
+        uniques, first, inverse = np.unique(tuples, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        if not sort:
+            order = np.argsort(first, kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            uniques, inverse = uniques[order], rank[inverse]
+        ids = np.full(len(df), -1, dtype=np.int64)
+        ids[valid] = inverse
+        return ids, len(uniques), uniques, decoders
+
+    slots = int(slots)
+    composite = np.zeros(len(df), dtype=np.int64)
+    for _, codes, size, _ in columns:
+        composite *= max(size, 1)
+        composite += codes
+    if not valid.all():
+        composite[~valid] = -1
+
+    if slots <= max(DENSE_SLOTS, 4 * len(df)) and (sort or not observed):
+        # The composite code indexes the result directly
+        return composite, slots, None, decoders
+    if not observed:
+        raise ValueError(f"observed=False needs {slots} groups; the key space is too large")
+    ids = np.full(len(df), -1, dtype=np.int64)
+    ids[valid], uniques = pd.factorize(composite[valid], sort=sort)
+    return ids, len(uniques), np.asarray(uniques, dtype=np.int64), decoders
+
+
+def _decode_keys(composites, decoders):
+    if composites.ndim == 2:
+        # One column of codes per key
+        return {key: decode(composites[:, i]) for i, (key, _, decode) in enumerate(decoders)}
+    keys = {}
+    remaining = composites
+    for key, size, decode in reversed(decoders):
+        remaining, codes = np.divmod(remaining, max(size, 1))
+        keys[key] = decode(codes)
+    return {key: keys[key] for key, _, _ in decoders}
+
+
+def group_keys(df, by, sort=True, observed=True):
+    """
+    Group number of every row of `df` (-1 where a key is missing), the number
+    of groups, and a frame of the key values of each group. Groups are in key
+    order (category order for categoricals) or, with sort=False, in order of
+    first appearance. With observed=False every combination of the key
+    dictionaries is a group, so results line up with the categories.
+    """
+    ids, n_slots, composites, decoders = _group_slots(df, list(by), sort, observed)
+    if composites is None:
+        if observed:
+            present = np.bincount(ids[ids >= 0], minlength=n_slots) > 0
+            composites = np.flatnonzero(present)
+            ids = np.where(ids >= 0, (np.cumsum(present) - 1)[np.maximum(ids, 0)], -1)
+        else:
+            composites = np.arange(n_slots, dtype=np.int64)
+    return ids, len(composites), pd.DataFrame(_decode_keys(composites, decoders))
+
+
+def _sum(ids, values, n_groups):
+    # Sums of one measure per group, in a type that holds them exactly
+    if values.dtype.kind == 'f':
+        return np.bincount(ids, weights=np.nan_to_num(values), minlength=n_groups).astype(values.dtype, copy=False)
+    if values.dtype.kind not in 'iu':
+        # Booleans, objects and extension values: pandas' own sum rules apply
+        sums = pd.Series(values, copy=False).groupby(ids, sort=False).sum()
+        return sums.reindex(np.arange(n_groups), fill_value=0).to_numpy()
+    # Integer sums are always 64-bit, so running totals over them cannot wrap
+    wide = np.uint64 if values.dtype.kind == 'u' else np.int64
+    largest = max(int(values.max()), -int(values.min())) if len(values) else 0
+    if largest * len(values) >= _EXACT_LIMIT:
+        sums = np.zeros(n_groups, dtype=wide)
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        sums[sorted_ids[starts]] = np.add.reduceat(values[order].astype(wide), starts)
+        return sums
+    return np.bincount(ids, weights=values, minlength=n_groups).astype(wide)
+
+
+def group_reduce(df, by, sums=(), means=(), size=None, sort=True, observed=True):
+    """
+    One grouped pass over `df`: the sum of each `sums` column, the mean of each
+    `means` column (missing values skipped) and, if `size` names a column, the
+    number of rows per group. Returns the keys and results as columns, like
+    `df.groupby(by, observed=True).agg(...).reset_index()`. Rows with a missing
+    key are dropped; integer sums come back as int64 (uint64 for unsigned
+    columns) and means as float64 (float32 for float32 columns).
+    """
+    sums, means = list(sums), list(means)
+    ids, n_slots, composites, decoders = _group_slots(df, list(by), sort, observed)
+    valid = ids >= 0
+    complete = valid.all()
+    if not complete:
+        ids = ids[valid]
+    rows = np.bincount(ids, minlength=n_slots)
+    # Reductions run over every slot; only the slots that hold a group are kept
+    if composites is None:
+        composites = np.flatnonzero(rows) if observed else np.arange(n_slots, dtype=np.int64)
+        kept = composites if observed else slice(None)
+    else:
+        kept = slice(None)
+    n_groups = len(composites)
+    result = _decode_keys(composites, decoders)
+    for col in sums:
+        values = df[col].to_numpy()
+        result[col] = _sum(ids, values if complete else values[valid], n_slots)[kept]
+    for col in means:
+        values = df[col].to_numpy()
+        if values.dtype.kind not in 'iufb':
+            # Object or extension columns (e.g. an empty frame's): averaged as float64
+            values = pd.to_numeric(df[col]).to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values if complete else values[valid]
+        totals = np.bincount(ids, weights=np.nan_to_num(values) if values.dtype.kind == 'f' else values, minlength=n_slots)[kept]
+        counts = rows[kept] if values.dtype.kind != 'f' else np.bincount(ids, weights=~np.isnan(values), minlength=n_slots)[kept]
+        mean = np.divide(totals, counts, out=np.full(n_groups, np.nan), where=counts > 0)
+        result[col] = mean.astype(np.float32) if values.dtype == np.float32 else mean
+    if size is not None:
+        result[size] = rows[kept].astype(np.int64)
+    # One frame built from all columns at once; inserting them one by one costs more than the sums
+    return pd.DataFrame(result, copy=False)
+
+
+def group_sums(df, by, measures, sort=True):
+    """
+    Grouped sums of `measures`: `df.groupby(by, observed=True)[measures].sum().reset_index()`.
+    """
+    return group_reduce(df, by, sums=measures, sort=sort)
+
+
+def group_means(df, by, measures, sort=True):
+    """
+    Grouped means of `measures`: `df.groupby(by, observed=True)[measures].mean().reset_index()`.
+    """
+    return group_reduce(df, by, means=measures, sort=sort)
@@ -0,0 +1,51 @@
+import os
+
+from .store import cache_dir, file_lock, read_json, write_json
+
+# --- Ingestion Manifest ---
+# Shards are append-only row ranges. The manifest records every shard that has
+# been ingested (family, row range, content hash, row count) together with the
+# zone maps of its row groups and its ingest counts (rows read, rejected,
+# duplicates).
+
+
+def manifest_path(directory=None):
+    return os.path.join(cache_dir(directory), 'manifest.json')
+
+
+def load_manifest(directory=None):
+    """
+    Returns {shard file name: entry} for every ingested shard.
+    """
+    return read_json(manifest_path(directory)).get('shards', {})
+
+
+def record_shard(shard, digest, rows, directory=None, zones=None, stats=None):
+    # Read-modify-write under a lock, since snapshots may be built by several workers at once
+    path = manifest_path(directory)
+    with file_lock(path):
+        manifest = load_manifest(directory)
+        manifest[os.path.basename(shard.path)] = {
+            'family': shard.family,
+            'start': shard.start,
+            'stop': shard.stop,
+            'digest': digest,
+            'rows': rows,
+            'zones': zones or [],
+            'stats': stats or {},
+        }
+        write_json(path, {'shards': manifest})
+
+
+def check_ranges(family, directory=None):
+    """
+    Lists gaps and overlaps between the row ranges of a family's ingested shards.
+    """
+    entries = sorted((e for e in load_manifest(directory).values() if e['family'] == family), key=lambda e: e['start'])
+    issues = []
+    for prev, cur in zip(entries, entries[1:]):
+        if cur['start'] < prev['stop']:
+            issues.append(f"{family}: rows {cur['start']}-{prev['stop']} appear in two shards")
+        elif cur['start'] > prev['stop']:
+            issues.append(f"{family}: rows {prev['stop']}-{cur['start']} are missing")
+    return issues
@@ -0,0 +1,65 @@
+import contextlib
+import os
+import sys
+import tracemalloc
+
+import pyarrow as pa
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- Peak Memory Reporting ---
+# Loaders that claim to be memory-bounded report what they actually used.
+# Arrow's pool is read before and after the load, so its figure is what the
+# load left allocated there (the cube and partition reads). The OS only keeps
+# the process's high-water mark, so the RSS figure is the peak since the
+# process started, not of one load. tracemalloc only sees the Python heap
+# (Python objects and NumPy/pandas buffers, not Arrow's), and tracing slows
+# every allocation, so the heap peak is only measured with AADHAR_TRACE_MEMORY
+# set. Sessions share one process, so overlapping loads blend together.
+
+TRACE_ENV = 'AADHAR_TRACE_MEMORY'
+
+
+def heap_tracing_enabled():
+    """
+    True when AADHAR_TRACE_MEMORY asks loaders to trace their Python heap peak.
+    """
+    return os.environ.get(TRACE_ENV, '').lower() in ('1', 'true', 'yes')
+
+
+@contextlib.contextmanager
+def track_peak():
+    """
+    Measures the memory of a block. Yields a dict that holds, once the block
+    exits, 'arrow_mb' (growth of Arrow's pool over the block), 'rss_peak_mb'
+    (the process's peak RSS since it started) where available and, with heap
+    tracing on, 'heap_peak_mb' (peak Python heap growth during the block).
+    """
+    report = {}
+    tracing = heap_tracing_enabled()
+    started = tracing and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if tracing:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    arrow_base = pa.total_allocated_bytes()
+    try:
+        yield report
+    finally:
+        if tracing:
+            report['heap_peak_mb'] = (tracemalloc.get_traced_memory()[1] - base) / 2**20
+        if started:
+            tracemalloc.stop()
+        report['arrow_mb'] = (pa.total_allocated_bytes() - arrow_base) / 2**20
+        if resource is not None:
+            # ru_maxrss is in KiB on Linux and bytes on macOS
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report['rss_peak_mb'] = rss / (2**20 if sys.platform == 'darwin' else 2**10)
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
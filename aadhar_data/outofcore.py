@@ -0,0 +1,143 @@
+import contextlib
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .dictionary import key_categories
+from .join import join_families
+from .partitions import ensure_partitions, partition_matches, read_partition_files
+from .store import cache_dir
+
+# --- Out-of-Core Execution ---
+# For data larger than RAM the multi-family join runs over the partitioned
+# store one (state, month) unit at a time: the unit's rows of every family are
+# read, joined in memory, and the result is spilled to a Parquet part on disk.
+# When the keys include `day` and `state` the units never share a key and the
+# parts are final; otherwise a second pass hash-partitions the parts on their
+# key into buckets of at most PASS_ROWS rows and joins each bucket. Only one
+# unit (or bucket) is ever in memory next to the result, so capacity is
+# bounded by disk rather than by the inputs' size in RAM.
+
+# Upper bound on the rows joined at once in the second (hash) pass
+PASS_ROWS = 2_000_000
+
+
+def out_of_core_enabled():
+    """
+    True when AADHAR_OUT_OF_CORE is set, asking the dashboards to build their
+    frames in bounded-memory passes instead of loading whole families.
+    """
+    return os.environ.get('AADHAR_OUT_OF_CORE', '').lower() in ('1', 'true', 'yes')
+
+
+@contextlib.contextmanager
+def spill_space(directory=None):
+    """
+    Scratch directory under the cache for spilled parts, removed afterwards.
+    """
+    root = os.path.join(cache_dir(directory), 'spill')
+    os.makedirs(root, exist_ok=True)
+    path = tempfile.mkdtemp(dir=root)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _write_part(df, path, tables):
+    # Categorical keys are spilled as codes into the shared sorted categories
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if not values.cat.categories.equals(tables[col][0]):
+                values = values.cat.set_categories(tables[col][0])
+            values = values.cat.codes
+        out[col] = values.to_numpy()
+    pd.DataFrame(out).to_parquet(path, index=False)
+    return path
+
+
+def _read_parts(paths, tables, decode=True):
+    df = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+    if decode:
+        for field, (categories, _) in tables.items():
+            if field in df.columns:
+                df[field] = pd.Categorical.from_codes(df[field].to_numpy(), categories=categories)
+    return df
+
+
+def partition_units(families, directory=None, date_range=None, states=None):
+    """
+    {unit: {family: partition files}} for every (state, month) partition
+    directory that holds rows of at least one of the families.
+    """
+    units = {}
+    for family in families:
+        for relpath in ensure_partitions(family, directory):
+            if partition_matches(relpath, date_range, states):
+                units.setdefault(os.path.dirname(relpath), {}).setdefault(family, []).append(relpath)
+    return dict(sorted(units.items()))
+
+
+def _merge_parts(parts, keys, spill, tables):
+    """
+    Second pass for keys that do not separate the units: parts are split into
+    hash buckets on their key codes and every bucket is joined on its own.
+    """
+    rows = sum(pq.ParquetFile(p).metadata.num_rows for p in parts)
+    n_buckets = max(1, -(-rows // PASS_ROWS))
+    for b in range(n_buckets):
+        os.makedirs(os.path.join(spill, f"bucket-{b:05d}"))
+    for part in parts:
+        df = pd.read_parquet(part)
+        bucket = pd.util.hash_pandas_object(df[keys], index=False).to_numpy() % n_buckets
+        for b, positions in pd.Series(bucket).groupby(bucket).indices.items():
+            df.iloc[positions].to_parquet(os.path.join(spill, f"bucket-{b:05d}", os.path.basename(part)), index=False)
+        os.remove(part)
+
+    merged = []
+    for b in range(n_buckets):
+        folder = os.path.join(spill, f"bucket-{b:05d}")
+        pieces = [os.path.join(folder, name) for name in sorted(os.listdir(folder))]
+        if pieces:
+            # Keys are plain integer codes here, so no decoding is needed
+            joined = join_families([_read_parts(pieces, tables, decode=False)], keys)
+            merged.append(_write_part(joined, os.path.join(spill, f"merged-{b:05d}.parquet"), tables))
+        shutil.rmtree(folder)
+    return merged
+
+
+def join_out_of_core(specs, keys, directory=None, date_range=None, states=None):
+    """
+    Bounded-memory counterpart of loading several families and calling
+    `join_families` on them. `specs` lists (family, columns, rename) per input;
+    `rename` maps loaded column names to the names wanted in the result.
+    Returns the same frame, sorted by key, while holding at most one
+    partition unit of input rows in memory.
+    """
+    keys = list(keys)
+    units = partition_units([family for family, _, _ in specs], directory, date_range, states)
+    # Read after ingestion, which may have added names to the dictionary
+    tables = key_categories(directory)
+
+    def unit_frames(files):
+        return [read_partition_files(family, files.get(family, []), columns, directory, date_range, states).rename(columns=rename or {})
+                for family, columns, rename in specs]
+
+    with spill_space(directory) as spill:
+        parts = []
+        for i, files in enumerate(units.values()):
+            joined = join_families(unit_frames(files), keys)
+            if len(joined):
+                parts.append(_write_part(joined, os.path.join(spill, f"unit-{i:05d}.parquet"), tables))
+            del joined
+        if not parts:
+            return join_families(unit_frames({}), keys)
+        if not {'day', 'state'} <= set(keys):
+            # Units overlap in key space (e.g. one district across months)
+            parts = _merge_parts(parts, keys, spill, tables)
+        return _read_parts(parts, tables).sort_values(keys, ignore_index=True)
@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .backend import backend_name, polars_group_sum
+from .kernels import group_sums
+from .schema import get_schema
+from .shards import find_shards
+from .snapshot import concat_frames, empty_frame, ensure_snapshots, load_snapshot
+
+# --- Parallel Shard Aggregation ---
+# Each worker reads one shard and returns it already grouped to the caller's
+# level, so only small partial aggregates cross process boundaries. The parent
+# then folds the partials together with one more (cheap) groupby.
+
+
+def worker_count(n_tasks):
+    """
+    Number of worker processes for `n_tasks` shards (AADHAR_WORKERS overrides the core count).
+    """
+    limit = int(os.environ.get('AADHAR_WORKERS', 0)) or os.cpu_count() or 1
+    return max(1, min(limit, n_tasks))
+
+
+def group_sum(df, by, measures):
+    if backend_name() == 'polars':
+        return polars_group_sum(df, by, measures)
+    return group_sums(df, by, measures, sort=False)
+
+
+def _aggregate_shard(task):
+    shard, by, measures, directory = task
+    df = load_snapshot(shard, list(by) + list(measures), directory)
+    return group_sum(df, by, measures)
+
+
+def map_shards(func, tasks):
+    """
+    Runs `func` over `tasks` in a process pool, or inline when one worker suffices.
+    """
+    workers = worker_count(len(tasks))
+    if workers == 1:
+        return [func(t) for t in tasks]
+    # spawn keeps the Streamlit server's threads out of the children
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(func, tasks))
+
+
+def aggregate_family(family, by, measures=None, directory=None):
+    """
+    Sums `measures` (default: every count column) of a family grouped by `by`,
+    e.g. ['state', 'district'] or ['date', 'state', 'district', 'pincode'].
+    Shards are read and pre-aggregated concurrently, then merged.
+    """
+    by = list(by)
+    measures = list(measures or get_schema(family).counts)
+    shards = find_shards(family, directory)
+    if not shards:
+        return empty_frame(family, by + measures, directory)
+
+    ensure_snapshots(shards, directory)
+    partials = map_shards(_aggregate_shard, [(s, by, measures, directory) for s in shards])
+    if len(partials) == 1:
+        return partials[0]
+    return group_sum(concat_frames(partials), by, measures)
@@ -0,0 +1,166 @@
+import os
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .backend import backend_name, polars_filter
+from .calendar import MISSING_DAY, day_to_date
+from .dictionary import key_categories
+from .schema import normalize_name, resolve_columns, stored_columns
+from .shards import find_shards
+from .shared import open_family
+from .snapshot import empty_frame, ensure_snapshot, filter_columns, read_stored
+from .store import cache_dir, file_lock, read_json, write_json
+from .zonemap import date_bounds
+
+# --- Partitioned Store ---
+# Filtered views read from a Hive-style copy of each family, laid out as
+# partitions/<family>/state=<name>/month=<YYYY-MM>/<snapshot>.parquet.
+# A state- and date-scoped load lists the partition directories it needs and
+# opens only those files, instead of scanning every shard for matching rows.
+# Each snapshot is split once; index.json records the files it produced so a
+# replaced shard's partitions are swapped out as a whole.
+
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def partition_root(family, directory=None):
+    folder = os.path.join(cache_dir(directory), 'partitions', family)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _index_path(family, directory=None):
+    return os.path.join(partition_root(family, directory), 'index.json')
+
+
+def partition_name(state, month):
+    state = NULL_PARTITION if state is None else quote(state, safe='')
+    return os.path.join(f"state={state}", f"month={month or NULL_PARTITION}")
+
+
+def parse_partition(relpath):
+    """
+    (state, month) of a partition file path relative to the family root.
+    """
+    state_dir, month_dir = relpath.split(os.sep)[:2]
+    state = state_dir.split('=', 1)[1]
+    month = month_dir.split('=', 1)[1]
+    return (None if state == NULL_PARTITION else unquote(state)), (None if month == NULL_PARTITION else month)
+
+
+def split_snapshot(shard, directory=None):
+    """
+    Writes one file per (state, month) present in a shard's snapshot and returns
+    their paths relative to the family's partition root.
+    """
+    snapshot = ensure_snapshot(shard, directory)
+    token = os.path.splitext(os.path.basename(snapshot))[0]
+    table = pq.read_table(snapshot)
+    days = table.column('day').to_numpy()
+    states = table.column('state').to_numpy()
+
+    months = day_to_date(days).astype('datetime64[M]').astype(str)
+    months[days == MISSING_DAY] = ''
+    categories, rank = key_categories(directory)['state']
+    state_names = np.where(states >= 0, np.asarray(categories, dtype=object)[rank[states]] if len(rank) else None, None)
+
+    root = partition_root(shard.family, directory)
+    groups = pd.DataFrame({'state': state_names, 'month': months}).groupby(['state', 'month'], dropna=False, sort=False).indices
+    written = []
+    for (state, month), rows in groups.items():
+        relpath = os.path.join(partition_name(None if pd.isna(state) else state, month), f"{token}.parquet")
+        target = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        pq.write_table(table.take(pa.array(rows)), tmp)
+        os.replace(tmp, target)
+        written.append(relpath)
+    return token, sorted(written)
+
+
+def ensure_partitions(family, directory=None):
+    """
+    Brings the partitioned copy of a family up to date with its shards and
+    returns the list of partition files (relative paths).
+    """
+    index_path = _index_path(family, directory)
+    root = partition_root(family, directory)
+    shards = find_shards(family, directory)
+    with file_lock(index_path):
+        index = read_json(index_path).get('shards', {})
+        current = {}
+        for shard in shards:
+            stem = os.path.splitext(os.path.basename(shard.path))[0]
+            token = os.path.splitext(os.path.basename(ensure_snapshot(shard, directory)))[0]
+            entry = index.get(stem)
+            if entry is None or entry['token'] != token:
+                token, files = split_snapshot(shard, directory)
+                entry = {'token': token, 'files': files}
+            current[stem] = entry
+        # Drop the partitions of shards that were replaced or removed
+        keep = {f for entry in current.values() for f in entry['files']}
+        for entry in index.values():
+            for relpath in entry['files']:
+                if relpath not in keep and os.path.exists(os.path.join(root, relpath)):
+                    os.remove(os.path.join(root, relpath))
+        if current != index:
+            write_json(index_path, {'shards': current})
+    return [f for entry in current.values() for f in entry['files']]
+
+
+def partition_matches(relpath, date_range=None, states=None):
+    state, month = parse_partition(relpath)
+    if states is not None and state not in {normalize_name(s) for s in states}:
+        return False
+    if date_range is not None:
+        if month is None:
+            return False
+        start, end = date_bounds(date_range)
+        if start is not None and month < start.strftime('%Y-%m'):
+            return False
+        if end is not None and month > end.strftime('%Y-%m'):
+            return False
+    return True
+
+
+def load_partitions(family, columns=None, directory=None, date_range=None, states=None):
+    """
+    Reads the rows of a family matching a date window (inclusive) and/or a
+    state selection, opening only the partitions those filters select.
+    """
+    files = [f for f in ensure_partitions(family, directory) if partition_matches(f, date_range, states)]
+    return read_partition_files(family, files, columns, directory, date_range, states)
+
+
+def read_partition_files(family, files, columns=None, directory=None, date_range=None, states=None):
+    """
+    Reads the given partition files (relative paths) of a family as one typed frame.
+    """
+    columns = resolve_columns(family, columns)
+    if not files:
+        return empty_frame(family, columns, directory)
+    root = partition_root(family, directory)
+    stored = stored_columns(family, filter_columns(family, columns, date_range, states))
+    table = pa.concat_tables([pq.read_table(os.path.join(root, f), columns=stored, partitioning=None) for f in files])
+    tables = key_categories(directory)
+    if backend_name() == 'polars' and (date_range is not None or states is not None):
+        # Rows are dropped on the Arrow table, before the pandas conversion
+        return read_stored(polars_filter(table, date_range, states, tables).to_pandas(), columns, tables)
+    return read_stored(table.to_pandas(), columns, tables, date_range, states)
+
+
+def load_family(family, columns=None, directory=None, date_range=None, states=None):
+    """
+    Loads every shard of a dataset family as one typed frame.
+    `columns` limits the read to what the caller needs. With `date_range` /
+    `states` only the matching state/month partitions are opened; otherwise the
+    rows come from the family's shared memory-mapped file (see shared.py). An
+    empty typed frame is returned when nothing matches.
+    """
+    if date_range is not None or states is not None:
+        return load_partitions(family, columns, directory, date_range, states)
+    return open_family(family, columns, directory)
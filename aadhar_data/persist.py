@@ -0,0 +1,126 @@
+import contextlib
+import functools
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+
+import pandas as pd
+
+from .facts import FactTable
+from .shards import FAMILIES, find_shards
+from .snapshot import snapshot_path
+from .store import cache_dir
+from .tail import tail_interval
+
+# --- Persistent Frame Cache ---
+# `st.cache_data` only lives as long as the Streamlit process, so after the app
+# is put to sleep the first visitor pays for the whole load again. Wrapping a
+# loader in `disk_cache` also keeps its result under `.aadhar_cache/frames/`,
+# keyed by the input shards (their snapshot names: content hash, lineage and
+# alias table), the code that produced it (the loader's source file and the
+# aadhar_data package) and the call arguments. A restarted process with the
+# same inputs and code gets the result back in one file read. In live tail
+# mode the shards keep changing, so nothing is persisted.
+
+# Most recent entries kept per loader (one per distinct filter selection)
+MAX_ENTRIES = 32
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_code_tags = {}
+
+
+def _file_hash(hasher, path):
+    with open(path, 'rb') as fh:
+        hasher.update(fh.read())
+
+
+def code_tag(func):
+    """
+    Fingerprint of the code behind `func`: its whole source file (so helpers
+    next to it count too) and every module of the aadhar_data package.
+    """
+    try:
+        source = inspect.getsourcefile(func)
+    except TypeError:
+        source = None
+    if source not in _code_tags:
+        hasher = hashlib.md5()
+        for path in sorted(glob.glob(os.path.join(_PACKAGE_DIR, '*.py'))):
+            _file_hash(hasher, path)
+        if source and os.path.exists(source):
+            _file_hash(hasher, source)
+        else:
+            hasher.update(func.__code__.co_code)
+        _code_tags[source] = hasher.hexdigest()[:12]
+    return _code_tags[source]
+
+
+def input_tag(directory=None):
+    """
+    Fingerprint of every shard currently in the data directory. Snapshot names
+    carry the content hash, lineage and alias tag, so any change to the data
+    or the alias table gives a new tag.
+    """
+    names = sorted(os.path.basename(snapshot_path(s, directory)) for family in FAMILIES for s in find_shards(family, directory))
+    return hashlib.md5('\n'.join(names).encode()).hexdigest()[:12]
+
+
+def _storable(result):
+    # Failed loads (None or an empty frame) are left to be retried next start
+    if result is None:
+        return False
+    if isinstance(result, pd.DataFrame):
+        return not result.empty
+    if isinstance(result, FactTable):
+        return result.length > 0
+    if isinstance(result, (tuple, list)):
+        return all(_storable(r) for r in result if isinstance(r, pd.DataFrame) or r is None)
+    return True
+
+
+def disk_cache(func=None, directory=None):
+    """
+    Decorator persisting a loader's result on disk. Stack it under
+    `@st.cache_data` so the in-memory cache is tried first. Arguments must
+    have a stable repr (dates, tuples of names). Entries written for older
+    inputs or code are removed when a new one is stored, as are all but the
+    MAX_ENTRIES most recent selections.
+    """
+    if func is None:
+        return functools.partial(disk_cache, directory=directory)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if tail_interval() is not None:
+            return func(*args, **kwargs)
+        folder = os.path.join(cache_dir(directory), 'frames')
+        os.makedirs(folder, exist_ok=True)
+        name = f"{os.path.splitext(os.path.basename(inspect.getsourcefile(func) or 'app'))[0]}.{func.__name__}"
+        tag = f"{input_tag(directory)}{code_tag(func)}"
+        call = hashlib.md5(repr((args, sorted(kwargs.items()))).encode()).hexdigest()[:12]
+        path = os.path.join(folder, f"{name}-{tag}-{call}.pkl")
+
+        try:
+            with open(path, 'rb') as fh:
+                result = pickle.load(fh)
+            os.utime(path)  # recently used selections are evicted last
+            return result
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass
+
+        result = func(*args, **kwargs)
+        if _storable(result):
+            entries = glob.glob(os.path.join(folder, f"{glob.escape(name)}-*.pkl"))
+            current = sorted((p for p in entries if f"-{tag}-" in os.path.basename(p)), key=os.path.getmtime)
+            for stale in [p for p in entries if p not in current] + current[:max(0, len(current) - MAX_ENTRIES + 1)]:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(stale)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as fh:
+                pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        return result
+
+    return wrapper
@@ -0,0 +1,206 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .calendar import day_to_date, parse_dates, to_day_key
+from .compression import open_shard
+
+# --- Dataset Schema Registry ---
+# One declaration per dataset family. Every shard of a family shares the same
+# key columns and differs only in its age-bucket count columns.
+
+DATE_FORMAT = '%d-%m-%Y'
+
+KEY_COLUMNS = ('date', 'state', 'district', 'pincode')
+
+# Snapshots store `day` (an int16 day key, see calendar.py) in place of `date`;
+# either can be requested and `date` is rebuilt from the key on read.
+DAY_COLUMN = 'day'
+
+KEY_DTYPES = {
+    'date': 'datetime64[ns]',
+    'day': 'int16',
+    'state': 'category',
+    'district': 'category',
+    'pincode': 'int32',
+}
+
+COUNT_DTYPE = 'uint32'
+
+FamilySchema = namedtuple('FamilySchema', ['name', 'counts'])
+
+SCHEMAS = {
+    'enrolment': FamilySchema('enrolment', ('age_0_5', 'age_5_17', 'age_18_greater')),
+    'demographic': FamilySchema('demographic', ('demo_age_5_17', 'demo_age_17_')),
+    'biometric': FamilySchema('biometric', ('bio_age_5_17', 'bio_age_17_')),
+}
+
+
+def get_schema(family):
+    try:
+        return SCHEMAS[family]
+    except KeyError:
+        raise ValueError(f"Unknown dataset family: {family}") from None
+
+
+def family_columns(family):
+    """
+    All columns of a family in file order.
+    """
+    return list(KEY_COLUMNS) + list(get_schema(family).counts)
+
+
+def column_dtypes(family):
+    """
+    Target dtype of every column of a family.
+    """
+    dtypes = dict(KEY_DTYPES)
+    dtypes.update({c: COUNT_DTYPE for c in get_schema(family).counts})
+    return dtypes
+
+
+def stored_columns(family, columns=None):
+    """
+    Physical snapshot columns backing a column selection (`date` is served from `day`).
+    """
+    stored = []
+    for col in resolve_columns(family, columns):
+        col = DAY_COLUMN if col == 'date' else col
+        if col not in stored:
+            stored.append(col)
+    return stored
+
+
+def to_stored(df):
+    """
+    Replaces the `date` column with its day key before a frame is written.
+    """
+    if 'date' not in df.columns:
+        return df
+    stored = df.drop(columns='date')
+    stored.insert(0, DAY_COLUMN, to_day_key(df['date']))
+    return stored
+
+
+def from_stored(df, columns):
+    """
+    Rebuilds the requested logical columns from a frame read off a snapshot.
+    """
+    if 'date' in columns:
+        df['date'] = day_to_date(df[DAY_COLUMN])
+    return df[columns]
+
+
+def arrow_schema(family, columns=None):
+    """
+    Fixed Arrow schema of a family's snapshot, so chunks written separately share one layout.
+    """
+    import pyarrow as pa
+
+    arrow_types = {
+        'day': pa.int16(),
+        'state': pa.int16(),
+        'district': pa.int16(),
+        'pincode': pa.int32(),
+    }
+    return pa.schema([(c, arrow_types.get(c, pa.uint32())) for c in stored_columns(family, columns)])
+
+
+def resolve_columns(family, columns=None):
+    """
+    Validates a column selection against the registry, keeping file order.
+    """
+    logical = family_columns(family)
+    if columns is None:
+        return logical
+    known = logical[:1] + [DAY_COLUMN] + logical[1:]
+    unknown = [c for c in columns if c not in known]
+    if unknown:
+        raise ValueError(f"Columns {unknown} are not part of the {family} schema")
+    return [c for c in known if c in columns]
+
+
+def normalize_name(value):
+    """
+    Canonical spelling of a state/district name (same rule the apps apply: title case, trimmed).
+    """
+    return str(value).title().strip()
+
+
+def normalize_categories(values, aliases=None):
+    """
+    Normalises a categorical name column by rewriting only its unique categories.
+    `aliases` ({normalised spelling: canonical name}) folds known variants together.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    if len(values.cat.categories) == 0:
+        return values
+    names = values.cat.categories.map(normalize_name)
+    if aliases:
+        names = names.map(lambda n: aliases.get(n, n))
+    categories = pd.Index(sorted(set(names)))
+    remap = categories.get_indexer(names)
+    codes = values.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, remap[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=values.index, name=values.name)
+
+
+def read_csv_typed(path, family, columns=None, coerce=True, **kwargs):
+    """
+    Reads a raw CSV shard straight into the registry dtypes, parsing only `columns`.
+    `.csv.gz` / `.csv.zst` shards are decompressed as a stream while being parsed.
+    With `coerce=False` frames come back as parsed, for validation.validate_frame.
+    Extra keyword arguments go to `pd.read_csv` (e.g. `chunksize`).
+    """
+    columns = resolve_columns(family, columns)
+    # Keys are parsed straight into their final form; numeric columns are left to
+    # inference so a stray blank or typo does not abort the whole shard.
+    parse_dtypes = {c: t for c, t in (('date', 'string'), ('state', 'category'), ('district', 'category')) if c in columns}
+
+    if kwargs.get('chunksize'):
+        return _typed_chunks(path, family, coerce, usecols=columns, dtype=parse_dtypes, **kwargs)
+    source = open_shard(path)
+    try:
+        df = pd.read_csv(source, usecols=columns, dtype=parse_dtypes, **kwargs)
+        return coerce_frame(df, family) if coerce else df
+    finally:
+        if source is not path:
+            source.close()
+
+
+def _typed_chunks(path, family, coerce, **kwargs):
+    source = open_shard(path)
+    try:
+        with pd.read_csv(source, **kwargs) as reader:
+            for chunk in reader:
+                yield coerce_frame(chunk, family) if coerce else chunk
+    finally:
+        if source is not path:
+            source.close()
+
+
+def coerce_frame(df, family):
+    """
+    Casts an already-parsed frame of one family to the registry dtypes.
+    Unparseable counts become 0 and unparseable pincodes become -1.
+    """
+    df.columns = df.columns.str.strip()
+    dtypes = column_dtypes(family)
+    out = {}
+    for col in df.columns:
+        target = dtypes.get(col)
+        values = df[col]
+        if target is None:
+            out[col] = values
+        elif col == 'date':
+            out[col] = values if pd.api.types.is_datetime64_any_dtype(values) else parse_dates(values, DATE_FORMAT)
+        elif col == 'pincode':
+            out[col] = pd.to_numeric(values, errors='coerce').fillna(-1).astype(target)
+        elif target == COUNT_DTYPE:
+            counts = pd.to_numeric(values, errors='coerce').fillna(0)
+            out[col] = counts.clip(lower=0, upper=np.iinfo(np.uint32).max).astype(target)
+        else:
+            out[col] = values.astype(target)
+    return pd.DataFrame(out, index=df.index)
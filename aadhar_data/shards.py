@@ -0,0 +1,48 @@
+import os
+import re
+from collections import namedtuple
+
+# --- Shard Discovery ---
+# Every API drop is published as `api_data_aadhar_<family>_<start>_<stop>.csv`,
+# where start/stop is the append-only row range the file covers. Drops may also
+# arrive compressed as `.csv.gz` or `.csv.zst` (see compression.py).
+FAMILIES = ('enrolment', 'demographic', 'biometric')
+
+SHARD_PATTERN = re.compile(
+    r'^api_data_aadhar_(?P<family>enrolment|demographic|biometric)_(?P<start>\d+)_(?P<stop>\d+)\.csv(\.gz|\.zst)?$'
+)
+
+Shard = namedtuple('Shard', ['path', 'family', 'start', 'stop'])
+
+
+def data_dir():
+    """
+    Directory holding the raw CSV shards (the repo root unless overridden).
+    """
+    return os.environ.get('AADHAR_DATA_DIR', '.')
+
+
+def parse_shard_name(path):
+    """
+    Returns a Shard for a file following the API naming scheme, else None.
+    """
+    match = SHARD_PATTERN.match(os.path.basename(path))
+    if match is None:
+        return None
+    return Shard(path, match.group('family'), int(match.group('start')), int(match.group('stop')))
+
+
+def find_shards(family, directory=None):
+    """
+    Lists every shard of one dataset family, ordered by row range.
+    """
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown dataset family: {family}")
+    directory = directory or data_dir()
+
+    shards = []
+    for name in os.listdir(directory):
+        shard = parse_shard_name(os.path.join(directory, name))
+        if shard is not None and shard.family == family:
+            shards.append(shard)
+    return sorted(shards, key=lambda s: (s.start, s.stop))
@@ -0,0 +1,74 @@
+import glob
+import hashlib
+import os
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from .dictionary import key_categories
+from .schema import arrow_schema, resolve_columns, stored_columns
+from .shards import find_shards
+from .snapshot import CHUNK_ROWS, empty_frame, ensure_snapshot, read_stored
+from .store import cache_dir
+
+# --- Shared Memory-Mapped Fact Tables ---
+# Every dashboard runs in its own process. Instead of each one decoding the
+# Parquet snapshots into private memory, a family's snapshots are published
+# once as a single uncompressed Arrow IPC file, and readers memory-map it.
+# The stored columns are fixed-width integers without nulls, so pandas wraps
+# the mapped pages directly (read-only, zero-copy) and every process on the
+# host shares one set of physical pages through the OS page cache. Only the
+# small state/district code columns and a rebuilt `date` are private.
+
+
+def _shared_folder(directory=None):
+    folder = os.path.join(cache_dir(directory), 'shared')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def publish_family(family, directory=None):
+    """
+    Path of the Arrow IPC file holding all rows of a family, written if the
+    family's snapshots changed since it was last published. None if the
+    family has no shards.
+    """
+    snapshots = [ensure_snapshot(s, directory) for s in find_shards(family, directory)]
+    if not snapshots:
+        return None
+    key = hashlib.md5('|'.join(os.path.basename(p) for p in snapshots).encode()).hexdigest()[:12]
+    target = os.path.join(_shared_folder(directory), f"{family}-{key}.arrow")
+    if os.path.exists(target):
+        return target
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with ipc.new_file(tmp, arrow_schema(family)) as writer:
+        for path in snapshots:
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS):
+                writer.write_batch(batch)
+    os.replace(tmp, target)
+
+    for stale in glob.glob(os.path.join(_shared_folder(directory), f"{family}-*.arrow")):
+        if stale != target:
+            try:
+                os.remove(stale)
+            except OSError:
+                # Still mapped by a reader on a platform that locks open files
+                pass
+    return target
+
+
+def open_family(family, columns=None, directory=None):
+    """
+    All rows of a family as a frame backed by the shared memory map.
+    Count, pincode and day columns are read-only views onto the mapped file;
+    callers derive new columns rather than modifying them in place.
+    """
+    columns = resolve_columns(family, columns)
+    path = publish_family(family, directory)
+    if path is None:
+        return empty_frame(family, columns, directory)
+    table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    table = table.select(stored_columns(family, columns))
+    return read_stored(table.to_pandas(split_blocks=True), columns, key_categories(directory))
@@ -0,0 +1,279 @@
+import glob
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+from .aliases import alias_tag, load_aliases, resolve_aliases
+from .dictionary import decode_keys, encode_keys, key_categories
+from .duplicates import flag_duplicates, hashes_path, load_hashes, record_hashes, save_hashes
+from .manifest import load_manifest, record_shard
+from .schema import arrow_schema, column_dtypes, from_stored, read_csv_typed, resolve_columns, stored_columns, to_stored
+from .shards import FAMILIES, find_shards
+from .store import cache_dir, file_digest
+from .validation import validate_frame, write_quarantine
+from .zonemap import chunk_zone, filter_frame, select_row_groups
+
+# --- Columnar Snapshot Cache ---
+# Each CSV shard is parsed once and stored as Parquet under the cache directory.
+# Snapshots are named after the shard's content hash, so an edited or replaced
+# shard gets a fresh snapshot while untouched shards are reused across restarts
+# and across all dashboards. Since rows already seen in an earlier shard are
+# dropped (see duplicates.py), the name also carries a lineage tag over the
+# alias table and the hashes of the family's earlier shards.
+
+# Bump whenever the snapshot layout or typing changes so old files are rebuilt
+SNAPSHOT_VERSION = 8
+
+# Shards are parsed and written in row groups of this size, which bounds the
+# memory needed to build a snapshot regardless of the shard's size
+CHUNK_ROWS = 250_000
+
+
+def _shard_stem(shard):
+    return os.path.splitext(os.path.basename(shard.path))[0]
+
+
+def _earlier_shards(shard, directory=None):
+    shards = find_shards(shard.family, directory)
+    return shards[:[s.path for s in shards].index(shard.path)] if shard in shards else shards
+
+
+def _lineage_tag(shard, directory=None):
+    # Changes whenever the alias table or any earlier shard of the family changes
+    parts = [alias_tag(directory)] + [file_digest(s.path, directory) for s in _earlier_shards(shard, directory)]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()[:8]
+
+
+def snapshot_path(shard, directory=None, end=None):
+    folder = os.path.join(cache_dir(directory), 'snapshots', shard.family)
+    os.makedirs(folder, exist_ok=True)
+    digest = file_digest(shard.path, directory, end)
+    return os.path.join(folder, f"{_shard_stem(shard)}-{digest}-{_lineage_tag(shard, directory)}-v{SNAPSHOT_VERSION}.parquet")
+
+
+def _seen_hashes(shard, directory=None):
+    # Row/key hashes kept by every earlier shard of the family
+    rows, keys = [], []
+    for earlier in _earlier_shards(shard, directory):
+        row_hash, key_hash = load_hashes(ensure_snapshot(earlier, directory))
+        rows.append(row_hash)
+        keys.append(key_hash)
+    if not rows:
+        return np.empty(0, np.uint64), np.empty(0, np.uint64)
+    return np.unique(np.concatenate(rows)), np.unique(np.concatenate(keys))
+
+
+def clean_chunk(raw, family, aliases, seen_rows, seen_keys, stats, directory=None):
+    """
+    Runs one parsed CSV chunk through the ingest stages: validation, alias
+    folding, key encoding, and removal of rows whose full hash is in
+    `seen_rows`. Returns (chunk, stored chunk, row hashes, key hashes,
+    rejected rows), with chunk and stored as None when no row is left.
+    `stats` is updated in place.
+    """
+    chunk, bad = validate_frame(raw, family)
+    stats['rows_read'] += len(raw)
+    stats['rejected'] += len(bad)
+    if chunk.empty:
+        return None, None, None, None, bad
+    chunk = resolve_aliases(chunk, aliases)
+    stored = to_stored(encode_keys(chunk, directory))
+    row_hash, key_hash = record_hashes(stored)
+    duplicate, collision = flag_duplicates(row_hash, key_hash, seen_rows, seen_keys)
+    stats['duplicates'] += int(duplicate.sum())
+    stats['key_collisions'] += int(collision.sum())
+    if duplicate.all():
+        return None, None, None, None, bad
+    if duplicate.any():
+        chunk = chunk[~duplicate].reset_index(drop=True)
+        stored = stored[~duplicate].reset_index(drop=True)
+        row_hash, key_hash = row_hash[~duplicate], key_hash[~duplicate]
+    return chunk, stored, row_hash, key_hash, bad
+
+
+class _ShardHead(io.RawIOBase):
+    """
+    The first `end` bytes of a plain shard.
+    """
+
+    def __init__(self, path, end):
+        self._fh = open(path, 'rb')
+        self._left = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self._fh.readinto(memoryview(buffer)[:self._left])
+        self._left -= size
+        return size
+
+    def close(self):
+        self._fh.close()
+        super().close()
+
+
+def build_snapshot(shard, directory=None, end=None):
+    """
+    Parses a CSV shard into the registry dtypes and writes its Parquet snapshot,
+    one row group per chunk, recording a zone map for each row group.
+    Rows failing validation are quarantined, state/district spellings are folded
+    through the reviewed alias table, and exact duplicates of rows already seen
+    (in this shard or an earlier one) are dropped. Stale versions of the
+    snapshot are dropped. With `end`, only the shard's first `end` bytes are
+    read (live tail mode: the complete lines of a shard still being written).
+    """
+    target = snapshot_path(shard, directory, end)
+    source = shard.path if end is None else io.BufferedReader(_ShardHead(shard.path, end))
+    schema = arrow_schema(shard.family)
+    aliases = load_aliases(directory)
+    seen_rows, seen_keys = _seen_hashes(shard, directory)
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    zones = []
+    row_hashes, key_hashes = [], []
+    rejected = []
+    stats = {'rows_read': 0, 'rejected': 0, 'duplicates': 0, 'key_collisions': 0}
+    rows = 0
+    with pq.ParquetWriter(tmp, schema) as writer:
+        for raw in read_csv_typed(source, shard.family, coerce=False, chunksize=CHUNK_ROWS):
+            chunk, stored, row_hash, key_hash, bad = clean_chunk(raw, shard.family, aliases, seen_rows, seen_keys, stats, directory)
+            if len(bad):
+                rejected.append(bad)
+            if chunk is None:
+                continue
+            # Later chunks of this shard are checked against this one as well
+            seen_rows = np.union1d(seen_rows, row_hash)
+            seen_keys = np.union1d(seen_keys, key_hash)
+            row_hashes.append(row_hash)
+            key_hashes.append(key_hash)
+            zones.append(chunk_zone(chunk))
+            writer.write_table(pa.Table.from_pandas(stored, schema=schema, preserve_index=False), row_group_size=len(stored))
+            rows += len(stored)
+    save_hashes(target, row_hashes, key_hashes)
+    write_quarantine(target, shard.family, _shard_stem(shard), rejected, directory)
+    os.replace(tmp, target)
+
+    record_shard(shard, file_digest(shard.path, directory, end), rows, directory, zones, stats)
+
+    for pattern in (f"{_shard_stem(shard)}-*.parquet", f"{_shard_stem(shard)}-*.hashes.npz"):
+        for stale in glob.glob(os.path.join(os.path.dirname(target), pattern)):
+            if stale not in (target, hashes_path(target)):
+                os.remove(stale)
+    return target
+
+
+def ensure_snapshot(shard, directory=None, end=None):
+    path = snapshot_path(shard, directory, end)
+    if not (os.path.exists(path) and os.path.exists(hashes_path(path))):
+        build_snapshot(shard, directory, end)
+    return path
+
+
+def ensure_snapshots(shards, directory=None):
+    """
+    Snapshot paths of `shards`, building the missing ones here in shard order.
+    Each build drops rows seen in the earlier shards' snapshots, so building
+    before shards are handed to the worker pool leaves the workers only reads
+    (left to the workers, each would rebuild every earlier shard itself).
+    """
+    return [ensure_snapshot(shard, directory) for shard in shards]
+
+
+def load_snapshot(shard, columns=None, directory=None, date_range=None, states=None):
+    """
+    Reads one shard from its snapshot, building the snapshot first if needed.
+    Only the requested columns are read from disk. With `date_range` (inclusive
+    start/end) or `states`, row groups ruled out by the zone maps are skipped and
+    None is returned when the whole shard is ruled out.
+    """
+    path = ensure_snapshot(shard, directory)
+    columns = resolve_columns(shard.family, columns)
+    if date_range is None and states is None:
+        return read_stored(pd.read_parquet(path, columns=stored_columns(shard.family, columns)), columns, key_categories(directory))
+
+    groups = select_row_groups(shard, date_range, states, directory)
+    if groups == []:
+        return None
+
+    stored = stored_columns(shard.family, filter_columns(shard.family, columns, date_range, states))
+    parquet = pq.ParquetFile(path)
+    table = parquet.read(columns=stored) if groups is None else parquet.read_row_groups(groups, columns=stored)
+    return read_stored(table.to_pandas(), columns, key_categories(directory), date_range, states)
+
+
+def filter_columns(family, columns, date_range=None, states=None):
+    """
+    Columns to read so that `date_range` / `states` can be applied (dates are filtered on `day`).
+    """
+    extra = (['day'] if date_range is not None else []) + (['state'] if states is not None else [])
+    return resolve_columns(family, set(columns) | set(extra))
+
+
+def read_stored(df, columns, tables, date_range=None, states=None):
+    """
+    Logical view of a frame read off a snapshot: key codes decoded, rows
+    filtered, then `date` rebuilt for the surviving rows only.
+    """
+    df = decode_keys(df, tables)
+    if date_range is not None or states is not None:
+        df = filter_frame(df, date_range, states).reset_index(drop=True)
+    return from_stored(df, columns)
+
+
+def empty_frame(family, columns=None, directory=None):
+    columns = resolve_columns(family, columns)
+    dtypes = column_dtypes(family)
+    tables = key_categories(directory)
+    return pd.DataFrame({
+        c: pd.Categorical([], categories=tables[c][0]) if c in tables else pd.Series(dtype=dtypes[c])
+        for c in columns
+    })
+
+
+def concat_frames(frames):
+    """
+    Concatenates shard frames, unioning categories so state/district stay categorical.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = union_categoricals([f[col] for f in frames])
+    return df
+
+
+def family_bounds(family, directory=None):
+    """
+    Date span and (normalised) state list of a whole family, answered from the
+    zone maps without reading any data.
+    """
+    zones = []
+    for shard in find_shards(family, directory):
+        ensure_snapshot(shard, directory)
+        zones.extend(load_manifest(directory).get(os.path.basename(shard.path), {}).get('zones', []))
+    dates = [pd.Timestamp(d) for z in zones for d in (z['date_min'], z['date_max']) if d is not None]
+    return {
+        'date_min': min(dates) if dates else None,
+        'date_max': max(dates) if dates else None,
+        'states': sorted({s for z in zones for s in z['states']}),
+    }
+
+
+def ingest(directory=None):
+    """
+    Builds any missing snapshot for every family. Returns the number of shards seen.
+    """
+    count = 0
+    for family in FAMILIES:
+        for shard in find_shards(family, directory):
+            ensure_snapshot(shard, directory)
+            count += 1
+    return count
@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .calendar import MISSING_DAY, to_day_key
+from .dictionary import key_categories
+from .join import _sum_dtype
+from .partitions import ensure_partitions, partition_root
+from .schema import get_schema, normalize_name
+from .shards import FAMILIES
+from .zonemap import date_bounds
+
+# --- Embedded SQL Layer ---
+# Each family is exposed to an in-process DuckDB connection as a view over its
+# Hive-partitioned store (partitions/<family>/state=<name>/month=<YYYY-MM>/).
+# DuckDB reads the state and month from the directory names, so a query that
+# filters on them opens only the matching files, reads only the columns it
+# references, and runs its filter and aggregation vectorised on all cores.
+# Views expose: day, date, state, district, pincode, month and the counts.
+
+DISTRICT_TABLE = 'district_names'
+
+# 128-bit results (integer SUMs); pandas receives them as float64
+HUGE_TYPES = ('HUGEINT', 'UHUGEINT')
+
+
+def _family_view(family, directory=None):
+    counts = ', '.join(f"p.{c}" for c in get_schema(family).counts)
+    if not ensure_partitions(family, directory):
+        # No shards yet: an empty view with the same columns
+        return (f"SELECT NULL::SMALLINT AS day, NULL::DATE AS date, NULL::VARCHAR AS state, NULL::VARCHAR AS district, "
+                f"NULL::INTEGER AS pincode, NULL::VARCHAR AS month, "
+                + ', '.join(f"NULL::UINTEGER AS {c}" for c in get_schema(family).counts) + " WHERE false")
+    files = os.path.join(partition_root(family, directory), '*', '*', '*.parquet').replace("'", "''")
+    return (f"SELECT p.day, DATE '2000-01-01' + p.day::INTEGER AS date, p.state, d.name AS district, p.pincode, p.month, {counts} "
+            f"FROM read_parquet('{files}', hive_partitioning = true) p "
+            f"LEFT JOIN {DISTRICT_TABLE} d ON p.district = d.code")
+
+
+def connect(directory=None):
+    """
+    DuckDB connection with one view per family (enrolment, demographic,
+    biometric), brought up to date with the shards first.
+    """
+    import duckdb
+
+    con = duckdb.connect()
+    categories, rank = key_categories(directory)['district']
+    con.register(DISTRICT_TABLE, pd.DataFrame({
+        'code': np.arange(len(rank), dtype=np.int16),
+        'name': np.asarray(categories, dtype=object)[rank] if len(rank) else np.empty(0, dtype=object),
+    }))
+    for family in FAMILIES:
+        con.execute(f"CREATE VIEW {family} AS {_family_view(family, directory)}")
+    return con
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def where_clause(date_range=None, states=None):
+    """
+    SQL predicate for a date window (inclusive) and state selection, written
+    on the partition columns (month, state) so DuckDB prunes whole files, and
+    on `day` for the exact bounds.
+    """
+    terms = []
+    start, end = date_bounds(date_range)
+    if date_range is not None:
+        terms.append(f"day <> {MISSING_DAY}")
+    if start is not None:
+        terms.append(f"month >= {_literal(start.strftime('%Y-%m'))} AND day >= {int(to_day_key([start])[0])}")
+    if end is not None:
+        terms.append(f"month <= {_literal(end.strftime('%Y-%m'))} AND day <= {int(to_day_key([end])[0])}")
+    if states is not None:
+        names = sorted({normalize_name(s) for s in states})
+        terms.append(f"state IN ({', '.join(_literal(n) for n in names)})" if names else "false")
+    return ' AND '.join(terms) if terms else 'true'
+
+
+def query(sql, directory=None):
+    """
+    Runs `sql` against the family views and returns a pandas frame.
+    state/district come back as categoricals over the shared categories, and
+    integer results (including SUMs, which DuckDB widens to HUGEINT and pandas
+    receives as float64) as the smallest integer type that holds them, matching
+    what the pandas loaders and `join_families` return. A sum with a NULL
+    (no rows) or beyond 2**53 stays float64.
+    """
+    con = connect(directory)
+    try:
+        result = con.sql(sql)
+        types = dict(zip(result.columns, (str(t) for t in result.types)))
+        df = result.df()
+    finally:
+        con.close()
+    tables = key_categories(directory)
+    for col in df.columns:
+        values = df[col]
+        if col in tables:
+            df[col] = pd.Categorical(values, categories=tables[col][0])
+            continue
+        if types.get(col) in HUGE_TYPES and values.notna().all() and (values.abs() < 2**53).all():
+            # Every float64 below 2**53 is an exact integer
+            values = values.astype(np.int64 if len(values) and values.min() < 0 else np.uint64)
+        if values.dtype == np.uint64 or values.dtype == np.int64:
+            small = np.uint32 if values.dtype == np.uint64 else np.int32
+            df[col] = values.astype(_sum_dtype(values.to_numpy(), values.to_numpy()) if len(values) else small)
+    return df
@@ -0,0 +1,106 @@
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .shards import data_dir
+
+# --- Cache Directory Primitives ---
+# Shared by every module that persists state under the cache directory.
+
+_HASH_BLOCK = 1 << 20
+
+
+def cache_dir(directory=None):
+    """
+    Root of the on-disk cache (`.aadhar_cache` next to the data unless overridden).
+    """
+    path = os.environ.get('AADHAR_CACHE_DIR') or os.path.join(directory or data_dir(), '.aadhar_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def write_json(path, payload):
+    # Write-then-rename so concurrent dashboards never read a half-written file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as fh:
+        json.dump(payload, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def file_digest(path, directory=None, end=None):
+    """
+    Content hash of a shard, or of its first `end` bytes (a shard still being
+    appended to). The hash of a whole file is memoised against (size, mtime)
+    so unchanged files are not re-read.
+    """
+    memo_path = os.path.join(cache_dir(directory), 'digests.json')
+    memo = read_json(memo_path)
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    size = stat.st_size if end is None else end
+    whole = size == stat.st_size
+    entry = memo.get(key)
+    if whole and entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        # Bytes appended after the stat are not part of this hash
+        left = size
+        while left:
+            block = fh.read(min(_HASH_BLOCK, left))
+            if not block:
+                break
+            hasher.update(block)
+            left -= len(block)
+    digest = hasher.hexdigest()
+
+    if whole:
+        memo[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        write_json(memo_path, memo)
+    return digest
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Cross-process exclusive lock on a lock file next to `path`. The lock is
+    held by the OS (flock, or msvcrt on Windows) rather than by the file's
+    existence, so it lasts as long as the holder needs it and is released
+    when the holder exits or crashes.
+    """
+    with open(f"{path}.lock", 'a+b') as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ten seconds
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
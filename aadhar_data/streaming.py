@@ -0,0 +1,55 @@
+import pyarrow.parquet as pq
+
+from .parallel import group_sum, map_shards
+from .dictionary import key_categories
+from .schema import get_schema, resolve_columns, stored_columns
+from .shards import find_shards
+from .snapshot import CHUNK_ROWS, concat_frames, empty_frame, ensure_snapshot, ensure_snapshots, read_stored
+
+# --- Streaming Chunked Reducer ---
+# For views that only need totals (e.g. per district), shards are read in
+# chunks and each chunk is folded into a running aggregate straight away.
+# A worker therefore never holds more than one chunk plus the aggregate, and
+# peak memory follows the number of groups rather than the number of rows.
+
+
+def iter_chunks(shard, columns=None, chunksize=CHUNK_ROWS, directory=None):
+    """
+    Yields a shard as typed frames of at most `chunksize` rows.
+    """
+    path = ensure_snapshot(shard, directory)
+    columns = resolve_columns(shard.family, columns)
+    tables = key_categories(directory)
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=stored_columns(shard.family, columns)):
+        yield read_stored(batch.to_pandas(), columns, tables)
+
+
+def fold_chunks(chunks, by, measures):
+    """
+    Folds an iterable of frames into one grouped sum, one chunk at a time.
+    """
+    total = None
+    for chunk in chunks:
+        partial = group_sum(chunk, by, measures)
+        total = partial if total is None else group_sum(concat_frames([total, partial]), by, measures)
+    return total
+
+
+def _stream_shard(task):
+    shard, by, measures, chunksize, directory = task
+    return fold_chunks(iter_chunks(shard, by + measures, chunksize, directory), by, measures)
+
+
+def stream_family(family, by, measures=None, chunksize=CHUNK_ROWS, directory=None):
+    """
+    Streaming counterpart of `aggregate_family`: same result, bounded memory.
+    Shards are still spread over the worker pool, each one streamed in chunks.
+    """
+    by = list(by)
+    measures = list(measures or get_schema(family).counts)
+    shards = find_shards(family, directory)
+    ensure_snapshots(shards, directory)
+    partials = [p for p in map_shards(_stream_shard, [(s, by, measures, chunksize, directory) for s in shards]) if p is not None]
+    if not partials:
+        return empty_frame(family, by + measures, directory)
+    return fold_chunks(partials, by, measures)
@@ -0,0 +1,247 @@
+import io
+import itertools
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .aliases import load_aliases
+from .compression import is_compressed
+from .dictionary import align_keys, key_categories
+from .duplicates import load_hashes
+from .schema import get_schema, read_csv_typed, resolve_columns, stored_columns
+from .shards import find_shards
+from .snapshot import CHUNK_ROWS, clean_chunk, concat_frames, empty_frame, ensure_snapshot, read_stored
+from .streaming import fold_chunks
+
+# --- Live Tail ---
+# With AADHAR_TAIL_SECONDS set, open dashboards follow the data directory.
+# Every poll compares each shard's size with the byte offset reached so far:
+# a new shard is parsed whole, a grown one only from that offset up to its
+# last complete line. A row still being written when the tail starts is left
+# out of the shard's snapshot and read once its newline arrives. New rows go
+# through the same validation, alias folding and duplicate check as ingest and
+# are kept in memory until every follower of the family (row frames, grouped
+# totals) has picked them up. Nothing but snapshots is written to the cache;
+# the next restart ingests the grown shards as usual.
+# Compressed shards are read when they appear but not followed as they grow.
+
+TAIL_ENV = 'AADHAR_TAIL_SECONDS'
+
+_lock = threading.RLock()
+_epochs = itertools.count()
+_families = {}
+_followers = {}
+
+# Block size for finding a shard's last complete line from its end
+_SCAN_BYTES = 1 << 16
+
+
+def tail_interval():
+    """
+    Refresh interval in seconds when live tail mode is on, else None.
+    """
+    value = float(os.environ.get(TAIL_ENV) or 0)
+    return value if value > 0 else None
+
+
+def _complete_length(path, size):
+    # Bytes of a plain shard up to and including its last newline
+    with open(path, 'rb') as fh:
+        end = size
+        while end > 0:
+            begin = max(0, end - _SCAN_BYTES)
+            fh.seek(begin)
+            newline = fh.read(end - begin).rfind(b'\n')
+            if newline >= 0:
+                return begin + newline + 1
+            end = begin
+    return 0
+
+
+def _start(family, directory=None):
+    # A plain shard's snapshot holds exactly its complete lines, so a row still
+    # being written is neither snapshotted half nor skipped by the polls
+    offsets, snapshots = {}, []
+    for shard in find_shards(family, directory):
+        size = os.path.getsize(shard.path)
+        end = size if is_compressed(shard.path) else _complete_length(shard.path, size)
+        offsets[shard.path] = end
+        if end:
+            snapshots.append(ensure_snapshot(shard, directory, None if is_compressed(shard.path) else end))
+    hashes = [load_hashes(path) for path in snapshots]
+    return {
+        'epoch': next(_epochs),
+        'offsets': offsets,
+        'snapshots': snapshots,
+        'seen_rows': np.unique(np.concatenate([r for r, _ in hashes] or [np.empty(0, np.uint64)])),
+        'seen_keys': np.unique(np.concatenate([k for _, k in hashes] or [np.empty(0, np.uint64)])),
+        # New rows not yet picked up by every follower; `first` counts those already dropped
+        'chunks': [],
+        'first': 0,
+        'stats': {'rows_read': 0, 'rejected': 0, 'duplicates': 0, 'key_collisions': 0},
+    }
+
+
+def _new_lines(path, start, size):
+    """
+    CSV buffer (header plus the complete lines between `start` and `size`) of a
+    plain shard and the offset just past them; None and `start` when no
+    complete line was added yet. `start` is 0 or the start of a line.
+    """
+    with open(path, 'rb') as fh:
+        header = fh.readline()
+        if not header.endswith(b'\n'):
+            return None, start
+        begin = max(start, len(header))
+        fh.seek(begin)
+        data = fh.read(max(0, size - begin))
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return None, start
+    return io.BytesIO(header + data[:end]), begin + end
+
+
+def _poll(state, family, directory=None):
+    """
+    Reads what was appended since the last poll into `state`. Returns False
+    when a followed shard shrank or disappeared, so the tail has to restart.
+    """
+    shards = find_shards(family, directory)
+    sizes = {s.path: os.path.getsize(s.path) for s in shards}
+    offsets = state['offsets']
+    if any(path not in sizes or sizes[path] < offset for path, offset in offsets.items()):
+        return False
+
+    aliases = None
+    for shard in shards:
+        start = offsets.get(shard.path)
+        if start is not None and (is_compressed(shard.path) or sizes[shard.path] == start):
+            continue
+        if is_compressed(shard.path):
+            source, end = shard.path, sizes[shard.path]
+        else:
+            source, end = _new_lines(shard.path, start or 0, sizes[shard.path])
+            if source is None:
+                continue
+        if aliases is None:
+            aliases = load_aliases(directory)
+        for raw in read_csv_typed(source, family, coerce=False, chunksize=CHUNK_ROWS):
+            _, stored, row_hash, key_hash, _ = clean_chunk(raw, family, aliases, state['seen_rows'], state['seen_keys'], state['stats'], directory)
+            if stored is None:
+                continue
+            state['seen_rows'] = np.union1d(state['seen_rows'], row_hash)
+            state['seen_keys'] = np.union1d(state['seen_keys'], key_hash)
+            state['chunks'].append(stored)
+        offsets[shard.path] = end
+    return True
+
+
+def _family(family, directory=None):
+    key = (directory, family)
+    state = _families.get(key)
+    if state is None or not _poll(state, family, directory):
+        state = _families[key] = _start(family, directory)
+    return state
+
+
+def tail_version(*families, directory=None):
+    """
+    Polls the shards of `families` and returns a token that changes whenever
+    new rows were picked up (or a tail had to restart).
+    """
+    with _lock:
+        return tuple((state['epoch'], state['first'] + len(state['chunks'])) for state in (_family(f, directory) for f in families))
+
+
+def _follower(kind, family, columns, directory, base):
+    state = _family(family, directory)
+    key = (kind, directory, family, tuple(columns))
+    follower = _followers.get(key)
+    if follower is None or follower['epoch'] != state['epoch']:
+        if state['first']:
+            # Rows this follower needs were already dropped: restart from fresh snapshots
+            state = _families[(directory, family)] = _start(family, directory)
+        follower = _followers[key] = {'epoch': state['epoch'], 'consumed': 0, 'frame': base(state['snapshots'])}
+    return state, follower
+
+
+def _pending(state, follower, family, columns, directory, tables):
+    new = state['chunks'][follower['consumed'] - state['first']:]
+    follower['consumed'] = state['first'] + len(state['chunks'])
+    # Chunks every follower of the family has folded in are not kept any longer
+    done = min(f['consumed'] for (_, folder, name, _), f in _followers.items()
+               if (folder, name) == (directory, family) and f['epoch'] == state['epoch']) - state['first']
+    del state['chunks'][:done]
+    state['first'] += done
+    return [read_stored(chunk[stored_columns(family, columns)].copy(), columns, tables) for chunk in new]
+
+
+def tail_rows(family, columns=None, directory=None):
+    """
+    Every row of a family as `load_family` returns it, plus the rows appended
+    to its shards since. Treat the frame as read-only: it is shared by every
+    caller until new rows arrive.
+    """
+    columns = resolve_columns(family, columns)
+
+    def base(snapshots):
+        tables = key_categories(directory)
+        frames = [read_stored(pd.read_parquet(path, columns=stored_columns(family, columns)), columns, tables) for path in snapshots]
+        return concat_frames(frames) if frames else empty_frame(family, columns, directory)
+
+    with _lock:
+        state, follower = _follower('rows', family, columns, directory, base)
+        tables = key_categories(directory)
+        new = _pending(state, follower, family, columns, directory, tables)
+        if new:
+            follower['frame'] = concat_frames([align_keys(follower['frame'], tables)] + new)
+        return follower['frame']
+
+
+def tail_aggregate(family, by, measures=None, directory=None):
+    """
+    Live counterpart of `incremental_aggregate`: the grouped sums of a family
+    with the rows appended since folded in.
+    """
+    by = list(by)
+    measures = list(measures or get_schema(family).counts)
+    columns = by + measures
+
+    def base(snapshots):
+        tables = key_categories(directory)
+        chunks = (read_stored(batch.to_pandas(), columns, tables)
+                  for path in snapshots
+                  for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS, columns=stored_columns(family, columns)))
+        total = fold_chunks(chunks, by, measures)
+        return empty_frame(family, columns, directory) if total is None else total
+
+    with _lock:
+        state, follower = _follower('totals', family, columns, directory, base)
+        tables = key_categories(directory)
+        new = _pending(state, follower, family, columns, directory, tables)
+        if new:
+            follower['frame'] = fold_chunks([align_keys(follower['frame'], tables)] + new, by, measures)
+        # Totals are small; callers get their own copy to add columns to
+        return follower['frame'].copy()
+
+
+def watch_tail(version, families, directory=None):
+    """
+    For dashboards: every tail_interval() seconds, reruns the Streamlit page
+    once the tail of `families` has moved past `version` (a `tail_version`
+    token). Does nothing when tail mode is off.
+    """
+    interval = tail_interval()
+    if interval is None:
+        return
+    import streamlit as st
+
+    @st.fragment(run_every=interval)
+    def follow_shards():
+        if tail_version(*families, directory=directory) != version:
+            st.rerun()
+
+    follow_shards()
@@ -0,0 +1,115 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from .calendar import DAY_EPOCH, MISSING_DAY, parse_dates
+from .manifest import load_manifest
+from .schema import DATE_FORMAT, coerce_frame, get_schema
+from .shards import FAMILIES
+from .store import cache_dir
+
+# --- Validation & Quarantine ---
+# Every parsed chunk goes through one vectorised check before it is stored:
+# dates must parse (and fit the int16 day key), state and district must be
+# non-blank names, pincodes must be 6-digit numbers and counts non-negative
+# integers within uint32. Failing rows are written, untouched, to a quarantine
+# CSV with the reason codes they failed on; everything that reaches a snapshot
+# is clean and typed, so the dashboards never coerce counts or drop junk keys.
+
+REASONS = ('bad_date', 'bad_state', 'bad_district', 'bad_pincode', 'bad_count')
+
+PINCODE_RANGE = (100000, 999999)
+
+
+def _bad_names(values):
+    # Evaluated once per distinct spelling: blank or without a single letter ('100000')
+    values = values.astype('category') if not isinstance(values.dtype, pd.CategoricalDtype) else values
+    categories = values.cat.categories.astype(str)
+    bad = ~categories.str.strip().str.contains('[A-Za-z]', regex=True)
+    codes = values.cat.codes.to_numpy()
+    return np.where(codes >= 0, np.asarray(bad)[codes], True)
+
+
+def _bad_whole_numbers(values, low, high):
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        return ~((numbers >= low) & (numbers <= high) & (numbers == np.floor(numbers)))
+
+
+def check_frame(df, family):
+    """
+    Boolean frame with one column per reason code, True where a row fails it.
+    """
+    checks = {}
+    if 'date' in df.columns:
+        dates = df['date'] if pd.api.types.is_datetime64_any_dtype(df['date']) else parse_dates(df['date'], DATE_FORMAT)
+        days = ((dates - DAY_EPOCH) // pd.Timedelta(days=1)).to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            checks['bad_date'] = ~((days > MISSING_DAY) & (days <= np.iinfo(np.int16).max))
+    for field in ('state', 'district'):
+        if field in df.columns:
+            checks[f"bad_{field}"] = _bad_names(df[field])
+    if 'pincode' in df.columns:
+        checks['bad_pincode'] = _bad_whole_numbers(df['pincode'], *PINCODE_RANGE)
+    counts = [c for c in get_schema(family).counts if c in df.columns]
+    if counts:
+        limit = np.iinfo(np.uint32).max
+        checks['bad_count'] = np.logical_or.reduce([_bad_whole_numbers(df[c], 0, limit) for c in counts])
+    return pd.DataFrame({r: checks[r] for r in REASONS if r in checks}, index=df.index)
+
+
+def validate_frame(df, family):
+    """
+    Splits a raw parsed chunk into (clean typed frame, rejected rows).
+    Rejected rows keep their raw values plus a `reason` column listing every
+    failed check ('bad_pincode|bad_count').
+    """
+    df.columns = df.columns.str.strip()
+    checks = check_frame(df, family)
+    bad = checks.to_numpy().any(axis=1)
+    if not bad.any():
+        return coerce_frame(df, family), df.iloc[:0].assign(reason=pd.Series(dtype=str))
+
+    failed = checks[bad]
+    reason = pd.Series('', index=failed.index)
+    for code in failed.columns:
+        reason = reason.where(~failed[code], reason + '|' + code)
+    rejected = df[bad].astype(object).assign(reason=reason.str.lstrip('|'))
+    clean = df[~bad].reset_index(drop=True)
+    for col in clean.columns:
+        # Rejected spellings must not reach the global dictionaries
+        if isinstance(clean[col].dtype, pd.CategoricalDtype):
+            clean[col] = clean[col].cat.remove_unused_categories()
+    return coerce_frame(clean, family), rejected
+
+
+def quarantine_counts(directory=None):
+    """
+    Rows quarantined per family, summed over the ingested shards.
+    """
+    entries = load_manifest(directory).values()
+    return {family: sum(e.get('stats', {}).get('rejected', 0) for e in entries if e['family'] == family) for family in FAMILIES}
+
+
+def quarantine_path(snapshot, family, directory=None):
+    folder = os.path.join(cache_dir(directory), 'quarantine', family)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{os.path.splitext(os.path.basename(snapshot))[0]}.csv")
+
+
+def write_quarantine(snapshot, family, stem, rejected, directory=None):
+    """
+    Writes the rejected rows of one shard next to the other quarantine files
+    (only when there are any) and removes the files of older snapshots.
+    """
+    target = quarantine_path(snapshot, family, directory)
+    if rejected:
+        tmp = f"{target}.{os.getpid()}.tmp"
+        pd.concat(rejected, ignore_index=True).to_csv(tmp, index=False, lineterminator='\n')
+        os.replace(tmp, target)
+    for stale in glob.glob(os.path.join(os.path.dirname(target), f"{stem}-*.csv")):
+        if stale != target:
+            os.remove(stale)
+    return target if rejected else None
@@ -0,0 +1,97 @@
+import os
+
+import pandas as pd
+
+from .calendar import MISSING_DAY, to_day_key
+from .manifest import load_manifest
+from .schema import normalize_categories, normalize_name
+from .store import file_digest
+
+# --- Zone Maps ---
+# While a snapshot is written, every row group records its date span and the
+# (normalised) states it contains. Filtered loads consult these before opening
+# a file, so a shard or row group that cannot match the date window or the
+# state selection is never read.
+
+
+def chunk_zone(df):
+    """
+    Zone map entry (date span and state set) for one row group.
+    """
+    zone = {'date_min': None, 'date_max': None, 'states': []}
+    if 'date' in df.columns and df['date'].notna().any():
+        zone['date_min'] = df['date'].min().strftime('%Y-%m-%d')
+        zone['date_max'] = df['date'].max().strftime('%Y-%m-%d')
+    if 'state' in df.columns:
+        zone['states'] = sorted(normalize_categories(df['state']).dropna().unique().tolist())
+    return zone
+
+
+def date_bounds(date_range):
+    start, end = date_range if date_range else (None, None)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    return start, end
+
+
+def zone_matches(zone, date_range=None, states=None):
+    start, end = date_bounds(date_range)
+    if date_range is not None:
+        if zone['date_min'] is None:
+            return False
+        if start is not None and pd.Timestamp(zone['date_max']) < start:
+            return False
+        if end is not None and pd.Timestamp(zone['date_min']) > end:
+            return False
+    if states is not None:
+        wanted = {normalize_name(s) for s in states}
+        if wanted.isdisjoint(zone['states']):
+            return False
+    return True
+
+
+def shard_zones(shard, directory=None):
+    """
+    Row-group zone maps of a shard, or None when the manifest has no current entry.
+    """
+    entry = load_manifest(directory).get(os.path.basename(shard.path))
+    if not entry or entry.get('digest') != file_digest(shard.path, directory):
+        return None
+    return entry.get('zones')
+
+
+def select_row_groups(shard, date_range=None, states=None, directory=None):
+    """
+    Indices of the row groups that may hold matching rows (None means "read all").
+    """
+    zones = shard_zones(shard, directory)
+    if zones is None:
+        return None
+    return [i for i, zone in enumerate(zones) if zone_matches(zone, date_range, states)]
+
+
+def filter_frame(df, date_range=None, states=None):
+    """
+    Row-level filter applied after zone-map pruning. Date bounds are inclusive
+    and states are compared in normalised form. Dates are compared on the int16
+    `day` key when the frame has one, so no timestamp column is built for it.
+    """
+    mask = pd.Series(True, index=df.index)
+    start, end = date_bounds(date_range)
+    if 'day' in df.columns:
+        if date_range is not None:
+            mask &= df['day'] != MISSING_DAY
+        if start is not None:
+            mask &= df['day'] >= to_day_key([start])[0]
+        if end is not None:
+            mask &= df['day'] <= to_day_key([end])[0]
+    else:
+        if start is not None:
+            mask &= df['date'] >= start
+        if end is not None:
+            mask &= df['date'] <= end
+    if states is not None:
+        wanted = {normalize_name(s) for s in states}
+        mask &= normalize_categories(df['state']).isin(wanted)
+    return df[mask]
+
@@ -7,6 +7,7 @@ import os
 import numpy as np
 import glob
 from datetime import timedelta
+from aadhar_data import attach_calendar, group_sums, load_family, tail_interval, tail_rows, tail_version, watch_tail
 
 # Try importing Groq, handle if missing
 try:
@@ -220,53 +221,36 @@ def get_groq_client():
 client = get_groq_client()
 
 # --- 4. DATA LOADING & PREPROCESSING ---
-@st.cache_data
-def load_and_process_data():
-    files = [
-        "api_data_aadhar_enrolment_0_500000.csv",
-        "api_data_aadhar_enrolment_500000_1000000.csv",
-        "api_data_aadhar_enrolment_1000000_1006029.csv"
-    ]
-    
-    dfs = []
-    for f in files:
-        try:
-            df = pd.read_csv(f)
-            dfs.append(df)
-        except FileNotFoundError:
-            return None
-
-    if not dfs:
+# cache_resource hands every session the same frame instead of a pickled copy; its
+# count columns are read-only views onto the shared memory-mapped fact table.
+# In live tail mode (AADHAR_TAIL_SECONDS) `version` moves on whenever rows are
+# appended to the shards, and the rows come from the in-memory tail instead
+ENROLMENT_COLUMNS = ['day', 'state', 'district', 'age_0_5', 'age_5_17', 'age_18_greater']
+
+@st.cache_resource(max_entries=1)
+def load_and_process_data(version=None):
+    df = load_family('enrolment', ENROLMENT_COLUMNS) if version is None else tail_rows('enrolment', ENROLMENT_COLUMNS)
+    if df.empty:
         return None
-        
-    df = pd.concat(dfs, ignore_index=True)
     
-    # Robust Date Parsing
-    df['date'] = pd.to_datetime(df['date'], format='%d-%m-%Y', errors='coerce')
+    # Dates and calendar features come from the shared calendar (one lookup per distinct day)
+    df = attach_calendar(df, {'date': 'date', 'era': 'Era', 'day_of_week': 'DayOfWeek'})
     
     # Key Metrics
     df['total_enrolment'] = df['age_0_5'] + df['age_5_17'] + df['age_18_greater']
     
-    # Standardization
-    state_mapping = {
-        'Westbengal': 'West Bengal', 'West  Bengal': 'West Bengal', 
-        'West Bangal': 'West Bengal', 'Andhra Pradesh': 'Andhra Pradesh',
-        'andhra pradesh': 'Andhra Pradesh', 'Odisha': 'Odisha',
-        'ODISHA': 'Odisha', 'Orissa': 'Odisha', 'Pondicherry': 'Puducherry'
-    }
-    df['state'] = df['state'].str.strip().str.title().replace(state_mapping)
-    df = df[df['state'] != '100000']
-    
-    # Feature Engineering (The Core Insight)
-    df['Era'] = df['date'].apply(lambda x: 'Real-Time Era (Sept+)' if (x.year == 2025 and x.month >= 9) else 'Batch Era (Pre-Aug)')
-    df['DayOfWeek'] = df['date'].dt.day_name()
+    # Standardization: spelling variants (Westbengal, Orissa, ...) are folded at ingest
+    # through the shared alias table (aadhar_aliases.csv), and junk keys such as
+    # state '100000' are quarantined there by the validation stage
     
     # Create Indices for Analysis
     df['Youth_Index'] = ((df['age_0_5'] + df['age_5_17']) / df['total_enrolment']) * 100
     
     return df
 
-df = load_and_process_data()
+data_version = tail_version('enrolment') if tail_interval() else None
+df = load_and_process_data(data_version)
+watch_tail(data_version, ['enrolment'])
 
 # --- 5. PREDICTIVE & STATISTICAL FUNCTIONS ---
 def calculate_trend_forecast(df_trend):
@@ -313,7 +297,7 @@ def prepare_data_context(df_filtered, era_selection, state_selection, growth_pct
     
     total_vol = df_filtered['total_enrolment'].sum()
     row_count = len(df_filtered)
-    top_districts = df_filtered.groupby('district')['total_enrolment'].sum().nlargest(3).to_dict()
+    top_districts = group_sums(df_filtered, ['district'], ['total_enrolment']).set_index('district')['total_enrolment'].nlargest(3).to_dict()
     
     meghalaya_stats = "N/A"
     if 'Meghalaya' in df_filtered['state'].unique():
@@ -388,9 +372,9 @@ if df is not None:
 
     # --- KPI SECTION ---
     july_vol = df[df['date'].dt.month == 7]['total_enrolment'].sum() / 30
-    sept_vol = df[df['date'].dt.month == 9].groupby('date')['total_enrolment'].sum().mean()
+    sept_vol = group_sums(df[df['date'].dt.month == 9], ['date'], ['total_enrolment'])['total_enrolment'].mean()
     growth = ((sept_vol - july_vol) / july_vol) * 100
-    top_state_growth = df_filtered.groupby('state')['total_enrolment'].sum().idxmax()
+    top_state_growth = group_sums(df_filtered, ['state'], ['total_enrolment']).set_index('state')['total_enrolment'].idxmax()
 
     col_kpi1, col_kpi2, col_kpi3 = st.columns(3)
     
@@ -470,7 +454,7 @@ if df is not None:
         **Interpretation:** This allows you to trace the contribution flow. For example, you can see if a State's high volume is driven by one massive district or spread evenly. You can also see if specific districts have disproportionate Age 0-5 enrolments (Education Hubs).
         """)
         df_melted = df_filtered.melt(id_vars=['state', 'district'], value_vars=['age_0_5', 'age_5_17', 'age_18_greater'], var_name='Age_Group', value_name='Count')
-        sunburst_data = df_melted.groupby(['state', 'district', 'Age_Group'])['Count'].sum().reset_index()
+        sunburst_data = group_sums(df_melted, ['state', 'district', 'Age_Group'], ['Count'])
         sunburst_data = sunburst_data[sunburst_data['Count'] > 0]
         fig_sun = px.sunburst(sunburst_data, path=['state', 'district', 'Age_Group'], values='Count', color='Count', color_continuous_scale='Viridis')
         fig_sun.update_layout(height=600, template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)')
@@ -488,7 +472,7 @@ if df is not None:
         """)
         rt_df = df[df['Era'] == 'Real-Time Era (Sept+)']
         if not rt_df.empty:
-            district_growth = rt_df.groupby(['state', 'district'])['total_enrolment'].sum().reset_index().sort_values('total_enrolment', ascending=False).head(10)
+            district_growth = group_sums(rt_df, ['state', 'district'], ['total_enrolment']).sort_values('total_enrolment', ascending=False).head(10)
             fig_bar = px.bar(district_growth, x='total_enrolment', y='district', color='state', orientation='h', text='total_enrolment')
             fig_bar.update_layout(yaxis={'categoryorder':'total ascending'}, template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)')
             st.plotly_chart(fig_bar, use_container_width=True)
@@ -509,7 +493,7 @@ if df is not None:
         - **Horizontal Stripes:** Indicate a specific State is busy across ALL days.
         - **Isolated Hotspots:** Indicate a specific State having a specific busy day (e.g., Kerala on Sundays).
         """)
-        heatmap_data = df_filtered.groupby(['state', 'DayOfWeek'])['total_enrolment'].sum().reset_index()
+        heatmap_data = group_sums(df_filtered, ['state', 'DayOfWeek'], ['total_enrolment'])
         days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         fig_heat = px.density_heatmap(heatmap_data, x='DayOfWeek', y='state', z='total_enrolment', category_orders={'DayOfWeek': days_order}, color_continuous_scale='Hot')
         fig_heat.update_layout(template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', height=600)
@@ -525,7 +509,7 @@ if df is not None:
         
         **Interpretation:** This uses Bivariate analysis to identify anomalies. The baseline for most states is <5% (mostly children being enrolled). Meghalaya's bar extends to ~32%, identifying it as a statistical outlier (3-sigma event). This warrants a specific policy intervention different from the standard protocol.
         """)
-        state_stats = df.groupby('state')[['age_0_5', 'age_5_17', 'age_18_greater', 'total_enrolment']].sum()
+        state_stats = group_sums(df, ['state'], ['age_0_5', 'age_5_17', 'age_18_greater', 'total_enrolment']).set_index('state')
         state_stats['pct_18_plus'] = (state_stats['age_18_greater'] / state_stats['total_enrolment']) * 100
         state_stats = state_stats.sort_values('pct_18_plus', ascending=False).head(10).reset_index()
         colors = ['#ff4b4b' if x == 'Meghalaya' else '#2c5364' for x in state_stats['state']]
@@ -547,7 +531,7 @@ if df is not None:
         """)
         
         # Aggregate data by district for the histogram
-        dist_agg = df_filtered.groupby('district')['total_enrolment'].sum().reset_index()
+        dist_agg = group_sums(df_filtered, ['district'], ['total_enrolment'])
         
         fig_hist = px.histogram(
             dist_agg, 
@@ -5,6 +5,7 @@ import plotly.graph_objects as go
 import glob
 import os
 import numpy as np
+from aadhar_data import CUBE_MEASURES, attach_calendar, compact_frame, cube_query, disk_cache, expand_frame, family_bounds, group_means, group_sums, state_district_pairs
 
 # Set page configuration
 st.set_page_config(
@@ -125,116 +126,62 @@ st.markdown("""
 
 # --- Data Loading Functions ---
 
+FAMILIES = ['enrolment', 'demographic', 'biometric']
+
+@st.cache_data
+def load_filter_options():
+    """
+    Date span and state/district lists for the filter bar, answered from the
+    shard zone maps and persisted district totals without loading the rows.
+    """
+    bounds = [family_bounds(f) for f in FAMILIES]
+    dates = [b[k] for b in bounds for k in ('date_min', 'date_max') if b[k] is not None]
+    return {
+        'min_date': min(dates) if dates else None,
+        'max_date': max(dates) if dates else None,
+        'districts': state_district_pairs(FAMILIES),
+    }
+
 @st.cache_data
-def load_and_process_data():
+@disk_cache
+def load_and_process_data(date_range=None, states=None):
     """
     Loads all data files (including newly uploaded ones), standardizes columns, 
     and merges them into a master dataframe aggregated by Date, State, and District.
+    Totals are read from the shared aggregate cube for the selected dates/states.
     """
-    # Comprehensive File lists including all provided data segments
-    enrolment_files = [
-        "api_data_aadhar_enrolment_0_500000.csv",
-        "api_data_aadhar_enrolment_500000_1000000.csv",
-        "api_data_aadhar_enrolment_1000000_1006029.csv"
-    ]
-    demo_files = [
-        "api_data_aadhar_demographic_0_500000.csv",
-        "api_data_aadhar_demographic_500000_1000000.csv",
-        "api_data_aadhar_demographic_1000000_1500000.csv",
-        "api_data_aadhar_demographic_1500000_2000000.csv",
-        "api_data_aadhar_demographic_2000000_2071700.csv"
-    ]
-    bio_files = [
-        "api_data_aadhar_biometric_0_500000.csv",
-        "api_data_aadhar_biometric_500000_1000000.csv",
-        "api_data_aadhar_biometric_1000000_1500000.csv",
-        "api_data_aadhar_biometric_1500000_1861108.csv"
-    ]
-
-    # Helper to read and concat multiple CSVs for a category
-    def read_files(file_list, type_tag):
-        df_list = []
-        for f in file_list:
-            if os.path.exists(f):
-                try:
-                    # Low memory set to False to handle large mixed data chunks safely
-                    df_chunk = pd.read_csv(f, low_memory=False)
-                    df_list.append(df_chunk)
-                except Exception as e:
-                    st.error(f"Error reading {f}: {e}")
-        
-        if not df_list:
-            return pd.DataFrame()
-        
-        full_df = pd.concat(df_list, ignore_index=True)
-        return full_df
-
-    # 1. Process Enrolment Data
-    df_enrol = read_files(enrolment_files, "Enrolment")
-    if not df_enrol.empty:
-        df_enrol.columns = df_enrol.columns.str.strip()
-        cols = ['age_0_5', 'age_5_17', 'age_18_greater']
-        for c in cols:
-            if c in df_enrol.columns:
-                df_enrol[c] = pd.to_numeric(df_enrol[c], errors='coerce').fillna(0)
-        df_enrol['New_Enrolments'] = df_enrol['age_0_5'] + df_enrol['age_5_17'] + df_enrol['age_18_greater']
-        df_enrol_agg = df_enrol.groupby(['date', 'state', 'district'])[['New_Enrolments', 'age_0_5', 'age_5_17', 'age_18_greater']].sum().reset_index()
-    else:
-        df_enrol_agg = pd.DataFrame(columns=['date', 'state', 'district', 'New_Enrolments'])
-
-    # 2. Process Demographic Update Data
-    df_demo = read_files(demo_files, "Demographic")
-    if not df_demo.empty:
-        df_demo.columns = df_demo.columns.str.strip()
-        cols = ['demo_age_5_17', 'demo_age_17_'] 
-        for c in cols:
-            if c in df_demo.columns:
-                df_demo[c] = pd.to_numeric(df_demo[c], errors='coerce').fillna(0)
-        df_demo['Demographic_Updates'] = df_demo['demo_age_5_17'] + df_demo['demo_age_17_']
-        df_demo_agg = df_demo.groupby(['date', 'state', 'district'])[['Demographic_Updates', 'demo_age_5_17', 'demo_age_17_']].sum().reset_index()
-    else:
-        df_demo_agg = pd.DataFrame(columns=['date', 'state', 'district', 'Demographic_Updates'])
-
-    # 3. Process Biometric Update Data
-    df_bio = read_files(bio_files, "Biometric")
-    if not df_bio.empty:
-        df_bio.columns = df_bio.columns.str.strip()
-        cols = ['bio_age_5_17', 'bio_age_17_']
-        for c in cols:
-             if c in df_bio.columns:
-                df_bio[c] = pd.to_numeric(df_bio[c], errors='coerce').fillna(0)
-        df_bio['Biometric_Updates'] = df_bio['bio_age_5_17'] + df_bio['bio_age_17_']
-        df_bio_agg = df_bio.groupby(['date', 'state', 'district'])[['Biometric_Updates', 'bio_age_5_17', 'bio_age_17_']].sum().reset_index()
-    else:
-        df_bio_agg = pd.DataFrame(columns=['date', 'state', 'district', 'Biometric_Updates'])
-
-    # 4. Merge All Data (Outer join ensures no date/state/district data is lost)
-    df_master = pd.merge(df_enrol_agg, df_demo_agg, on=['date', 'state', 'district'], how='outer').fillna(0)
-    df_master = pd.merge(df_master, df_bio_agg, on=['date', 'state', 'district'], how='outer').fillna(0)
+    # 1-4. The three families come pre-joined from the shared cube (every measure at
+    # day/state/district/pincode grain), summed per date, state and district for the
+    # selected window. No row is rescanned; missing counts are 0 and stay integers
+    raw_names = {cube: raw for names in CUBE_MEASURES.values() for raw, cube in names.items()}
+    df_master = cube_query(['day', 'state', 'district'], date_range=date_range, states=states).rename(columns=raw_names)
+    df_master = df_master[['day', 'state', 'district']].assign(
+        New_Enrolments=df_master['age_0_5'] + df_master['age_5_17'] + df_master['age_18_greater'],
+        age_0_5=df_master['age_0_5'], age_5_17=df_master['age_5_17'], age_18_greater=df_master['age_18_greater'],
+        Demographic_Updates=df_master['demo_age_5_17'] + df_master['demo_age_17_'],
+        demo_age_5_17=df_master['demo_age_5_17'], demo_age_17_=df_master['demo_age_17_'],
+        Biometric_Updates=df_master['bio_age_5_17'] + df_master['bio_age_17_'],
+        bio_age_5_17=df_master['bio_age_5_17'], bio_age_17_=df_master['bio_age_17_'],
+    )
 
     # 5. Final Formatting & Feature Engineering
-    df_master['date'] = pd.to_datetime(df_master['date'], dayfirst=True, errors='coerce')
     df_master['Total_Updates'] = df_master['Demographic_Updates'] + df_master['Biometric_Updates']
-    df_master = df_master.dropna(subset=['date'])
-    df_master['state'] = df_master['state'].str.title().str.strip()
-    df_master['district'] = df_master['district'].str.title().str.strip()
     
-    # Seasonality features
-    df_master['day_of_week'] = df_master['date'].dt.day_name()
-    df_master['month'] = df_master['date'].dt.month_name()
-    df_master['month_num'] = df_master['date'].dt.month
-    df_master['year'] = df_master['date'].dt.year
+    # Date + seasonality features, looked up once per distinct day
+    df_master = attach_calendar(df_master, ['date', 'day_of_week', 'month', 'month_num', 'year']).drop(columns='day')
+    df_master.insert(0, 'date', df_master.pop('date'))
 
-    return df_master
+    # Cached as a compact fact table (narrow counts, sparse enrolment columns, day keys)
+    return compact_frame(df_master)
 
-# Execute Data Load
+# Filter options come from the zone maps; the rows are loaded once the filters are known
 try:
-    df = load_and_process_data()
+    filter_options = load_filter_options()
 except Exception as e:
     st.error(f"Critical Error Loading Consolidated Data: {e}")
     st.stop()
 
-if df.empty:
+if filter_options['min_date'] is None:
     st.warning("No data found. Please ensure all CSV files are uploaded and named correctly.")
     st.stop()
 
@@ -258,8 +205,8 @@ with st.container():
     col_nav1, col_nav2, col_nav3 = st.columns([1.2, 1, 1])
     
     with col_nav1:
-        min_date = df['date'].min()
-        max_date = df['date'].max()
+        min_date = filter_options['min_date']
+        max_date = filter_options['max_date']
         if not pd.isnull(min_date) and not pd.isnull(max_date):
             selected_range = st.date_input(
                 "Select Date Range",
@@ -276,16 +223,24 @@ with st.container():
 
     with col_nav2:
         # User selection for analysis granularity
-        all_states = sorted(df['state'].unique())
+        district_pairs = filter_options['districts']
+        all_states = sorted(district_pairs['state'].unique())
         selected_states = st.multiselect("Select State(s)", all_states, default=[])
 
     with col_nav3:
         if selected_states:
-            filtered_districts_list = sorted(df[df['state'].isin(selected_states)]['district'].unique())
+            filtered_districts_list = sorted(district_pairs[district_pairs['state'].isin(selected_states)]['district'].unique())
         else:
-            filtered_districts_list = sorted(df['district'].unique())
+            filtered_districts_list = sorted(district_pairs['district'].unique())
         selected_districts = st.multiselect("Select District(s)", filtered_districts_list)
 
+# --- Load Data for the Selected Window ---
+try:
+    df = expand_frame(load_and_process_data((start_date, end_date), tuple(selected_states) or None))
+except Exception as e:
+    st.error(f"Critical Error Loading Consolidated Data: {e}")
+    st.stop()
+
 # --- Apply Filter Mask ---
 mask = (df['date'] >= pd.to_datetime(start_date)) & (df['date'] <= pd.to_datetime(end_date))
 if selected_states:
@@ -366,7 +321,8 @@ with col_growth_1:
 
 with col_growth_2:
     st.subheader("📈 Cumulative Growth Comparison")
-    daily_growth = filtered_df.groupby('date')[['New_Enrolments', 'Total_Updates']].sum().cumsum().reset_index()
+    daily_growth = group_sums(filtered_df, ['date'], ['New_Enrolments', 'Total_Updates'])
+    daily_growth[['New_Enrolments', 'Total_Updates']] = daily_growth[['New_Enrolments', 'Total_Updates']].cumsum()
     fig_cum = go.Figure()
     fig_cum.add_trace(go.Scatter(x=daily_growth['date'], y=daily_growth['New_Enrolments'], name='New Enrolments', fill='tozeroy', line_color="#00ff88"))
     fig_cum.add_trace(go.Scatter(x=daily_growth['date'], y=daily_growth['Total_Updates'], name='Total Updates', fill='tonexty', line_color="#00d2ff"))
@@ -396,7 +352,7 @@ col_seasonal_1, col_seasonal_2 = st.columns(2)
 with col_seasonal_1:
     st.subheader("🗓️ Weekly Operational Peaks")
     day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    heatmap_data = filtered_df.groupby('day_of_week')[['Total_Updates']].mean().reindex(day_order).reset_index()
+    heatmap_data = group_means(filtered_df, ['day_of_week'], ['Total_Updates']).set_index('day_of_week').reindex(day_order).reset_index()
     fig_heat = px.bar(heatmap_data, x='day_of_week', y='Total_Updates', color='Total_Updates',
                      color_continuous_scale='Blues', labels={'Total_Updates': 'Avg Daily Load'})
     fig_heat.update_layout(
@@ -416,7 +372,7 @@ with col_seasonal_1:
 with col_seasonal_2:
     st.subheader("📅 Monthly Load Cycles")
     month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-    monthly_data = filtered_df.groupby(['month', 'month_num'])[['Total_Updates', 'New_Enrolments']].mean().sort_values('month_num').reset_index()
+    monthly_data = group_means(filtered_df, ['month', 'month_num'], ['Total_Updates', 'New_Enrolments']).sort_values('month_num', ignore_index=True)
     fig_month = go.Figure()
     fig_month.add_trace(go.Bar(x=monthly_data['month'], y=monthly_data['Total_Updates'], name='Avg Updates', marker_color='#00d2ff'))
     fig_month.add_trace(go.Bar(x=monthly_data['month'], y=monthly_data['New_Enrolments'], name='Avg Enrolments', marker_color='#00ff88'))
@@ -441,7 +397,7 @@ col_scatter, col_geo_list = st.columns([1.5, 1])
 
 with col_scatter:
     # Analyzing the relationship between Demo and Bio updates at a granular level
-    geo_scatter = filtered_df.groupby('state' if not selected_districts else 'district')[['Demographic_Updates', 'Biometric_Updates', 'New_Enrolments']].sum().reset_index()
+    geo_scatter = group_sums(filtered_df, ['state' if not selected_districts else 'district'], ['Demographic_Updates', 'Biometric_Updates', 'New_Enrolments'])
     geo_scatter['Size'] = geo_scatter['New_Enrolments'].apply(lambda x: np.log(x + 1) * 5) # Scale for bubble
     
     fig_scatter = px.scatter(
@@ -471,7 +427,7 @@ with col_scatter:
 
 with col_geo_list:
     st.markdown("#### 🏆 Performance Benchmarking")
-    geo_group = filtered_df.groupby('state' if not selected_districts else 'district')[['New_Enrolments', 'Total_Updates']].sum().reset_index()
+    geo_group = group_sums(filtered_df, ['state' if not selected_districts else 'district'], ['New_Enrolments', 'Total_Updates'])
     geo_group['Update_Ratio'] = geo_group['Total_Updates'] / geo_group['New_Enrolments'].replace(0, 1)
     
     # Sort and highlight
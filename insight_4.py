@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import gc  # Imported for Garbage Collection to manage memory resources
+from aadhar_data import CUBE_KEYS, attach_calendar, compact_frame, cube_query, disk_cache, expand_frame, family_bounds, frame_mb, group_sums, join_out_of_core, out_of_core_enabled, state_district_pairs, table_mb, track_peak
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -103,166 +103,80 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Data Loading Function ---
-# Added TTL (Time To Live) to clear cache periodically to free memory
+FAMILIES = ['enrolment', 'demographic', 'biometric']
+
 @st.cache_data(ttl="2h", show_spinner=True)
-def load_and_process_data():
+def load_filter_options():
     """
-    Loads, merges, and optimizes data for memory usage.
-    Uses garbage collection and type casting to minimize RAM footprint.
+    Date span and state/district lists for the navbar, answered from the shard
+    zone maps and persisted district totals without loading the rows.
     """
-    
-    # 1. Load Biometric Data (Adding new files to the list)
-    bio_files = [
-        "api_data_aadhar_biometric_0_500000.csv",
-        "api_data_aadhar_biometric_500000_1000000.csv",
-        "api_data_aadhar_biometric_1000000_1500000.csv",
-        "api_data_aadhar_biometric_1500000_1861108.csv"
-    ]
-    df_bio_list = []
-    for f in bio_files:
-        try:
-            # Load only necessary columns if files are huge, otherwise load all
-            temp_df = pd.read_csv(f)
-            df_bio_list.append(temp_df)
-        except FileNotFoundError:
-            continue
-    
-    if df_bio_list:
-        df_bio = pd.concat(df_bio_list, ignore_index=True)
-        # Explicitly delete list to free memory
-        del df_bio_list
-        gc.collect()
-        
-        # Rename columns to standardized format
-        df_bio.rename(columns={
-            'bio_age_5_17': 'Biometric_5_17',
-            'bio_age_17_': 'Biometric_18_plus'
-        }, inplace=True)
-    else:
-        df_bio = pd.DataFrame(columns=['date', 'state', 'district', 'pincode', 'Biometric_5_17', 'Biometric_18_plus'])
-
-    # 2. Load Demographic Data (Adding new files to the list)
-    demo_files = [
-        "api_data_aadhar_demographic_1000000_1500000.csv",
-        "api_data_aadhar_demographic_1500000_2000000.csv",
-        "api_data_aadhar_demographic_500000_1000000.csv",
-        "api_data_aadhar_demographic_2000000_2071700.csv",
-        "api_data_aadhar_demographic_0_500000.csv"
-    ]
-    df_demo_list = []
-    for f in demo_files:
-        try:
-            temp_df = pd.read_csv(f)
-            df_demo_list.append(temp_df)
-        except FileNotFoundError:
-            continue
-            
-    if df_demo_list:
-        df_demo = pd.concat(df_demo_list, ignore_index=True)
-        # Explicitly delete list to free memory
-        del df_demo_list
-        gc.collect()
-        
-        df_demo.rename(columns={
-            'demo_age_5_17': 'Demographic_5_17',
-            'demo_age_17_': 'Demographic_18_plus'
-        }, inplace=True)
-    else:
-        df_demo = pd.DataFrame(columns=['date', 'state', 'district', 'pincode', 'Demographic_5_17', 'Demographic_18_plus'])
-
-    # 3. Load Enrolment Data (New Section)
-    enrol_files = [
-        "api_data_aadhar_enrolment_1000000_1006029.csv"
-    ]
-    df_enrol_list = []
-    for f in enrol_files:
-        try:
-            temp_df = pd.read_csv(f)
-            df_enrol_list.append(temp_df)
-        except FileNotFoundError:
-            continue
-    
-    if df_enrol_list:
-        df_enrol = pd.concat(df_enrol_list, ignore_index=True)
-        # Explicitly delete list to free memory
-        del df_enrol_list
-        gc.collect()
-
-        df_enrol.rename(columns={
-            'age_0_5': 'Enrolment_0_5',
-            'age_5_17': 'Enrolment_5_17',
-            'age_18_greater': 'Enrolment_18_plus'
-        }, inplace=True)
-    else:
-        df_enrol = pd.DataFrame(columns=['date', 'state', 'district', 'pincode', 'Enrolment_0_5', 'Enrolment_5_17', 'Enrolment_18_plus'])
-
-    # 4. Merge Datasets
-    # We group by common columns first to handle duplicates if any
-    group_cols = ['date', 'state', 'district', 'pincode']
-    
-    # Pre-aggregating reduces the size of dataframes before merging, saving memory
-    df_bio_grouped = df_bio.groupby(group_cols, as_index=False).sum()
-    df_demo_grouped = df_demo.groupby(group_cols, as_index=False).sum()
-    df_enrol_grouped = df_enrol.groupby(group_cols, as_index=False).sum()
-    
-    # Free up original heavy dataframes
-    del df_bio, df_demo, df_enrol
-    gc.collect()
-
-    # Outer join to keep all records: Start with Demo and Bio
-    df_merged = pd.merge(df_demo_grouped, df_bio_grouped, on=group_cols, how='outer').fillna(0)
-    
-    # Free intermediate grouped frames
-    del df_demo_grouped, df_bio_grouped
-    gc.collect()
-    
-    # Merge Enrolment Data
-    df_merged = pd.merge(df_merged, df_enrol_grouped, on=group_cols, how='outer').fillna(0)
-    
-    del df_enrol_grouped
-    gc.collect()
+    bounds = [family_bounds(f) for f in FAMILIES]
+    dates = [b[k] for b in bounds for k in ('date_min', 'date_max') if b[k] is not None]
+    return {
+        'min_date': min(dates) if dates else None,
+        'max_date': max(dates) if dates else None,
+        'districts': state_district_pairs(FAMILIES),
+    }
 
-    # Convert Date
-    df_merged['date'] = pd.to_datetime(df_merged['date'], dayfirst=True, errors='coerce')
-    
-    # Calculate Totals
-    df_merged['Total_Demographic_Updates'] = df_merged['Demographic_5_17'] + df_merged['Demographic_18_plus']
-    df_merged['Total_Biometric_Updates'] = df_merged['Biometric_5_17'] + df_merged['Biometric_18_plus']
-    df_merged['Total_Enrolments'] = df_merged['Enrolment_0_5'] + df_merged['Enrolment_5_17'] + df_merged['Enrolment_18_plus']
-    
-    # --- MEMORY OPTIMIZATION STEP ---
-    # Convert object columns to categories (Drastically reduces memory for repeated strings like state names)
-    # And downcast numeric types to float32/int32
-    
-    # 1. Optimize Strings
-    for col in ['state', 'district']:
-        if col in df_merged.columns:
-            # Clean strings
-            df_merged[col] = df_merged[col].astype(str).str.title().str.strip()
-            # Convert to category
-            df_merged[col] = df_merged[col].astype('category')
-            
-    # 2. Optimize Numbers
-    # Identify float columns and downcast to float32
-    float_cols = df_merged.select_dtypes(include=['float64']).columns
-    for col in float_cols:
-        df_merged[col] = df_merged[col].astype('float32')
-        
-    # Identify int columns (if any remained as int64) and downcast
-    int_cols = df_merged.select_dtypes(include=['int64']).columns
-    for col in int_cols:
-        df_merged[col] = df_merged[col].astype('int32')
+# Dashboard names of the count columns of each family
+BIO_NAMES = {'bio_age_5_17': 'Biometric_5_17', 'bio_age_17_': 'Biometric_18_plus'}
+DEMO_NAMES = {'demo_age_5_17': 'Demographic_5_17', 'demo_age_17_': 'Demographic_18_plus'}
+ENROL_NAMES = {'age_0_5': 'Enrolment_0_5', 'age_5_17': 'Enrolment_5_17', 'age_18_greater': 'Enrolment_18_plus'}
 
-    return df_merged
+# Added TTL (Time To Live) to clear cache periodically to free memory
+@st.cache_data(ttl="2h", show_spinner=True)
+@disk_cache
+def load_and_process_data(date_range=None, states=None):
+    """
+    Loads and merges the three datasets with every count kept as an unsigned
+    integer from parse to output, so no float64 intermediate ever has to be
+    downcast. The rows for the selected dates/states are taken from the shared
+    aggregate cube, which is built once per ingest.
+    With AADHAR_OUT_OF_CORE set the join runs in bounded-memory passes instead.
+    Returns the merged frame as a compact fact table (see `expand_frame`) and a
+    memory report (rows, frame size, cached size, Arrow pool growth and the
+    process's peak since start; the Python heap peak only with
+    AADHAR_TRACE_MEMORY set).
+    """
+    with track_peak() as report:
+        if out_of_core_enabled():
+            # Bounded-memory passes over the state/month partitions, spilling each unit's
+            # join to disk. No view below uses pincode, so rows are joined per district,
+            # which keeps the final frame small enough for any data size.
+            df_merged = join_out_of_core([
+                ('demographic', ['day', 'state', 'district', 'demo_age_5_17', 'demo_age_17_'], DEMO_NAMES),
+                ('biometric', ['day', 'state', 'district', 'bio_age_5_17', 'bio_age_17_'], BIO_NAMES),
+                ('enrolment', ['day', 'state', 'district', 'age_0_5', 'age_5_17', 'age_18_greater'], ENROL_NAMES),
+            ], ['day', 'state', 'district'], date_range=date_range, states=states)
+        else:
+            # The shared cube already holds the three families joined at this grain
+            # (missing counts 0, every count an unsigned integer): only the rows of
+            # the selected dates/states are taken from its memory map
+            df_merged = cube_query(CUBE_KEYS, date_range=date_range, states=states)
+
+        # Attach Date (one lookup per distinct day)
+        df_merged = attach_calendar(df_merged, ['date']).drop(columns='day')
+
+        # Calculate Totals (sums of unsigned counts stay unsigned integers)
+        df_merged['Total_Demographic_Updates'] = df_merged['Demographic_5_17'] + df_merged['Demographic_18_plus']
+        df_merged['Total_Biometric_Updates'] = df_merged['Biometric_5_17'] + df_merged['Biometric_18_plus']
+        df_merged['Total_Enrolments'] = df_merged['Enrolment_0_5'] + df_merged['Enrolment_5_17'] + df_merged['Enrolment_18_plus']
+
+    report['rows'] = len(df_merged)
+    report['frame_mb'] = frame_mb(df_merged)
+    table = compact_frame(df_merged)
+    report['cached_mb'] = table_mb(table)
+    return table, report
 
 # --- Load Data ---
 try:
-    df = load_and_process_data()
+    filter_options = load_filter_options()
 except Exception as e:
     st.error(f"Error loading data. Please ensure CSV files are uploaded. Details: {e}")
     st.stop()
 
-if df.empty:
+if filter_options['min_date'] is None:
     st.warning("No data found in the CSV files.")
     st.stop()
 
@@ -274,8 +188,8 @@ st.subheader("🔍 Filters Analysis")
 nav_col1, nav_col2, nav_col3 = st.columns(3)
 
 # Date Filter
-min_date = df['date'].min()
-max_date = df['date'].max()
+min_date = filter_options['min_date']
+max_date = filter_options['max_date']
 
 with nav_col1:
     date_range = st.date_input(
@@ -286,16 +200,17 @@ with nav_col1:
     )
 
 # State Filter
-all_states = sorted(df['state'].unique())
+district_pairs = filter_options['districts']
+all_states = sorted(district_pairs['state'].unique())
 with nav_col2:
     # Removed default selection to ensure no filters are applied initially
     selected_states = st.multiselect("Select State(s)", all_states)
 
 # District Filter (Dynamic)
 if selected_states:
-    filtered_districts = sorted(df[df['state'].isin(selected_states)]['district'].unique())
+    filtered_districts = sorted(district_pairs[district_pairs['state'].isin(selected_states)]['district'].unique())
 else:
-    filtered_districts = sorted(df['district'].unique())
+    filtered_districts = sorted(district_pairs['district'].unique())
 
 with nav_col3:
     selected_districts = st.multiselect("Select District(s) (Optional)", filtered_districts)
@@ -303,6 +218,21 @@ with nav_col3:
 # Add a separator line to distinguish the "navbar" from content
 st.markdown("---")
 
+# --- Load Data for the Selected Window ---
+# Zone maps let the loader skip shards outside the selected dates/states
+try:
+    table, load_report = load_and_process_data((date_range[0], date_range[1]), tuple(selected_states) or None)
+    df = expand_frame(table)
+except Exception as e:
+    st.error(f"Error loading data. Please ensure CSV files are uploaded. Details: {e}")
+    st.stop()
+memory_notes = [f"Arrow pool {load_report['arrow_mb']:+.1f} MB over the load"]
+if 'rss_peak_mb' in load_report:
+    memory_notes.append(f"process peak since start {load_report['rss_peak_mb']:.0f} MB")
+if 'heap_peak_mb' in load_report:
+    memory_notes.append(f"Python heap peak +{load_report['heap_peak_mb']:.1f} MB while loading (excludes Arrow)")
+st.caption(f"Loaded {load_report['rows']:,} rows · {load_report['frame_mb']:.1f} MB in memory ({load_report['cached_mb']:.1f} MB cached) · " + " · ".join(memory_notes))
+
 # --- Filtering Logic ---
 mask = (df['date'] >= pd.to_datetime(date_range[0])) & (df['date'] <= pd.to_datetime(date_range[1]))
 if selected_states:
@@ -323,9 +253,8 @@ total_bio = df_filtered['Total_Biometric_Updates'].sum()
 
 # Handle empty dataframe edge cases for top state/district
 if not df_filtered.empty:
-    # Use observed=True for categorical grouping to save memory and avoid warnings
-    top_state = df_filtered.groupby('state', observed=True)['Total_Demographic_Updates'].sum().idxmax()
-    top_district = df_filtered.groupby('district', observed=True)['Total_Demographic_Updates'].sum().idxmax()
+    top_state = group_sums(df_filtered, ['state'], ['Total_Demographic_Updates']).set_index('state')['Total_Demographic_Updates'].idxmax()
+    top_district = group_sums(df_filtered, ['district'], ['Total_Demographic_Updates']).set_index('district')['Total_Demographic_Updates'].idxmax()
 else:
     top_state = "N/A"
     top_district = "N/A"
@@ -364,11 +293,7 @@ with tab1:
     """)
 
     # Prepare Data for Treemap
-    # Use observed=True for efficient categorical grouping
-    df_tree = df_filtered.groupby(['state', 'district'], observed=True).agg({
-        'Total_Demographic_Updates': 'sum',
-        'Total_Biometric_Updates': 'sum'
-    }).reset_index()
+    df_tree = group_sums(df_filtered, ['state', 'district'], ['Total_Demographic_Updates', 'Total_Biometric_Updates'])
     
     # Calculate Ratio for Color Scale (Handling division by zero)
     df_tree['Update_Ratio'] = df_tree['Total_Demographic_Updates'] / (df_tree['Total_Biometric_Updates'] + 1)
@@ -452,8 +377,7 @@ with tab2:
     # Education Demand Analysis
     with col_edu:
         st.markdown("#### 🏫 School Capacity Planning")
-        # Ensure observed=True for memory efficiency in groupby
-        df_edu = df_filtered.groupby(['state', 'district'], observed=True)['Demographic_5_17'].sum().reset_index()
+        df_edu = group_sums(df_filtered, ['state', 'district'], ['Demographic_5_17'])
         df_edu = df_edu.sort_values(by='Demographic_5_17', ascending=False).head(10)
         
         fig_edu = px.bar(
@@ -478,7 +402,7 @@ with tab2:
     # Civic Services Demand Analysis
     with col_civic:
         st.markdown("#### 🏠 Housing & Ration Card Planning")
-        df_civic = df_filtered.groupby(['state', 'district'], observed=True)['Demographic_18_plus'].sum().reset_index()
+        df_civic = group_sums(df_filtered, ['state', 'district'], ['Demographic_18_plus'])
         df_civic = df_civic.sort_values(by='Demographic_18_plus', ascending=False).head(10)
         
         fig_civic = px.bar(
@@ -506,10 +430,7 @@ with tab3:
     st.markdown("Distinguishing between **Routine Maintenance** (Linear correlation) and **Migration Events** (Outliers).")
     
     # Aggregating by District
-    df_scatter = df_filtered.groupby(['state', 'district'], observed=True).agg({
-        'Total_Demographic_Updates': 'sum',
-        'Total_Biometric_Updates': 'sum'
-    }).reset_index()
+    df_scatter = group_sums(df_filtered, ['state', 'district'], ['Total_Demographic_Updates', 'Total_Biometric_Updates'])
 
     fig_scatter = px.scatter(
         df_scatter,
@@ -559,7 +480,7 @@ with tab4:
     st.markdown("Analyzing the timeline of updates to identify seasonal patterns or event-triggered migration.")
 
     # Group by Date
-    df_time = df_filtered.groupby('date')[['Total_Demographic_Updates', 'Total_Biometric_Updates']].sum().reset_index()
+    df_time = group_sums(df_filtered, ['date'], ['Total_Demographic_Updates', 'Total_Biometric_Updates'])
 
     fig_line = px.line(
         df_time, 
@@ -594,7 +515,7 @@ with tab5:
 
     with col_age1:
         # Stacked Bar Chart for Age Groups by State
-        df_age_state = df_filtered.groupby('state', observed=True)[['Demographic_5_17', 'Demographic_18_plus']].sum().reset_index()
+        df_age_state = group_sums(df_filtered, ['state'], ['Demographic_5_17', 'Demographic_18_plus'])
         
         fig_age_stack = px.bar(
             df_age_state, 
@@ -698,7 +619,7 @@ with tab7:
 
         with col_enrol2:
             st.markdown("#### Top Districts for New Registrations")
-            df_enrol_dist = df_filtered.groupby(['state', 'district'], observed=True)['Total_Enrolments'].sum().reset_index()
+            df_enrol_dist = group_sums(df_filtered, ['state', 'district'], ['Total_Enrolments'])
             df_enrol_dist = df_enrol_dist.sort_values(by='Total_Enrolments', ascending=False).head(10)
             
             fig_enrol_bar = px.bar(
@@ -4,6 +4,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import os
+from aadhar_data import FAMILIES, disk_cache, family_totals, group_means, group_sums, tail_aggregate, tail_interval, tail_version, watch_tail
 
 # --- Page Config ---
 st.set_page_config(
@@ -97,42 +98,27 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 1. Data Loading & Caching ---
-@st.cache_data
-def load_and_prep_data():
+# (state, district) totals are read off the aggregate cube's district rollup
+# (a few thousand rows), so only the district-level aggregates are ever held
+# (and cached) in memory and no raw row is rescanned.
+# `version` is the live tail token (AADHAR_TAIL_SECONDS): rows appended to a
+# shard change it, and the totals are then taken from the in-memory tail.
+@st.cache_data(max_entries=2)
+@disk_cache
+def load_and_prep_data(version=None):
+    aggregate = family_totals if version is None else tail_aggregate
     try:
         # --- Biometric Data (All Segments) ---
-        bio_files = [
-            'api_data_aadhar_biometric_0_500000.csv',
-            'api_data_aadhar_biometric_500000_1000000.csv',
-            'api_data_aadhar_biometric_1000000_1500000.csv',
-            'api_data_aadhar_biometric_1500000_1861108.csv'
-        ]
-        # Filter for files that actually exist to prevent crash if user hasn't downloaded all
-        existing_bio = [f for f in bio_files if os.path.exists(f)]
-        if not existing_bio: st.error("No Biometric CSV files found!"); return None, None, None
-        df_bio = pd.concat([pd.read_csv(f) for f in existing_bio], ignore_index=True)
+        df_bio = aggregate('biometric', ['state', 'district'])
+        if df_bio.empty: st.error("No Biometric CSV files found!"); return None, None, None
         
         # --- Demographic Data (All Segments) ---
-        demo_files = [
-            'api_data_aadhar_demographic_0_500000.csv',
-            'api_data_aadhar_demographic_500000_1000000.csv',
-            'api_data_aadhar_demographic_1000000_1500000.csv',
-            'api_data_aadhar_demographic_1500000_2000000.csv',
-            'api_data_aadhar_demographic_2000000_2071700.csv'
-        ]
-        existing_demo = [f for f in demo_files if os.path.exists(f)]
-        if not existing_demo: st.error("No Demographic CSV files found!"); return None, None, None
-        df_demo = pd.concat([pd.read_csv(f) for f in existing_demo], ignore_index=True)
+        df_demo = aggregate('demographic', ['state', 'district'])
+        if df_demo.empty: st.error("No Demographic CSV files found!"); return None, None, None
         
         # --- Enrolment Data (All Segments) ---
-        enrol_files = [
-            'api_data_aadhar_enrolment_0_500000.csv',
-            'api_data_aadhar_enrolment_500000_1000000.csv',
-            'api_data_aadhar_enrolment_1000000_1006029.csv'
-        ]
-        existing_enrol = [f for f in enrol_files if os.path.exists(f)]
-        if not existing_enrol: st.error("No Enrolment CSV files found!"); return None, None, None
-        df_enrol = pd.concat([pd.read_csv(f) for f in existing_enrol], ignore_index=True)
+        df_enrol = aggregate('enrolment', ['state', 'district'])
+        if df_enrol.empty: st.error("No Enrolment CSV files found!"); return None, None, None
 
         return df_bio, df_demo, df_enrol
 
@@ -153,13 +139,13 @@ def process_data(df_bio, df_demo, df_enrol):
     
     # Aggregation: Group by State and District
     # We aggregate dates to get a total operational view
-    bio_agg = df_bio.groupby(['state', 'district'])[bio_val_cols].sum().reset_index()
+    bio_agg = group_sums(df_bio, ['state', 'district'], bio_val_cols)
     bio_agg['Total_Biometric_Updates'] = bio_agg[bio_val_cols].sum(axis=1)
     
-    demo_agg = df_demo.groupby(['state', 'district'])[demo_val_cols].sum().reset_index()
+    demo_agg = group_sums(df_demo, ['state', 'district'], demo_val_cols)
     demo_agg['Total_Demographic_Updates'] = demo_agg[demo_val_cols].sum(axis=1)
 
-    enrol_agg = df_enrol.groupby(['state', 'district'])[enrol_val_cols].sum().reset_index()
+    enrol_agg = group_sums(df_enrol, ['state', 'district'], enrol_val_cols)
     enrol_agg['Total_Enrolments'] = enrol_agg[enrol_val_cols].sum(axis=1)
     
     # Merge datasets
@@ -171,14 +157,12 @@ def process_data(df_bio, df_demo, df_enrol):
     # Logic: High Bio + Low Demo = High Friction (Fingerprint failures)
     df_master['Friction_Index'] = df_master['Total_Biometric_Updates'] / (df_master['Total_Demographic_Updates'] + 1)
     
-    # Clean up state/district names (capitalize)
-    df_master['state'] = df_master['state'].str.title()
-    df_master['district'] = df_master['district'].str.title()
-    
     return df_master
 
 # --- Main App Execution ---
-df_bio_raw, df_demo_raw, df_enrol_raw = load_and_prep_data()
+data_version = tail_version(*FAMILIES) if tail_interval() else None
+df_bio_raw, df_demo_raw, df_enrol_raw = load_and_prep_data(data_version)
+watch_tail(data_version, FAMILIES)
 
 if df_bio_raw is not None:
     df_analysis = process_data(df_bio_raw, df_demo_raw, df_enrol_raw)
@@ -279,7 +263,7 @@ if df_bio_raw is not None:
         **Analysis Type:** Bivariate (Categorical vs Numerical).
         **Insight:** Aggregating friction by state helps identify if the problem is **Policy/Infrastructure Level** (High State Avg) or **District Specific** (Low State Avg, High Variance).
         """)
-        state_avg = df_filtered.groupby('state')['Friction_Index'].mean().reset_index().sort_values('Friction_Index', ascending=False)
+        state_avg = group_means(df_filtered, ['state'], ['Friction_Index']).sort_values('Friction_Index', ascending=False)
         fig_state = px.bar(
             state_avg,
             x='state',
@@ -6,6 +6,7 @@ from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 import numpy as np
 import os
+from aadhar_data import FAMILIES, compact_frame, disk_cache, expand_frame, family_totals, group_means, group_reduce, group_sums, tail_aggregate, tail_interval, tail_version, watch_tail
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -97,62 +98,39 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Data Loading & Preprocessing ---
-@st.cache_data
-def load_and_process_data():
+# With AADHAR_TAIL_SECONDS set, each new `version` (rows landed in a shard)
+# rebuilds the table from the live pincode totals.
+@st.cache_data(max_entries=2)
+@disk_cache
+def load_and_process_data(version=None):
+    aggregate = family_totals if version is None else tail_aggregate
     try:
         # 1. Load Enrolment Data (New Entries)
-        # Updated with all uploaded enrolment files
-        enrol_files = [
-            'api_data_aadhar_enrolment_0_500000.csv',
-            'api_data_aadhar_enrolment_500000_1000000.csv',
-            'api_data_aadhar_enrolment_1000000_1006029.csv'
-        ]
-        
-        # Generator expression to read only existing files to prevent crashes
-        valid_enrol = [f for f in enrol_files if os.path.exists(f)]
-        if not valid_enrol:
+        df_enrol = aggregate('enrolment', ['state', 'district', 'pincode'])
+        if df_enrol.empty:
              st.error("No Enrolment files found.")
-             return pd.DataFrame()
-             
-        df_enrol = pd.concat([pd.read_csv(f) for f in valid_enrol])
+             return compact_frame(pd.DataFrame())
         
         # Calculate Total Enrolments per Pincode
         df_enrol['total_enrolments'] = (
             df_enrol['age_0_5'] + df_enrol['age_5_17'] + df_enrol['age_18_greater']
         )
         # Group by Pincode/State/District to get unique locations
-        enrol_grouped = df_enrol.groupby(['state', 'district', 'pincode'])['total_enrolments'].sum().reset_index()
+        enrol_grouped = group_sums(df_enrol, ['state', 'district', 'pincode'], ['total_enrolments'])
 
         # 2. Load Biometric Data (Updates)
-        # Updated with all uploaded biometric files
-        bio_files = [
-            'api_data_aadhar_biometric_0_500000.csv',
-            'api_data_aadhar_biometric_500000_1000000.csv',
-            'api_data_aadhar_biometric_1000000_1500000.csv',
-            'api_data_aadhar_biometric_1500000_1861108.csv'
-        ]
-        valid_bio = [f for f in bio_files if os.path.exists(f)]
-        if valid_bio:
-            df_bio = pd.concat([pd.read_csv(f) for f in valid_bio])
+        df_bio = aggregate('biometric', ['pincode'])
+        if not df_bio.empty:
             df_bio['total_bio_updates'] = df_bio['bio_age_5_17'] + df_bio['bio_age_17_']
-            bio_grouped = df_bio.groupby('pincode')['total_bio_updates'].sum().reset_index()
+            bio_grouped = group_sums(df_bio, ['pincode'], ['total_bio_updates'])
         else:
             bio_grouped = pd.DataFrame(columns=['pincode', 'total_bio_updates'])
 
         # 3. Load Demographic Data (Updates)
-        # Updated with all uploaded demographic files
-        demo_files = [
-            'api_data_aadhar_demographic_0_500000.csv',
-            'api_data_aadhar_demographic_500000_1000000.csv',
-            'api_data_aadhar_demographic_1000000_1500000.csv',
-            'api_data_aadhar_demographic_1500000_2000000.csv',
-            'api_data_aadhar_demographic_2000000_2071700.csv'
-        ]
-        valid_demo = [f for f in demo_files if os.path.exists(f)]
-        if valid_demo:
-            df_demo = pd.concat([pd.read_csv(f) for f in valid_demo])
+        df_demo = aggregate('demographic', ['pincode'])
+        if not df_demo.empty:
             df_demo['total_demo_updates'] = df_demo['demo_age_5_17'] + df_demo['demo_age_17_']
-            demo_grouped = df_demo.groupby('pincode')['total_demo_updates'].sum().reset_index()
+            demo_grouped = group_sums(df_demo, ['pincode'], ['total_demo_updates'])
         else:
             demo_grouped = pd.DataFrame(columns=['pincode', 'total_demo_updates'])
 
@@ -163,11 +141,12 @@ def load_and_process_data():
         # Total Updates Calculation
         master_df['total_updates'] = master_df['total_bio_updates'] + master_df['total_demo_updates']
 
-        return master_df
+        # Cached compact (narrow integer codes and counts); expand_frame restores the frame
+        return compact_frame(master_df)
 
     except Exception as e:
         st.error(f"Critical Error during data processing. Details: {e}")
-        return pd.DataFrame()
+        return compact_frame(pd.DataFrame())
 
 # --- Advanced Analytics Engine ---
 def perform_cluster_analysis(df, n_clusters=3):
@@ -193,7 +172,7 @@ def perform_cluster_analysis(df, n_clusters=3):
     # We calculate the mean 'Update Ratio' for each cluster to identify which is which
     df['update_ratio'] = df['total_updates'] / (df['total_enrolments'] + 1) # +1 to avoid div/0
     
-    cluster_stats = df.groupby('cluster')['update_ratio'].mean().sort_values()
+    cluster_stats = group_means(df, ['cluster'], ['update_ratio']).set_index('cluster')['update_ratio'].sort_values()
     
     # Map cluster IDs to risk labels based on update ratio (Low ratio = High Risk)
     risk_mapping = {
@@ -209,7 +188,9 @@ def perform_cluster_analysis(df, n_clusters=3):
 
 def main():
     # Load Data First
-    df = load_and_process_data()
+    data_version = tail_version(*FAMILIES) if tail_interval() else None
+    df = expand_frame(load_and_process_data(data_version))
+    watch_tail(data_version, FAMILIES)
     
     if df.empty:
         st.warning("No data loaded. Please check if CSV files are present.")
@@ -381,7 +362,7 @@ def main():
         # Filter for High Risk only for the bar chart to see hotspots
         risk_only = df_analyzed[df_analyzed['Risk_Profile'] == 'High Risk (Ghost Village)']
         if not risk_only.empty:
-            district_risk = risk_only.groupby('district')['pincode'].count().reset_index().sort_values('pincode', ascending=False).head(15)
+            district_risk = group_reduce(risk_only, ['district'], size='pincode').sort_values('pincode', ascending=False).head(15)
             fig_bar = px.bar(
                 district_risk,
                 x='district',
@@ -532,9 +513,9 @@ def main():
         """, unsafe_allow_html=True)
         
         # Group data for Parallel Categories to avoid overcrowding
-        cat_df = df_analyzed.groupby(['state', 'Risk_Profile']).size().reset_index(name='count')
+        cat_df = group_reduce(df_analyzed, ['state', 'Risk_Profile'], size='count')
         # Filter top states by volume if too many
-        top_states = cat_df.groupby('state')['count'].sum().nlargest(10).index
+        top_states = group_sums(cat_df, ['state'], ['count']).set_index('state')['count'].nlargest(10).index
         cat_df = cat_df[cat_df['state'].isin(top_states)]
         
         fig_sankey = px.parallel_categories(
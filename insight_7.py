@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from aadhar_data import FAMILIES, compact_frame, disk_cache, expand_frame, family_totals, group_sums, tail_aggregate, tail_interval, tail_version, watch_tail
 
 # -----------------------------------------------------------------------------
 # 1. PAGE CONFIGURATION & STYLING
@@ -86,73 +87,44 @@ st.markdown("""
 # -----------------------------------------------------------------------------
 # 2. DATA LOADING & PROCESSING ENGINE
 # -----------------------------------------------------------------------------
-@st.cache_data
-def load_and_process_data():
+@st.cache_data(max_entries=2)
+@disk_cache
+def load_and_process_data(version=None):
     """
     Loads biometric, demographic, and enrolment data from CSVs.
     Performs merging, cleaning, and calculates the Divergence Index.
+    In live tail mode (AADHAR_TAIL_SECONDS) `version` moves on whenever rows
+    are appended to the shards, and the totals come from the in-memory tail.
     """
+    aggregate = family_totals if version is None else tail_aggregate
     try:
-        # Load Files (Now including all segments provided for complete analysis)
-        bio_files = [
-            'api_data_aadhar_biometric_0_500000.csv', 
-            'api_data_aadhar_biometric_500000_1000000.csv',
-            'api_data_aadhar_biometric_1000000_1500000.csv',
-            'api_data_aadhar_biometric_1500000_1861108.csv'
-        ]
-        
-        demo_files = [
-            'api_data_aadhar_demographic_0_500000.csv',
-            'api_data_aadhar_demographic_500000_1000000.csv',
-            'api_data_aadhar_demographic_1000000_1500000.csv', 
-            'api_data_aadhar_demographic_1500000_2000000.csv',
-            'api_data_aadhar_demographic_2000000_2071700.csv'
-        ]
-        
-        enrol_files = [
-            'api_data_aadhar_enrolment_0_500000.csv', 
-            'api_data_aadhar_enrolment_500000_1000000.csv',
-            'api_data_aadhar_enrolment_1000000_1006029.csv'
-        ]
-
-        # Generator expressions for efficient concatenation
-        # We use a try-except inside the generator to handle potential missing files gracefully if running locally without all chunks
-        def safe_read(f):
-            try:
-                return pd.read_csv(f)
-            except FileNotFoundError:
-                return pd.DataFrame()
-
-        df_bio = pd.concat((safe_read(f) for f in bio_files), ignore_index=True)
-        df_demo = pd.concat((safe_read(f) for f in demo_files), ignore_index=True)
-        df_enrol = pd.concat((safe_read(f) for f in enrol_files), ignore_index=True)
+        # (state, district) totals come from the aggregate cube's district rollup; raw rows are never held
+        df_bio = aggregate('biometric', ['state', 'district'], ['bio_age_17_', 'bio_age_5_17'])
+        df_demo = aggregate('demographic', ['state', 'district'], ['demo_age_17_', 'demo_age_5_17'])
+        df_enrol = aggregate('enrolment', ['state', 'district'], ['age_18_greater'])
 
         # Basic Cleanup & Standardization
         for df in [df_bio, df_demo, df_enrol]:
             if not df.empty:
                 df.columns = [c.strip() for c in df.columns] # Clean whitespace
-                # Standardize State/District names (Title case for consistency)
-                if 'state' in df.columns:
-                    df['state'] = df['state'].str.title().str.strip()
-                if 'district' in df.columns:
-                    df['district'] = df['district'].str.title().str.strip()
+                # State/District names are normalised once at ingest (shared key dictionary)
 
         # Aggregation by State & District
         # Biometric Focus: Adult Updates (likely aging/mandatory) -> bio_age_17_
         if not df_bio.empty:
-            bio_grp = df_bio.groupby(['state', 'district'])[['bio_age_17_', 'bio_age_5_17']].sum().reset_index()
+            bio_grp = group_sums(df_bio, ['state', 'district'], ['bio_age_17_', 'bio_age_5_17'])
         else:
             bio_grp = pd.DataFrame(columns=['state', 'district', 'bio_age_17_', 'bio_age_5_17'])
         
         # Demographic Focus: Adult Updates (Corrections/KYC) -> demo_age_17_
         if not df_demo.empty:
-            demo_grp = df_demo.groupby(['state', 'district'])[['demo_age_17_', 'demo_age_5_17']].sum().reset_index()
+            demo_grp = group_sums(df_demo, ['state', 'district'], ['demo_age_17_', 'demo_age_5_17'])
         else:
             demo_grp = pd.DataFrame(columns=['state', 'district', 'demo_age_17_', 'demo_age_5_17'])
         
         # Enrolment Focus: New Adults (Inclusion) -> age_18_greater
         if not df_enrol.empty:
-            enrol_grp = df_enrol.groupby(['state', 'district'])[['age_18_greater']].sum().reset_index()
+            enrol_grp = group_sums(df_enrol, ['state', 'district'], ['age_18_greater'])
         else:
              enrol_grp = pd.DataFrame(columns=['state', 'district', 'age_18_greater'])
 
@@ -185,15 +157,18 @@ def load_and_process_data():
 
         master['Cluster'] = master.apply(classify_district, axis=1)
         
-        return master
+        # The whole-number float counts and the cluster labels are cached as narrow codes
+        return compact_frame(master)
 
     except Exception as e:
         st.error(f"Data Loading Error: {str(e)}")
         # Return empty DF structure to prevent app crash
-        return pd.DataFrame(columns=['state', 'district', 'bio_age_17_', 'demo_age_17_', 'age_18_greater', 'DBDI', 'Total_Activity', 'Cluster'])
+        return compact_frame(pd.DataFrame(columns=['state', 'district', 'bio_age_17_', 'demo_age_17_', 'age_18_greater', 'DBDI', 'Total_Activity', 'Cluster']))
 
 # Load the data
-df = load_and_process_data()
+data_version = tail_version(*FAMILIES) if tail_interval() else None
+df = expand_frame(load_and_process_data(data_version))
+watch_tail(data_version, FAMILIES)
 
 # -----------------------------------------------------------------------------
 # 3. NAVIGATION BAR & CONTROLS (Moved to Top as requested)
@@ -366,7 +341,7 @@ if not df_filtered.empty:
         st.plotly_chart(fig_bar_dor, use_container_width=True)
 
     st.markdown("### State-wise Breakdown")
-    state_pivot = df_filtered.groupby('state')[['bio_age_17_', 'demo_age_17_']].sum()
+    state_pivot = group_sums(df_filtered, ['state'], ['bio_age_17_', 'demo_age_17_']).set_index('state')
     state_pivot['State_DBDI'] = state_pivot['demo_age_17_'] / state_pivot['bio_age_17_']
     state_pivot = state_pivot.sort_values(by='State_DBDI', ascending=False)
     
@@ -2,11 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import glob
 import os
 import numpy as np
 from datetime import timedelta
 from groq import Groq  # Import Groq Client
+from aadhar_data import disk_cache, family_bounds, family_totals, group_reduce
 
 # --- 1. SEO & PAGE CONFIGURATION ---
 st.set_page_config(
@@ -218,60 +218,51 @@ client = get_groq_client()
 
 # --- DATA LOADING & PREPROCESSING ---
 @st.cache_data
-def load_data():
-    file_pattern = "api_data_aadhar_demographic_*.csv"
-    files = glob.glob(file_pattern)
-    
-    if not files:
-        files = glob.glob("*.csv")
-    
-    if not files:
+def load_filter_bounds():
+    """
+    Timeline span, state list and noise-slider ceiling, answered from the shard
+    zone maps and the (state, district) rollup instead of the raw rows.
+    """
+    try:
+        bounds = family_bounds('demographic')
+        youth = family_totals('demographic', ['state', 'district'], ['demo_age_5_17'])
+    except Exception as e:
+        st.error(f"Error reading demographic shards: {e}")
         return None
 
-    df_list = []
-    for file in files:
-        try:
-            temp_df = pd.read_csv(file)
-            df_list.append(temp_df)
-        except Exception as e:
-            st.error(f"Error reading {file}: {e}")
-            continue
-            
-    if not df_list:
+    if bounds['date_min'] is None:
         return None
-        
-    raw_df = pd.concat(df_list, ignore_index=True)
-    
-    # Cleaning
-    cols = raw_df.columns
-    youth_col = 'demo_age_5_17'
-    adult_col = [c for c in cols if c.startswith('demo_age_17')][0] 
-    
-    raw_df = raw_df.rename(columns={
-        youth_col: 'Youth_Updates',
-        adult_col: 'Adult_Updates',
-        'state': 'State',
-        'district': 'District',
-        'date': 'Date'
-    })
-    
-    raw_df['Youth_Updates'] = pd.to_numeric(raw_df['Youth_Updates'], errors='coerce').fillna(0)
-    raw_df['Adult_Updates'] = pd.to_numeric(raw_df['Adult_Updates'], errors='coerce').fillna(0)
-    raw_df['Date'] = pd.to_datetime(raw_df['Date'], format='%d-%m-%Y', errors='coerce')
-    
-    return raw_df
 
-# Load raw Data
-raw_df_full = load_data()
+    bounds['youth_q90'] = int(youth['demo_age_5_17'].quantile(0.9))
+    return bounds
+
+@st.cache_data
+@disk_cache
+def load_data(date_range=None, states=None):
+    """
+    District totals and the monthly trend for the selected timeline and states,
+    each read from the smallest rollup of the shared aggregate cube that serves it.
+    """
+    district_df = family_totals('demographic', ['state', 'district'], date_range=date_range, states=states)
+    district_df = district_df.rename(columns={'state': 'State', 'district': 'District', 'demo_age_5_17': 'Youth_Updates', 'demo_age_17_': 'Adult_Updates'})
+
+    monthly = family_totals('demographic', ['month'], date_range=date_range, states=states)
+    trend_df = (monthly.assign(Month_Year=monthly['month'].dt.strftime('%Y-%m'))
+                [['Month_Year', 'demo_age_5_17', 'demo_age_17_']]
+                .rename(columns={'demo_age_5_17': 'Youth_Updates', 'demo_age_17_': 'Adult_Updates'}))
+    return district_df, trend_df
+
+# Load filter bounds (the rows themselves are loaded once the filters are known)
+filter_bounds = load_filter_bounds()
 
-if raw_df_full is None:
+if filter_bounds is None:
     st.error("No data found. Please place the CSV files in the same directory.")
     st.stop()
 
 # --- 4. DEEP LINKING SETUP ---
 query_params = st.query_params
 default_states = query_params.get_all("state") if "state" in query_params else []
-valid_states = sorted(raw_df_full['State'].unique())
+valid_states = filter_bounds['states']
 default_states = [s for s in default_states if s in valid_states]
 
 # --- MAIN DASHBOARD HEADER ---
@@ -315,8 +306,8 @@ with col_filter_1:
 
 with col_filter_2:
     # Timeline Selection
-    min_date = raw_df_full['Date'].min().date()
-    max_date = raw_df_full['Date'].max().date()
+    min_date = filter_bounds['date_min'].date()
+    max_date = filter_bounds['date_max'].date()
     
     selected_date_range = st.date_input(
         "Select Timeline",
@@ -330,7 +321,7 @@ with col_filter_3:
     min_updates = st.slider(
         "Filter Noise (Minimum Volume)",
         min_value=0,
-        max_value=int(raw_df_full.groupby(['State', 'District'])['Youth_Updates'].sum().quantile(0.9)), 
+        max_value=filter_bounds['youth_q90'], 
         value=100,
         step=50,
         help="We recommend a minimum of 100 for statistical accuracy."
@@ -339,29 +330,23 @@ with col_filter_3:
 # --- DATA FILTERING & AGGREGATION ---
 # 1. Timeline Filter
 if isinstance(selected_date_range, tuple) and len(selected_date_range) == 2:
-    start_date, end_date = selected_date_range
-    filtered_raw = raw_df_full[
-        (raw_df_full['Date'].dt.date >= start_date) & 
-        (raw_df_full['Date'].dt.date <= end_date)
-    ]
+    timeline = tuple(selected_date_range)
 else:
-    filtered_raw = raw_df_full
+    timeline = None
 
 # 2. State Filter Logic & Query Param Update
 if selected_states:
     st.query_params["state"] = selected_states
-    filtered_raw = filtered_raw[filtered_raw['State'].isin(selected_states)]
 else:
     if "state" in st.query_params:
         del st.query_params["state"]
 
 # 3. Aggregations based on Timeline/State
-district_df = filtered_raw.groupby(['State', 'District'])[['Youth_Updates', 'Adult_Updates']].sum().reset_index()
+# Both filters go to the cube queries, which only read the rollup rows of the selected days and states
+district_df, trend_df = load_data(timeline, tuple(selected_states) or None)
 district_df['Total_Updates'] = district_df['Youth_Updates'] + district_df['Adult_Updates']
 district_df['Youth_Index'] = (district_df['Youth_Updates'] / district_df['Total_Updates']) * 100
 
-filtered_raw['Month_Year'] = filtered_raw['Date'].dt.to_period('M').astype(str)
-trend_df = filtered_raw.groupby(['Month_Year'])[['Youth_Updates', 'Adult_Updates']].sum().reset_index()
 trend_df['Total_Updates'] = trend_df['Youth_Updates'] + trend_df['Adult_Updates']
 
 # 4. Noise Filter
@@ -551,12 +536,8 @@ with tab2:
     States on the right are "Older" and may require more Employment/Industrial support.
     """)
     
-    state_stats = filtered_df.groupby('State').agg({
-        'Total_Updates': 'sum',
-        'Youth_Updates': 'sum',
-        'Adult_Updates': 'sum',
-        'Youth_Index': 'mean' 
-    }).reset_index().sort_values('Youth_Index', ascending=False)
+    state_stats = group_reduce(filtered_df, ['State'], sums=['Total_Updates', 'Youth_Updates', 'Adult_Updates'],
+                               means=['Youth_Index']).sort_values('Youth_Index', ascending=False)
     
     col_a, col_b = st.columns([2, 1])
     
@@ -0,0 +1,29 @@
+import os
+import shutil
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHARDS = ['api_data_aadhar_demographic_2000000_2071700.csv', 'api_data_aadhar_enrolment_1000000_1006029.csv']
+
+# Rows copied from each shard; enough for every state and a few hundred districts
+SAMPLE_ROWS = 5000
+
+
+@pytest.fixture
+def shard_dir(tmp_path, monkeypatch):
+    """
+    A data folder holding the head of the repository's shards and its alias
+    table, with an empty cache of its own.
+    """
+    for name in SHARDS:
+        with open(os.path.join(REPO_DIR, name)) as src, open(tmp_path / name, 'w') as dst:
+            for i, line in enumerate(src):
+                if i > SAMPLE_ROWS:
+                    break
+                dst.write(line)
+    shutil.copy(os.path.join(REPO_DIR, 'aadhar_aliases.csv'), tmp_path)
+    monkeypatch.setenv('AADHAR_DATA_DIR', str(tmp_path))
+    monkeypatch.setenv('AADHAR_CACHE_DIR', str(tmp_path / '.cache'))
+    monkeypatch.delenv('AADHAR_TAIL_SECONDS', raising=False)
+    return str(tmp_path)
@@ -0,0 +1,47 @@
+import pandas as pd
+
+from aadhar_data.aliases import load_aliases, read_alias_table, resolve_aliases, update_alias_table, write_alias_table
+
+
+def _table(directory, rows):
+    write_alias_table([dict(zip(['field', 'state', 'alias', 'canonical', 'reviewed'], row)) for row in rows], directory)
+
+
+def test_district_alias_applies_only_in_its_state(tmp_path):
+    _table(str(tmp_path), [
+        ('state', '', 'Orissa', 'Odisha', 'yes'),
+        ('district', 'Odisha', 'Khordha', 'Khorda', 'yes'),
+        ('district', 'Karnataka', 'Hasan', 'Hassan', 'yes'),
+    ])
+    aliases = load_aliases(str(tmp_path))
+    df = pd.DataFrame({
+        'state': ['Orissa', 'karnataka', 'Assam', 'Odisha', None],
+        'district': ['Khordha', 'hasan', 'Hasan', None, 'Hasan'],
+    }).astype('category')
+    resolved = resolve_aliases(df, aliases)
+    assert resolved['state'].tolist()[:4] == ['Odisha', 'Karnataka', 'Assam', 'Odisha']
+    assert resolved['district'].tolist()[:3] == ['Khorda', 'Hassan', 'Hasan']
+    assert pd.isna(resolved['district'][3])
+    # Without a state the row keeps its own spelling
+    assert resolved['district'][4] == 'Hasan'
+
+
+def test_district_chains_stay_within_their_state(tmp_path):
+    _table(str(tmp_path), [
+        ('district', 'Telangana', 'Rangareddy', 'K.V. Rangareddy', 'yes'),
+        ('district', 'Andhra Pradesh', 'K.V. Rangareddy', 'K.V.Rangareddy', 'yes'),
+        ('district', '', 'Gondia', 'Gondiya', 'yes'),
+    ])
+    assert load_aliases(str(tmp_path))['district'] == {
+        ('Telangana', 'Rangareddy'): 'K.V. Rangareddy',
+        ('Andhra Pradesh', 'K.V. Rangareddy'): 'K.V.Rangareddy',
+    }
+
+
+def test_suggested_district_rows_record_their_state(tmp_path):
+    added = update_alias_table({'Odisha': 10}, {'Odisha': {'Khorda': 10, 'Khordha': 2}, 'Bihar': {'Patna': 5}}, str(tmp_path))
+    assert added == 1
+    (row,) = read_alias_table(str(tmp_path))
+    assert (row['field'], row['state'], row['alias'], row['canonical']) == ('district', 'Odisha', 'Khordha', 'Khorda')
+    # The same spelling in another state is a new proposal
+    assert update_alias_table({}, {'Assam': {'Khorda': 10, 'Khordha': 2}}, str(tmp_path)) == 1
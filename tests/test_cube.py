@@ -0,0 +1,31 @@
+import shutil
+
+import pandas as pd
+
+from aadhar_data import cube_query
+from aadhar_data.cube import open_cube
+from aadhar_data.store import cache_dir
+
+
+def test_cold_cache_cube_has_known_keys(shard_dir):
+    table = open_cube()
+    assert table.num_rows
+    assert (table.column('state').to_numpy() >= 0).all()
+    assert (table.column('district').to_numpy() >= 0).all()
+    assert not cube_query(['state'])['state'].isna().any()
+
+
+def test_cold_and_warm_cache_agree(shard_dir):
+    queries = [
+        (['state', 'district'], None),
+        (['state', 'month'], None),
+        (['state', 'date'], (pd.Timestamp('2025-09-01'), pd.Timestamp('2025-12-31'))),
+    ]
+    cold = [cube_query(by, date_range=dates) for by, dates in queries]
+    warm = [cube_query(by, date_range=dates) for by, dates in queries]
+    shutil.rmtree(cache_dir())
+    rebuilt = [cube_query(by, date_range=dates) for by, dates in queries]
+    for a, b, c in zip(cold, warm, rebuilt):
+        assert len(a)
+        pd.testing.assert_frame_equal(a, b)
+        pd.testing.assert_frame_equal(a, c)
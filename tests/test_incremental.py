@@ -0,0 +1,31 @@
+import os
+import shutil
+
+import pandas as pd
+
+from aadhar_data import incremental_aggregate
+from aadhar_data.store import cache_dir
+
+SHARD = 'api_data_aadhar_enrolment_1000000_1006029.csv'
+
+
+def test_cold_and_warm_cache_agree(shard_dir):
+    cold = incremental_aggregate('enrolment', ['state', 'district'])
+    assert len(cold) > 1
+    assert not cold[['state', 'district']].isna().any().any()
+    pd.testing.assert_frame_equal(cold, incremental_aggregate('enrolment', ['state', 'district']))
+    shutil.rmtree(cache_dir())
+    pd.testing.assert_frame_equal(cold, incremental_aggregate('enrolment', ['state', 'district']))
+
+
+def test_new_shard_is_folded_in(shard_dir):
+    before = incremental_aggregate('enrolment', ['state'])
+    with open(os.path.join(shard_dir, SHARD)) as fh:
+        header = fh.readline()
+    with open(os.path.join(shard_dir, 'api_data_aadhar_enrolment_1006029_1006030.csv'), 'w') as fh:
+        fh.write(header + '18-12-2025,Goa,North Goa,403001,4,5,6\n')
+    folded = incremental_aggregate('enrolment', ['state'])
+    shutil.rmtree(cache_dir())
+    pd.testing.assert_frame_equal(folded, incremental_aggregate('enrolment', ['state']))
+    goa = folded.set_index('state').loc['Goa', 'age_18_greater']
+    assert goa == before.set_index('state')['age_18_greater'].get('Goa', 0) + 6
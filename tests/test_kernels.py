@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aadhar_data import group_means, group_reduce, group_sums
+
+
+def _frame(dtype, rows=500):
+    rng = np.random.default_rng(7)
+    values = rng.integers(0, 50, rows)
+    df = pd.DataFrame({
+        'state': pd.Categorical(rng.choice(['Bihar', 'Goa', 'Kerala'], rows)),
+        'day': rng.integers(0, 30, rows).astype(np.int16),
+        'name': rng.choice(['a', 'b', 'c', 'd'], rows).astype(object),
+        'value': values.astype(dtype) if dtype != 'object' else values.astype(object),
+    })
+    if dtype.startswith('float'):
+        df.loc[::7, 'value'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('dtype', ['int16', 'uint32', 'int64', 'bool', 'float32', 'float64', 'object'])
+@pytest.mark.parametrize('by', [['state'], ['day'], ['state', 'name'], ['name', 'day']])
+def test_group_reduce_matches_pandas(dtype, by):
+    df = _frame(dtype)
+    grouped = df.groupby(by, observed=True)['value']
+    expected = pd.DataFrame({'value': grouped.sum(), 'mean': grouped.mean(), 'rows': grouped.size()}).reset_index()
+    result = group_reduce(df.assign(mean=df['value']), by, sums=['value'], means=['mean'], size='rows')
+    # The kernel widens integer sums to 64 bits and averages object columns as float64
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    if df['value'].dtype.kind in 'iu':
+        assert result['value'].dtype == (np.uint64 if df['value'].dtype.kind == 'u' else np.int64)
+
+
+def test_integer_sums_do_not_wrap():
+    df = pd.DataFrame({'day': np.arange(4, dtype=np.int16), 'value': np.full(4, 2**31, dtype=np.uint32)})
+    sums = group_sums(df, ['day'], ['value'])
+    assert sums['value'].dtype == np.uint64
+    assert sums['value'].cumsum().iloc[-1] == 4 * 2**31
+
+
+def test_means_of_empty_object_frame():
+    # insight_6 builds this frame when no biometric shards are present
+    df = pd.DataFrame(columns=['cluster', 'update_ratio'])
+    result = group_means(df, ['cluster'], ['update_ratio'])
+    assert list(result.columns) == ['cluster', 'update_ratio']
+    assert result.empty
+    assert result['update_ratio'].dtype == np.float64
+
+
+def test_key_space_wider_than_int64():
+    # Four keys with ~2**20 distinct values each: the slot product passes 2**63
+    rng = np.random.default_rng(11)
+    rows = 200_000
+    df = pd.DataFrame({f'k{i}': rng.integers(0, 2**40, rows) * 2**20 for i in range(4)})
+    df['k3'] = np.where(rng.random(rows) < 0.5, df['k0'], df['k3'])
+    df.loc[:999, ['k1', 'k2', 'k3']] = df.loc[1000:1999, ['k1', 'k2', 'k3']].to_numpy()
+    df['value'] = rng.integers(0, 100, rows)
+    by = ['k0', 'k1', 'k2', 'k3']
+    for sort in (True, False):
+        result = group_sums(df, by, ['value'], sort=sort)
+        expected = df.groupby(by, sort=sort)['value'].sum().reset_index()
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,14 @@
+import pyarrow as pa
+
+from aadhar_data.memory import track_peak
+
+
+def test_arrow_figure_covers_only_the_block():
+    held = pa.array(range(10**6))
+    with track_peak() as report:
+        pass
+    assert report['arrow_mb'] == 0
+    with track_peak() as report:
+        block = pa.array(range(10**6))
+    assert report['arrow_mb'] >= block.nbytes / 2**20
+    del held
@@ -0,0 +1,21 @@
+import shutil
+
+import pandas as pd
+
+from aadhar_data import join_out_of_core
+from aadhar_data.store import cache_dir
+
+SPECS = [
+    ('demographic', ['day', 'state', 'district', 'demo_age_5_17', 'demo_age_17_'], None),
+    ('enrolment', ['day', 'state', 'district', 'age_0_5', 'age_5_17', 'age_18_greater'], None),
+]
+
+
+def test_cold_and_warm_cache_agree(shard_dir):
+    for keys in (['day', 'state', 'district'], ['state', 'district']):
+        cold = join_out_of_core(SPECS, keys)
+        assert len(cold) > 1
+        assert not cold[['state', 'district']].isna().any().any()
+        pd.testing.assert_frame_equal(cold, join_out_of_core(SPECS, keys))
+        shutil.rmtree(cache_dir())
+        pd.testing.assert_frame_equal(cold, join_out_of_core(SPECS, keys))
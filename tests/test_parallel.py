@@ -0,0 +1,35 @@
+import os
+import shutil
+
+import pandas as pd
+
+from aadhar_data import aggregate_family, load_family
+from aadhar_data.store import cache_dir
+
+SHARD = 'api_data_aadhar_enrolment_1000000_1006029.csv'
+
+
+def _overlapping_shards(shard_dir):
+    # Two more shards whose rows repeat the tail of the one before
+    with open(os.path.join(shard_dir, SHARD)) as fh:
+        header, *lines = fh.readlines()
+    for start, rows in ((1006029, lines[-1500:]), (1007529, lines[-700:])):
+        with open(os.path.join(shard_dir, f'api_data_aadhar_enrolment_{start}_{start + len(rows)}.csv'), 'w') as fh:
+            fh.writelines([header] + rows)
+
+
+def test_cold_parallel_load_matches_sequential(shard_dir, monkeypatch):
+    _overlapping_shards(shard_dir)
+    monkeypatch.setenv('AADHAR_WORKERS', '3')
+    parallel = aggregate_family('enrolment', ['state', 'district'])
+    snapshots = sorted(os.listdir(os.path.join(cache_dir(), 'snapshots', 'enrolment')))
+    rows = len(load_family('enrolment'))
+
+    shutil.rmtree(cache_dir())
+    monkeypatch.setenv('AADHAR_WORKERS', '1')
+    pd.testing.assert_frame_equal(parallel, aggregate_family('enrolment', ['state', 'district']))
+    assert sorted(os.listdir(os.path.join(cache_dir(), 'snapshots', 'enrolment'))) == snapshots
+    # The repeated rows were dropped once, not counted again per shard
+    assert len(load_family('enrolment')) == rows
+    with open(os.path.join(shard_dir, SHARD)) as fh:
+        assert rows <= sum(1 for _ in fh) - 1
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from aadhar_data import family_totals, query
+
+
+def test_integer_sums_come_back_as_small_integers(shard_dir):
+    df = query("SELECT state, SUM(demo_age_5_17) AS demo_age_5_17, COUNT(*) AS rows FROM demographic GROUP BY state")
+    assert df['demo_age_5_17'].dtype == np.uint32
+    assert df['rows'].dtype == np.int32
+    expected = family_totals('demographic', ['state'], ['demo_age_5_17'])
+    got = df.dropna(subset=['state']).groupby('state', observed=True)['demo_age_5_17'].sum()
+    assert got.astype(np.int64).to_dict() == expected.set_index('state')['demo_age_5_17'].astype(np.int64).to_dict()
+
+
+def test_sum_over_no_rows_stays_float(shard_dir):
+    df = query("SELECT SUM(demo_age_5_17) AS demo_age_5_17 FROM demographic WHERE false")
+    assert df['demo_age_5_17'].dtype == np.float64
+    assert pd.isna(df['demo_age_5_17'][0])
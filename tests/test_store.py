@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+import time
+
+from aadhar_data.store import file_lock
+
+
+def _add(path, times):
+    for _ in range(times):
+        with file_lock(path):
+            with open(path) as fh:
+                value = int(fh.read())
+            time.sleep(0.001)
+            with open(path, 'w') as fh:
+                fh.write(str(value + 1))
+
+
+def _hold(path, seconds):
+    with file_lock(path):
+        time.sleep(seconds)
+
+
+def test_lock_excludes_other_processes(tmp_path):
+    path = str(tmp_path / 'counter')
+    with open(path, 'w') as fh:
+        fh.write('0')
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_add, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    with open(path) as fh:
+        assert fh.read() == '100'
+
+
+def test_lock_is_not_stolen_and_dies_with_its_holder(tmp_path):
+    path = str(tmp_path / 'state')
+    context = multiprocessing.get_context('spawn')
+    holder = context.Process(target=_hold, args=(path, 60))
+    holder.start()
+    while not os.path.exists(f"{path}.lock"):
+        time.sleep(0.01)
+    time.sleep(0.5)
+    # An old lock file is not taken over while its holder lives
+    os.utime(f"{path}.lock", (0, 0))
+    waiter = context.Process(target=_hold, args=(path, 0))
+    waiter.start()
+    waiter.join(1)
+    assert waiter.is_alive()
+    # Killing the holder releases the lock
+    holder.kill()
+    holder.join()
+    waiter.join(10)
+    assert waiter.exitcode == 0
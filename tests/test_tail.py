@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from aadhar_data import load_family, tail_aggregate, tail_rows, tail_version
+from aadhar_data.tail import _families
+
+SHARD = 'api_data_aadhar_enrolment_1000000_1006029.csv'
+COLUMNS = ['day', 'state', 'district', 'pincode', 'age_0_5', 'age_5_17', 'age_18_greater']
+
+
+def test_row_written_across_polls_is_read_whole(shard_dir, monkeypatch):
+    monkeypatch.setenv('AADHAR_TAIL_SECONDS', '1')
+    path = os.path.join(shard_dir, SHARD)
+    with open(path, 'a') as fh:
+        fh.write('17-12-2025,Bihar,Patna,800001,9,9,9')
+    rows = len(tail_rows('enrolment', COLUMNS))
+    totals = tail_aggregate('enrolment', ['state'])
+    assert not (tail_rows('enrolment', COLUMNS)['pincode'] == 800001).any()
+
+    with open(path, 'a') as fh:
+        fh.write('8\n')
+    new = tail_rows('enrolment', COLUMNS)
+    assert len(new) == rows + 1
+    assert new.iloc[-1][['pincode', 'age_0_5', 'age_5_17', 'age_18_greater']].tolist() == [800001, 9, 9, 98]
+    bihar = tail_aggregate('enrolment', ['state']).set_index('state').loc['Bihar', 'age_18_greater']
+    assert bihar == totals.set_index('state').loc['Bihar', 'age_18_greater'] + 98
+
+    # Both followers picked the row up, so it is no longer held by the tail
+    state = next(s for (_, family), s in _families.items() if family == 'enrolment')
+    assert state['chunks'] == [] and state['first'] == 1
+    assert tail_version('enrolment')[0][1] == 1
+
+    # A restart ingests the completed row like any other
+    monkeypatch.delenv('AADHAR_TAIL_SECONDS')
+    fresh = load_family('enrolment', COLUMNS)
+    pd.testing.assert_frame_equal(fresh.sort_values(COLUMNS, ignore_index=True),
+                                  new.sort_values(COLUMNS, ignore_index=True), check_categorical=False)